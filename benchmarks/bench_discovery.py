@@ -0,0 +1,75 @@
+"""
+Startup cost versus number of components: importing them, finding their functions (registry and scan), and
+listing them from source without importing (lazy components)
+
+Each measurement runs in a fresh interpreter. Prints a json report, e.g.:
+    python benchmarks/bench_discovery.py --components 1 10 50 --functions 100
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from common import REPO, synthetic_modules
+
+_MEASURE = '''
+import sys, time, json
+sys.path[:0] = [{repo!r}, {tmp!r}]
+names = {names!r}
+from pygenerategui import lazy, registry
+t = time.perf_counter()
+if {lazy}:
+    funcs = [f for name in names for f in lazy.LazyComponent(name).functions()]
+    print(json.dumps({{'list_from_source_s': time.perf_counter() - t, 'functions': len(funcs),
+                      'imported': any(name in sys.modules for name in names)}}))
+else:
+    modules = [__import__(name) for name in names]
+    imported = time.perf_counter()
+    found = [f for m in modules for f in registry.find_functions(m)]
+    registry_done = time.perf_counter()
+    scanned = [f for m in modules for f in registry.scan_functions(m)]
+    scan_done = time.perf_counter()
+    print(json.dumps({{'import_s': imported - t, 'find_functions_s': registry_done - imported,
+                      'scan_functions_s': scan_done - registry_done, 'functions': len(found),
+                      'scanned_functions': len(scanned)}}))
+'''
+
+
+def measure(tmp: str, names: list, lazy: bool, repeat: int) -> dict:
+    runs = []
+    # The first run only writes the .pyc files, so compiling isn't measured
+    for _ in range(repeat + 1):
+        out = subprocess.run([sys.executable, '-c', _MEASURE.format(repo=REPO, tmp=tmp, names=names, lazy=lazy)],
+                             check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out))
+    # Fastest run of each timing
+    best = dict(runs[1])
+    for key in best:
+        if key.endswith('_s'):
+            best[key] = min(r[key] for r in runs[1:])
+    return best
+
+
+def run(components: list, functions: int, params: int, repeat: int) -> dict:
+    results = []
+    for count in components:
+        with synthetic_modules(count, functions, params) as (tmp, names):
+            result = {'components': count, 'functions_per_component': functions, 'params': params}
+            result.update(measure(tmp, names, False, repeat))
+            result.update(measure(tmp, names, True, repeat))
+        results.append(result)
+    return {'benchmark': 'discovery', 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--components', type=int, nargs='+', default=[1, 10, 50], help='component counts to try')
+    parser.add_argument('--functions', type=int, default=100, help='decorated functions per component')
+    parser.add_argument('--params', type=int, default=8, help='args per function')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the fastest is kept')
+    args = parser.parse_args()
+    print(json.dumps(run(args.components, args.functions, args.params, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
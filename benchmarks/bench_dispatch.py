@@ -0,0 +1,95 @@
+"""
+Cost of getting a call run: submit-to-result latency and throughput of each executor, nested call trees, and
+batch runs
+
+Prints a json report, e.g.:
+    python benchmarks/bench_dispatch.py --calls 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from common import add
+from pygenerategui.executor import FunctionCall, ProcessExecutor, ThreadExecutor, WarmProcessExecutor
+
+
+def wait_for(job):
+    done = threading.Event()
+    job.add_done_callback(lambda j: done.set())
+    done.wait()
+    if job.error is not None:
+        raise job.error
+    return job.result
+
+
+def latency(executor, calls: int) -> float:
+    """Mean seconds from submit to result, one call at a time"""
+    wait_for(executor.submit(FunctionCall(add, {'a': 0})))
+    start = time.perf_counter()
+    for i in range(calls):
+        wait_for(executor.submit(FunctionCall(add, {'a': i})))
+    return (time.perf_counter() - start) / calls
+
+
+def throughput(executor, calls: int) -> float:
+    """Calls per second with everything submitted at once"""
+    start = time.perf_counter()
+    jobs = [executor.submit(FunctionCall(add, {'a': i})) for i in range(calls)]
+    for job in jobs:
+        wait_for(job)
+    return calls / (time.perf_counter() - start)
+
+
+def nested_tree(width: int, depth: int) -> FunctionCall:
+    if depth == 0:
+        return FunctionCall(add, {'a': width})
+    return FunctionCall(add, {'a': nested_tree(width, depth - 1), 'b': nested_tree(width + 1, depth - 1)})
+
+
+def run(calls: int, process_calls: int, workers: int, batch_rows: int) -> dict:
+    from pygenerategui.batch import BatchRunner
+
+    results = {'benchmark': 'dispatch', 'calls': calls, 'workers': workers}
+    executor = ThreadExecutor(workers)
+    results['thread_latency_us'] = latency(executor, calls) * 1e6
+    results['thread_calls_per_s'] = throughput(executor, calls)
+    tree = nested_tree(0, 6)
+    start = time.perf_counter()
+    wait_for(executor.submit(tree))
+    results['nested_tree_calls'] = len(list(tree.walk()))
+    results['nested_tree_s'] = time.perf_counter() - start
+    executor.shutdown()
+
+    executor = ProcessExecutor(workers)
+    results['process_latency_ms'] = latency(executor, process_calls) * 1000
+    executor.shutdown()
+
+    executor = WarmProcessExecutor(['common'], workers)
+    results['warm_process_latency_us'] = latency(executor, calls) * 1e6
+    results['warm_process_calls_per_s'] = throughput(executor, calls)
+    executor.shutdown()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runner = BatchRunner(FunctionCall(add, {}), ({'a': str(i)} for i in range(batch_rows)),
+                             os.path.join(tmp, 'out.jsonl'), workers=workers)
+        runner.run()
+        results['batch_rows'] = batch_rows
+        results['batch_rows_per_s'] = runner.rate
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000, help='calls per thread / warm process measurement')
+    parser.add_argument('--process-calls', type=int, default=20, help='calls for the process-per-call executor')
+    parser.add_argument('--workers', type=int, default=4, help='executor workers')
+    parser.add_argument('--batch-rows', type=int, default=20000, help='rows in the batch run')
+    args = parser.parse_args()
+    print(json.dumps(run(args.calls, args.process_calls, args.workers, args.batch_rows), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Form build cost versus signature size: FunctionGUI.build_function_gui for functions with more and more args
+(past FunctionGUI.virtualize_threshold forms are virtualized), and big option lists
+
+Needs a display. Prints a json report, e.g.:
+    xvfb-run python benchmarks/bench_forms.py --params 5 20 40 100 400
+"""
+import argparse
+import importlib
+import json
+
+from common import best_of, synthetic_modules, tk_root
+
+
+def run(params: list, options: int, repeat: int) -> dict:
+    root = tk_root()
+    if root is None:
+        return {'benchmark': 'forms', 'skipped': 'no display - run under xvfb-run'}
+    import tkinter.ttk as ttk
+    from pygenerategui import registry
+    from pygenerategui.function_spec import get_function_spec
+    from pygenerategui.gui_component import FunctionGUI
+
+    parent = ttk.Frame(root)
+    results = []
+    for n_params in params:
+        with synthetic_modules(1, 1, n_params, options=options) as (tmp, names):
+            func = registry.find_functions(importlib.import_module(names[0]))[0]
+            get_function_spec(func)
+
+            def build():
+                fgui = FunctionGUI.build_function_gui(parent, func)
+                fgui.place()
+                root.update_idletasks()
+                return fgui
+
+            fgui = build()
+            get_call_s = best_of(fgui.get_call, repeat)
+            fgui.remove()
+
+            def build_and_remove():
+                build().remove()
+
+            results.append({'params': n_params, 'options_per_override': options,
+                            'virtualized': n_params > FunctionGUI.virtualize_threshold,
+                            'build_ms': best_of(build_and_remove, repeat) * 1000,
+                            'get_call_ms': get_call_s * 1000})
+    root.destroy()
+    return {'benchmark': 'forms', 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--params', type=int, nargs='+', default=[5, 20, 40, 100, 400], help='args per function')
+    parser.add_argument('--options', type=int, default=1000, help='entries in each overriding dict / Enum')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the fastest is kept')
+    args = parser.parse_args()
+    print(json.dumps(run(args.params, args.options, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Import-time cost of tagging functions with @pggui
+
+Each measurement runs in a fresh interpreter. Prints a json report, e.g.:
+    python benchmarks/bench_import.py --functions 5000 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEASURE = '''
+import sys, time
+sys.path[:0] = [{repo!r}, {tmp!r}]
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(elapsed, 'tkinter' in sys.modules)
+'''
+
+
+def write_module(path: str, n: int, decorated: bool):
+    with open(path, 'w', encoding='utf-8') as f:
+        if decorated:
+            f.write('from pygenerategui import pggui\n\n')
+        else:
+            f.write('def pggui(name=None, **kwargs):\n'
+                    '    return name if callable(name) else (lambda func: func)\n\n')
+        for i in range(n):
+            f.write(f'@pggui(name="func {i}", b={{"x": 1, "y": 2}})\n'
+                    f'def func_{i}(a: int = {i}, b: int = 1) -> int:\n'
+                    f'    """\n    Function {i}\n    :param a: The a param\n    :return: a + b\n    """\n'
+                    f'    return a + b\n\n')
+
+
+def measure(tmp: str, module: str, repeat: int) -> tuple:
+    times = []
+    tk_loaded = False
+    # The first run only writes the .pyc files, so compiling isn't measured
+    for _ in range(repeat + 1):
+        out = subprocess.run([sys.executable, '-c', _MEASURE.format(repo=REPO, tmp=tmp, module=module)],
+                             check=True, capture_output=True, text=True).stdout.split()
+        times.append(float(out[0]))
+        tk_loaded = tk_loaded or out[1] == 'True'
+    return min(times[1:]), tk_loaded
+
+
+def run(functions: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        write_module(os.path.join(tmp, 'bench_decorated.py'), functions, True)
+        write_module(os.path.join(tmp, 'bench_plain.py'), functions, False)
+        package_s, package_tk = measure(tmp, 'pygenerategui', repeat)
+        decorated_s, decorated_tk = measure(tmp, 'bench_decorated', repeat)
+        plain_s, _ = measure(tmp, 'bench_plain', repeat)
+    return {
+        'benchmark': 'import',
+        'functions': functions,
+        'import_pygenerategui_s': package_s,
+        'import_decorated_module_s': decorated_s,
+        'import_plain_module_s': plain_s,
+        'decorator_overhead_per_function_us': (decorated_s - package_s - plain_s) / functions * 1e6,
+        'tkinter_imported': package_tk or decorated_tk,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--functions', type=int, default=2000, help='decorated functions in the generated module')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement, the fastest is kept')
+    args = parser.parse_args()
+    print(json.dumps(run(args.functions, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Result rendering cost versus result size: preview text, table detection, sorting and filtering, and (with a
+display) the result widgets themselves
+
+Prints a json report, e.g.:
+    python benchmarks/bench_render.py --sizes 1000 100000 1000000
+    xvfb-run python benchmarks/bench_render.py   # includes the widgets
+"""
+import argparse
+import json
+
+from common import best_of, tk_root
+
+
+def results_of_size(n: int) -> dict:
+    return {
+        'str': 'x' * n,
+        'bytes': b'x' * n,
+        'list': list(range(n)),
+        'dict': {f'key {i}': i for i in range(n)},
+        'table': [{'host': f'host-{i}', 'rack': i % 40, 'load': (i * 7.3) % 100} for i in range(n)],
+    }
+
+
+def run(sizes: list, repeat: int) -> dict:
+    from pygenerategui.render import as_table, preview_text
+
+    root = tk_root()
+    if root is not None:
+        import tkinter.ttk as ttk
+        from pygenerategui.gui_component import ReturnLabelBlock, TableResultBlock
+        parent = ttk.Frame(root)
+
+    results = []
+    for n in sizes:
+        for kind, value in results_of_size(n).items():
+            result = {'kind': kind, 'size': n,
+                      'preview_ms': best_of(lambda: preview_text(value, 256), repeat) * 1000}
+            table = as_table(value)
+            if table is not None:
+                result['as_table_ms'] = best_of(lambda: as_table(value), repeat) * 1000
+                # Sort orders and row texts are kept by the model, so the first sort / filter is the slow one
+                result['first_sort_ms'] = best_of(lambda: as_table(value).sort(2, descending=True), repeat) * 1000
+                result['first_filter_ms'] = best_of(lambda: as_table(value).filter('host-1'), repeat) * 1000
+                table.sort(2)
+                result['resort_ms'] = best_of(lambda: table.sort(2, descending=True), repeat) * 1000
+
+            if root is not None:
+                def widget():
+                    if table is not None:
+                        block = TableResultBlock(parent, 'Result', value, as_table(value))
+                    else:
+                        block = ReturnLabelBlock(parent, 'Result', value)
+                    block.place()
+                    root.update_idletasks()
+                    block.remove()
+                result['widget_ms'] = best_of(widget, repeat) * 1000
+            results.append(result)
+    report = {'benchmark': 'render', 'results': results}
+    if root is None:
+        report['widgets_skipped'] = 'no display - run under xvfb-run to include the widgets'
+    else:
+        root.destroy()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000], help='result sizes to try')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the fastest is kept')
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-function costs after discovery: parsing signatures and docstrings into specs (cold and memoized), converting
+args the way the widgets do, and building / searching the function picker's index
+
+Prints a json report, e.g.:
+    python benchmarks/bench_specs.py --params 5 20 100 --functions 200
+"""
+import argparse
+import importlib
+import json
+
+from common import best_of, synthetic_modules
+
+# Form text for each kind of arg in the synthetic modules (str, int, float, bool, dict option, Enum option)
+_RAW_VALUES = ('text', '7', '1.5', 'True', 'option 7', 'choice_7')
+
+
+def run(params: list, functions: int, picker_functions: int, repeat: int) -> dict:
+    from pygenerategui import registry
+    from pygenerategui.function_spec import clear_spec_cache, convert_arg, get_function_spec, parse_docstring
+    from pygenerategui.search import FunctionIndex, function_entry
+
+    results = []
+    for n_params in params:
+        with synthetic_modules(1, functions, n_params) as (tmp, names):
+            funcs = registry.find_functions(importlib.import_module(names[0]))
+
+            def cold():
+                clear_spec_cache()
+                for func in funcs:
+                    get_function_spec(func)
+
+            def warm():
+                for func in funcs:
+                    get_function_spec(func)
+
+            def docstrings():
+                for func in funcs:
+                    parse_docstring(func.__doc__)
+
+            spec = get_function_spec(funcs[0])
+            raw = {name: _RAW_VALUES[int(name[1:]) % 6] for name in spec.args}
+
+            def convert():
+                for name, value in raw.items():
+                    convert_arg(spec.args[name], value)
+
+            cold_s = best_of(cold, repeat)
+            results.append({
+                'params': n_params,
+                'functions': len(funcs),
+                'spec_cold_per_function_us': cold_s / len(funcs) * 1e6,
+                'spec_memoized_per_function_us': best_of(warm, repeat) / len(funcs) * 1e6,
+                'parse_docstring_per_function_us': best_of(docstrings, repeat) / len(funcs) * 1e6,
+                'convert_all_args_us': best_of(convert, repeat) * 1e6,
+            })
+
+    # The picker's index over many functions
+    with synthetic_modules(1, picker_functions, 2, doc_lines=2, options=2) as (tmp, names):
+        funcs = registry.find_functions(importlib.import_module(names[0]))
+        entries = [function_entry(f._pggui_name, f) for f in funcs]
+        index = FunctionIndex(entries)
+        build_s = best_of(lambda: FunctionIndex(entries), repeat)
+        queries = ['f', 'fu', 'fun', 'func', 'funct', 'function 1', 'function 12', 'fn12', 'ramble', 'zzz']
+
+        def type_ahead():
+            # A fresh index each time, so the per-keystroke reuse is measured from the first letter
+            typed = FunctionIndex(entries)
+            for query in queries:
+                typed.search(query)
+
+        picker = {'functions': len(entries), 'build_s': build_s,
+                  'type_ahead_per_keystroke_ms': best_of(type_ahead, repeat) / len(queries) * 1000,
+                  'worst_single_search_ms': max(best_of(lambda: index.search(q), repeat) for q in queries) * 1000}
+    return {'benchmark': 'specs', 'results': results, 'picker': picker}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--params', type=int, nargs='+', default=[5, 20, 100], help='args per function to try')
+    parser.add_argument('--functions', type=int, default=200, help='functions parsed per measurement')
+    parser.add_argument('--picker-functions', type=int, default=10000, help='functions in the picker index')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement, the fastest is kept')
+    args = parser.parse_args()
+    print(json.dumps(run(args.params, args.functions, args.picker_functions, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
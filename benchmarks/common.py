@@ -0,0 +1,92 @@
+"""
+Shared pieces of the benchmarks: synthetic component modules and timing helpers
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+_TYPES = ('str', 'int', 'float', 'bool')
+
+
+def module_source(functions: int, params: int, doc_lines: int = 10, options: int = 1000) -> str:
+    """
+    Source of a component module with `functions` decorated functions of `params` args each: str, int, float and
+    bool args, and args overridden with a dict and an Enum of `options` entries, in turn
+    """
+    lines = ['from enum import Enum', 'from pygenerategui import pggui', '',
+             f'OPTIONS = {{f"option {{i}}": i for i in range({options})}}',
+             f'Choice = Enum("Choice", [f"choice_{{i}}" for i in range({options})])', '']
+    description = '\n'.join(f'    Line {i} of a long description, the way real docstrings ramble on.'
+                            for i in range(doc_lines))
+    for f in range(functions):
+        args, overrides, docs = [], [], []
+        for p in range(params):
+            if p % 6 == 4:
+                args.append(f'p{p}: int = 0')
+                overrides.append(f'p{p}=OPTIONS')
+            elif p % 6 == 5:
+                args.append(f'p{p}: int = None')
+                overrides.append(f'p{p}=Choice')
+            else:
+                kind = _TYPES[p % 6]
+                default = {'str': "'text'", 'int': str(p), 'float': '1.5', 'bool': 'True'}[kind]
+                args.append(f'p{p}: {kind} = {default}')
+            docs.append(f'    :param p{p}: What p{p} of function {f} is for')
+        decorator = f'@pggui(name="function {f}"{"".join(", " + o for o in overrides)})'
+        lines += [decorator, f'def function_{f}({", ".join(args)}) -> str:', '    """',
+                  f'    Function {f}', description, *docs, '    :return: The args, as text', '    """',
+                  '    return str(locals())', '', '']
+    return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def synthetic_modules(count: int, functions: int, params: int, doc_lines: int = 10, options: int = 1000):
+    """
+    Write `count` synthetic modules to a temp dir on sys.path
+    :return: (the temp dir, module names)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        source = module_source(functions, params, doc_lines, options)
+        names = [f'bench_component_{i}' for i in range(count)]
+        for name in names:
+            with open(os.path.join(tmp, f'{name}.py'), 'w', encoding='utf-8') as f:
+                f.write(source)
+        sys.path.insert(0, tmp)
+        try:
+            yield tmp, names
+        finally:
+            sys.path.remove(tmp)
+            for name in names:
+                sys.modules.pop(name, None)
+
+
+def add(a: int, b: int = 1) -> int:
+    """The function the dispatch benchmarks run - importable by name, so warm worker processes can preload it"""
+    return a + b
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    """Fastest of `repeat` runs of fn(), in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def tk_root():
+    """A withdrawn Tk root, or None if there is no display (run under xvfb-run to include the widget benchmarks)"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
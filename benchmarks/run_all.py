@@ -0,0 +1,115 @@
+"""
+Run every benchmark and write one json report, optionally comparing it with an earlier one
+
+    python benchmarks/run_all.py --output before.json
+    python benchmarks/run_all.py --output after.json --compare before.json
+
+With --compare, each timing that got more than --threshold slower is listed, and the exit status is 1 if any did.
+Use --quick for a smaller run (e.g. in CI). The widget benchmarks are skipped without a display (use xvfb-run).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from common import REPO
+import bench_discovery
+import bench_dispatch
+import bench_forms
+import bench_import
+import bench_render
+import bench_specs
+
+# name -> (full run, quick run)
+SUITE = {
+    'import': (lambda: bench_import.run(2000, 5), lambda: bench_import.run(500, 2)),
+    'discovery': (lambda: bench_discovery.run([1, 10, 50], 100, 8, 3),
+                  lambda: bench_discovery.run([1, 10], 50, 8, 1)),
+    'specs': (lambda: bench_specs.run([5, 20, 100], 200, 10000, 5), lambda: bench_specs.run([5, 20], 50, 2000, 2)),
+    'forms': (lambda: bench_forms.run([5, 20, 40, 100, 400], 1000, 3), lambda: bench_forms.run([5, 40, 100], 100, 1)),
+    'dispatch': (lambda: bench_dispatch.run(2000, 20, 4, 20000), lambda: bench_dispatch.run(300, 5, 4, 2000)),
+    'render': (lambda: bench_render.run([1000, 100000, 1000000], 3), lambda: bench_render.run([1000, 100000], 1)),
+}
+
+# Keys of numbers where bigger is better; every other key ending in a time unit is a time
+_RATES = ('_per_s',)
+_TIMES = ('_s', '_ms', '_us')
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': sys.version, 'platform': platform.platform(), 'processor': platform.processor(),
+            'cpus': os.cpu_count(), 'commit': commit, 'time': datetime.datetime.now().isoformat(timespec='seconds')}
+
+
+def _numbers(value, path=''):
+    """(path, number) for every timing or rate in a report, with list entries labeled by their parameters"""
+    if isinstance(value, dict):
+        for key, v in value.items():
+            yield from _numbers(v, f'{path}.{key}' if path else key)
+    elif isinstance(value, list):
+        for item in value:
+            label = ','.join(f'{k}={v}' for k, v in item.items() if isinstance(v, (int, str)) and not
+                             k.endswith(_TIMES + _RATES)) if isinstance(item, dict) else ''
+            yield from _numbers(item, f'{path}[{label}]')
+    elif isinstance(value, float) and path.endswith(_TIMES + _RATES):
+        yield path, value
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    :return: (path, baseline, new, slowdown) for each measurement more than threshold (e.g. 0.2 = 20%) slower
+    """
+    old = dict(_numbers(baseline['results']))
+    regressions = []
+    for path, new in _numbers(report['results']):
+        if path not in old or old[path] <= 0 or new <= 0:
+            continue
+        slowdown = old[path] / new if path.endswith(_RATES) else new / old[path]
+        if slowdown > 1 + threshold:
+            regressions.append((path, old[path], new, slowdown))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='write the report here (printed if not given)')
+    parser.add_argument('--compare', metavar='BASELINE', help='an earlier report to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='slowdown to report, 0.2 = 20%% (default)')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes and fewer repeats')
+    parser.add_argument('--only', nargs='+', choices=list(SUITE), help='run just these benchmarks')
+    args = parser.parse_args()
+
+    results = {}
+    for name, runs in SUITE.items():
+        if args.only and name not in args.only:
+            continue
+        print(f'Running {name}...', file=sys.stderr, flush=True)
+        results[name] = runs[1 if args.quick else 0]()
+    report = {'environment': environment(), 'quick': args.quick, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for path, old, new, slowdown in regressions:
+            print(f'SLOWER {slowdown:.2f}x  {path}: {old:.6g} -> {new:.6g}', file=sys.stderr)
+        print(f'{len(regressions)} measurements more than {args.threshold:.0%} slower than {args.compare}',
+              file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,8 +21,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from pygenerategui import *
+from pygenerategui import pggui, OptionSource
 from typing import Union
+import asyncio
+import time
 
 # example_func will appear in the functions list as 'MyFunc'
 # The z argument will appear as a combobox with 2 options, 'a' and 'b', instead of a text input
@@ -80,6 +82,67 @@ def func_with_overriden_override(val: str):
     """
     return val * 2
 
+# Generators (and other iterators) are shown item by item as they are produced
+@pggui
+def example_generator(count: int = 20, delay: float = 0.25):
+    """
+    Yields one line at a time
+    :param count: How many lines to yield
+    :param delay: Seconds to wait before each line
+    :return: Lines of text
+    """
+    for i in range(count):
+        time.sleep(delay)
+        yield f'Line {i + 1} of {count}'
+
+# Lists of dicts, dataclasses, or tuples are shown as a sortable, filterable table
+@pggui
+def example_table(rows: int = 100000) -> list:
+    """
+    Makes up an inventory
+    :param rows: How many rows to return
+    :return: A list of dicts, one per host
+    """
+    return [{'host': f'host-{i:06d}', 'rack': i % 40, 'load': (i * 7919) % 1000 / 10} for i in range(rows)]
+
+# Results can be cached, so running again with the same args returns right away
+@pggui(cache=True, cache_ttl=300, cache_max=32)
+def example_cached_lookup(key: str = 'abc') -> str:
+    """
+    A slow lookup whose results are reused for 5 minutes
+    :param key: What to look up
+    :return: The key, reversed
+    """
+    time.sleep(2)
+    return key[::-1]
+
+# async def functions run on a shared event loop, so many can be running without a thread each
+@pggui
+async def example_async(delay: float = 2.0, text: str = 'Done') -> str:
+    """
+    Waits without blocking anything, then echoes the text
+    :param delay: Seconds to wait
+    :param text: What to return
+    :return: text
+    """
+    await asyncio.sleep(delay)
+    return text
+
+def _load_inventory() -> list:
+    time.sleep(3)
+    return [f'host-{i:05d}' for i in range(50000)]
+
+# Options can come from a slow source: they're loaded in the background when the form is shown, kept for ttl
+# seconds, and can be reloaded with the button next to the box. Type to filter long lists.
+@pggui(host=OptionSource(_load_inventory, ttl=600))
+def example_inventory_lookup(host: str) -> str:
+    """
+    Looks a host up in a big inventory
+    :param host: The host
+    :return: Where the host is
+    """
+    return f'{host} is in rack {int(host[-5:]) % 40}'
+
 class ClassExample:
     sce_x = 27
     """
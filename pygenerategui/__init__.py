@@ -21,4 +21,43 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from pygenerategui.pggui_app import PGGUI_App, pggui
+# Only the decorator is imported up front. Library modules use it to tag functions, and importing them shouldn't
+# cost a tkinter import (or fail on hosts without Tk). Everything else is imported on first access.
+from pygenerategui.decorator import pggui
+
+_lazy_attributes = {
+    'PGGUI_App': 'pygenerategui.pggui_app',
+    'ThreadExecutor': 'pygenerategui.executor',
+    'ProcessExecutor': 'pygenerategui.executor',
+    'WarmProcessExecutor': 'pygenerategui.executor',
+    'FunctionCall': 'pygenerategui.executor',
+    'ArgInfo': 'pygenerategui.function_spec',
+    'FunctionSpec': 'pygenerategui.function_spec',
+    'get_function_spec': 'pygenerategui.function_spec',
+    'OptionSource': 'pygenerategui.function_spec',
+    'ComboBoxBlock': 'pygenerategui.gui_component',
+    'TextInputBlock': 'pygenerategui.gui_component',
+    'BoolInputBlock': 'pygenerategui.gui_component',
+    'ReturnLabelBlock': 'pygenerategui.gui_component',
+    'FunctionGUI': 'pygenerategui.gui_component',
+    'ResultStore': 'pygenerategui.result_store',
+    'Workflow': 'pygenerategui.workflow',
+    'LimitExceeded': 'pygenerategui.limits',
+    'Progress': 'pygenerategui.progress',
+}
+
+__all__ = ['pggui', 'PGGUI_App', 'ThreadExecutor', 'ProcessExecutor', 'WarmProcessExecutor', 'ResultStore', 'Workflow',
+           'OptionSource', 'LimitExceeded', 'Progress']
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    import importlib
+    value = getattr(importlib.import_module(_lazy_attributes[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
@@ -0,0 +1,249 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import csv
+import itertools
+import json
+import queue
+import sys
+import threading
+import time
+
+from pygenerategui.executor import FunctionCall, ProcessExecutor, ThreadExecutor
+from pygenerategui.function_spec import convert_arg, get_function_spec
+
+
+def read_rows(path: str):
+    """
+    Yield parameter sets from a .csv (header row = arg names) or .jsonl file (one object per line), one at a time
+    :param path: The file, or '-' for json lines from stdin
+    """
+    if path == '-':
+        # Lines of json from stdin
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+    elif path.lower().endswith('.csv'):
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def count_rows(path: str) -> int:
+    """Number of rows read_rows will yield (counted in chunks, without parsing)"""
+    n = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            n += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last != b'\n':
+        n += 1
+    if path.lower().endswith('.csv'):
+        n -= 1
+    return max(0, n)
+
+
+def parameter_sweep(values: dict):
+    """
+    Yield every combination of the given values
+    :param values: {arg name: [values]}, e.g. {'host': ['a', 'b'], 'port': [22, 80]} -> 4 parameter sets
+    """
+    names = list(values)
+    for combination in itertools.product(*(values[n] for n in names)):
+        yield dict(zip(names, combination))
+
+
+def convert_row(func, row: dict) -> dict:
+    """
+    Convert a parameter set the way the function's widgets would
+    Empty values are left out (so the form's value is used), as are columns that aren't args of func.
+    """
+    args = get_function_spec(func).args
+    return {k: convert_arg(args[k], v) for k, v in row.items() if k in args and v != ''}
+
+
+class _JsonlWriter:
+    def __init__(self, path: str):
+        self.f = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8')
+
+    def write(self, record: dict):
+        self.f.write(json.dumps(record, default=str) + '\n')
+        if self.f is sys.stdout:
+            # Each result is seen by whatever reads the output as soon as it's written
+            self.f.flush()
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self.f = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = None
+
+    def write(self, record: dict):
+        flat = {'row': record['row'], **{f'input.{k}': v for k, v in record['input'].items()},
+                'result': record['result'], 'error': record['error']}
+        if self.writer is None:
+            # Columns come from the first finished row
+            self.writer = csv.DictWriter(self.f, fieldnames=list(flat), extrasaction='ignore')
+            self.writer.writeheader()
+        self.writer.writerow(flat)
+
+    def close(self):
+        self.f.close()
+
+
+class BatchRunner:
+    """
+    Runs one function over many parameter sets, writing each result to a file as soon as it finishes
+    Rows are read lazily and only max_in_flight calls are pending at once, so memory doesn't grow with the input.
+    :param call: The function and its form values; each row's values replace the matching args
+    :param rows: Iterable of {arg name: raw value}, e.g. read_rows(path) or parameter_sweep(values)
+    :param output_path: .csv or .jsonl file for the results, or '-' for json lines on stdout
+    :param workers: Number of calls run at once
+    :param use_processes: Run calls in processes instead of threads
+    :param max_in_flight: Most calls submitted but not yet written. 2x workers if none supplied.
+    :param total: Number of rows, if known, for the ETA
+    """
+    def __init__(self, call: FunctionCall, rows, output_path: str, workers: int = 4, use_processes: bool = False,
+                 max_in_flight: int = None, total: int = None):
+        self.call = call
+        self.rows = rows
+        self.output_path = output_path
+        self.executor = ProcessExecutor(workers) if use_processes else ThreadExecutor(workers)
+        self.max_in_flight = max_in_flight or workers * 2
+        self.total = total
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def rate(self) -> float:
+        """Rows finished per second"""
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Seconds until done, or None if unknown"""
+        rate = self.rate
+        if self.total is None or rate == 0:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+    def status_text(self) -> str:
+        total = '?' if self.total is None else self.total
+        text = f'{self.done}/{total} done ({self.failed} failed), {self.rate:.1f} rows/s'
+        if self.eta is not None and self.running:
+            text += f', ETA {self.eta:.0f}s'
+        if self.error is not None:
+            text += f'\nERROR: {str(self.error)}'
+        return text
+
+    def start(self):
+        """Run the batch on a background thread"""
+        self._thread = threading.Thread(target=self.run, name='pggui-batch', daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        """Run the batch, blocking until every row is written (or the batch is cancelled)"""
+        self.started_at = time.monotonic()
+        writer = _CsvWriter(self.output_path) if self.output_path.lower().endswith('.csv') \
+            else _JsonlWriter(self.output_path)
+        finished = queue.SimpleQueue()
+        in_flight = 0
+        try:
+            rows = enumerate(self.rows)
+            exhausted = False
+            while not (exhausted and in_flight == 0):
+                if self._cancelled.is_set():
+                    break
+                # Fill up to max_in_flight, then wait for something to finish
+                while not exhausted and in_flight < self.max_in_flight:
+                    try:
+                        i, row = next(rows)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if self._submit(i, row, finished, writer):
+                        in_flight += 1
+                if in_flight:
+                    i, row, job = finished.get()
+                    in_flight -= 1
+                    self._write(writer, i, row, job.result, job.error)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.executor.shutdown()
+            writer.close()
+            self.finished_at = time.monotonic()
+
+    def _submit(self, i: int, row: dict, finished: queue.SimpleQueue, writer) -> bool:
+        """Returns False if the row couldn't be converted, in which case its error is already written"""
+        try:
+            kwargs = dict(self.call.kwargs)
+            kwargs.update(convert_row(self.call.func, row))
+        except Exception as e:
+            # Bad input is reported for the row, without running anything
+            self._write(writer, i, row, None, e)
+            return False
+        job = self.executor.submit(FunctionCall(self.call.func, kwargs, self.call.use_cache))
+        self.submitted += 1
+        job.add_done_callback(lambda j: finished.put((i, row, j)))
+        return True
+
+    def _write(self, writer, i: int, row: dict, result, error):
+        if error is None:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        writer.write({'row': i, 'input': row, 'result': result,
+                      'error': None if error is None else f'{type(error).__name__}: {str(error)}'})
@@ -0,0 +1,279 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Run pggui functions from the command line, with the same components, arg conversion and executors as the gui.
+Never imports tkinter, so it works on hosts without Tk.
+
+    python -m pygenerategui -c mylib.devices -c mylib.devices:Inventory --list
+    python -m pygenerategui -c mylib.devices check_port --host db1 --port 5432 --json
+    python -m pygenerategui -c mylib.devices check_port --jsonl-input hosts.jsonl --workers 16 > results.jsonl
+    python -m pygenerategui -c mylib.devices --serve 8000 --workers 32
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+from typing import Union
+
+from pygenerategui import registry
+from pygenerategui.batch import BatchRunner, read_rows
+from pygenerategui.executor import FunctionCall, WarmProcessExecutor, is_stream
+from pygenerategui.function_spec import ArgInfo, OptionSource, convert_arg, get_function_spec, has_options
+from pygenerategui.lazy import LazyComponent, LazyFunction
+from pygenerategui.progress import is_progress_param
+
+# Option lists longer than this aren't given to argparse as choices
+max_choices_listed = 50
+
+
+def arg_kind(arg_info: ArgInfo) -> Union[str, None]:
+    """
+    How an arg is given on the command line: 'options', 'function' (its args are given as --arg.subarg),
+    'text', 'bool', 'json' (anything else with a type hint), or None if it can't be given (or, like Progress
+    params, is filled in when the function runs)
+    """
+    if arg_info.override is not None:
+        if has_options(arg_info):
+            return 'options'
+        elif callable(arg_info.override):
+            return 'function'
+        return None
+    elif arg_info.data_type in (int, float, complex, str):
+        return 'text'
+    elif arg_info.data_type is bool:
+        return 'bool'
+    elif is_progress_param(arg_info):
+        return None
+    elif arg_info.data_type is not None:
+        return 'json'
+    return None
+
+
+def load_functions(components: list) -> dict:
+    """
+    :param components: Modules, classes, instances, or 'package.module[:Class]' paths. Paths are only imported
+                       once one of their functions is resolved.
+    :return: {command name: function or LazyFunction}. Functions are listed under their pggui name, and under
+             their attribute name if it's different.
+    """
+    funcs = {}
+    for component in components:
+        if isinstance(component, str):
+            found = LazyComponent(component).functions()
+        else:
+            found = registry.find_functions(component)
+        for func in found:
+            funcs.setdefault(func._pggui_name, func)
+            funcs.setdefault(func.__name__, func)
+    return funcs
+
+
+def _summary(func) -> str:
+    doc = inspect.cleandoc(func.__doc__ or '')
+    return doc.split('\n', 1)[0].split(':param', 1)[0].strip()
+
+
+def add_arguments(parser: argparse.ArgumentParser, func, prefix: str = '', group=None):
+    """
+    Add an option for each arg of func. Nothing is required here, so rows from --jsonl-input can supply args;
+    missing args are reported by build_call.
+    :param prefix: Dotted path of the arg func is nested under, e.g. 'val.'
+    :param group: Argument group the options are listed under in --help
+    """
+    target = parser if group is None else group
+    for arg, arg_info in get_function_spec(func).args.items():
+        kind = arg_kind(arg_info)
+        if kind is None:
+            continue
+        flag = f'--{prefix}{arg}'
+        help_text = arg_info.description or None
+        if kind == 'function':
+            # Nested functions are always called, with their own args given as --arg.subarg
+            nested = get_function_spec(arg_info.override)
+            add_arguments(parser, arg_info.override, f'{prefix}{arg}.',
+                          parser.add_argument_group(f'{prefix}{arg}', nested.description))
+            continue
+        if kind == 'bool':
+            target.add_argument(flag, dest=f'{prefix}{arg}', action=argparse.BooleanOptionalAction,
+                                help=f'{help_text or ""} (default: {bool(arg_info.default)})'.strip())
+            continue
+        if kind == 'options':
+            choices = None
+            if not isinstance(arg_info.override, OptionSource):
+                # Big or free text option lists are checked when converted instead, so they aren't loaded just to
+                # build the parser or listed in full by --help
+                options = arg_info.options()
+                if '_manual' not in options and len(options) <= max_choices_listed:
+                    choices = list(options)
+            target.add_argument(flag, dest=f'{prefix}{arg}', choices=choices, help=help_text,
+                                metavar=arg.upper() if choices is None else None)
+            continue
+        if not arg_info.required:
+            help_text = f'{help_text or ""} (default: {arg_info.default!r})'.strip()
+        if kind == 'json':
+            help_text = f'{help_text or ""} [json]'.strip()
+        target.add_argument(flag, dest=f'{prefix}{arg}', metavar=arg.upper(), help=help_text)
+
+
+def build_call(func, values: dict, prefix: str = '', check_required: bool = True) -> FunctionCall:
+    """
+    Convert parsed options the way the widgets would
+    :param values: {dotted arg path: raw value}, None for args that weren't given
+    :param check_required: Raise ValueError for required args that weren't given
+    :return: The function bound to its args. Args that weren't given are left to the function's defaults.
+    """
+    kwargs = {}
+    for arg, arg_info in get_function_spec(func).args.items():
+        kind = arg_kind(arg_info)
+        if kind is None:
+            continue
+        if kind == 'function':
+            kwargs[arg] = build_call(arg_info.override, values, f'{prefix}{arg}.', check_required)
+            continue
+        raw = values.get(f'{prefix}{arg}')
+        if raw is None:
+            if check_required and arg_info.required:
+                raise ValueError(f'Missing required arg {prefix}{arg}')
+            continue
+        kwargs[arg] = json.loads(raw) if kind == 'json' else convert_arg(arg_info, raw)
+    return FunctionCall(func, kwargs)
+
+
+def _print_result(result, as_json: bool):
+    if as_json:
+        print(json.dumps(result, default=str), flush=True)
+    else:
+        print(result, flush=True)
+
+
+async def _print_async_stream(stream, as_json: bool):
+    async for item in stream:
+        _print_result(item, as_json)
+
+
+def run_call(call: FunctionCall, as_json: bool = False):
+    """Run a call in this thread and print its result. Stream items are printed one per line as they arrive."""
+    result = call()
+    if is_stream(result):
+        if inspect.isasyncgen(result):
+            asyncio.run(_print_async_stream(result, as_json))
+        else:
+            for item in result:
+                _print_result(item, as_json)
+    else:
+        _print_result(result, as_json)
+
+
+def _global_options() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('-c', '--component', action='append', default=[], metavar='MODULE[:CLASS]',
+                        help='Component to load functions from (repeatable)')
+    parser.add_argument('--list', action='store_true', help='List the available functions and exit')
+    parser.add_argument('--json', action='store_true', help='Print results as json')
+    parser.add_argument('--jsonl-input', metavar='PATH',
+                        help='Run the function once per line of json args (.jsonl, .csv, or - for stdin), '
+                             'writing one json line per result. Options given on the command line are the defaults.')
+    parser.add_argument('--output', default='-', metavar='PATH',
+                        help='Where --jsonl-input results go: .jsonl, .csv, or - for stdout (default)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Calls run at once with --jsonl-input or --serve (default: 4)')
+    parser.add_argument('--processes', action='store_true',
+                        help='Run --jsonl-input calls in processes, or --serve calls in warm worker processes')
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help='Serve the functions over HTTP on this port instead of running one (see web.py)')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface for --serve (default: 127.0.0.1)')
+    return parser
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m pygenerategui', parents=[_global_options()],
+                                     description='Run pggui functions from the command line')
+    parser.add_argument('function', nargs='?', help='Name of the function to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='Args for the function (see FUNCTION --help)')
+    return parser
+
+
+def main(argv: list = None, components: list = None) -> int:
+    """
+    :param argv: Command line args, sys.argv[1:] if none supplied
+    :param components: Components to offer in addition to any given with --component, e.g. the list given to
+                       PGGUI_App, for a launcher script that calls main(components=components)
+    :return: Exit status
+    """
+    parser = build_parser()
+    options = parser.parse_args(argv)
+    if options.serve is not None:
+        from pygenerategui.web import WebServer
+        components = list(components or []) + options.component
+        executor = WarmProcessExecutor(components, options.workers) if options.processes else None
+        WebServer(components, executor, host=options.host, port=options.serve, max_workers=options.workers).run()
+        return 0
+    funcs = load_functions(list(components or []) + options.component)
+    if options.list or options.function is None:
+        for name, func in sorted(funcs.items()):
+            if name == func._pggui_name:
+                print(f'{name:30} {_summary(func)}')
+        return 0
+    if options.function not in funcs:
+        parser.error(f'unknown function {options.function!r} (see --list)')
+    func = funcs[options.function]
+    if isinstance(func, LazyFunction):
+        # Only the component that has the function is imported
+        func = func.resolve()
+
+    func_parser = argparse.ArgumentParser(prog=f'{parser.prog} {options.function}',
+                                          description=get_function_spec(func).description)
+    add_arguments(func_parser, func)
+    values, rest = func_parser.parse_known_args(options.args)
+    values = vars(values)
+    # The global options can also come after the function's
+    _global_options().parse_args(rest, namespace=options)
+
+    if options.jsonl_input is not None:
+        try:
+            call = build_call(func, values, check_required=False)
+        except ValueError as e:
+            func_parser.error(str(e))
+        runner = BatchRunner(call, read_rows(options.jsonl_input), options.output, workers=options.workers,
+                             use_processes=options.processes)
+        runner.run()
+        if runner.error is not None:
+            print(f'{type(runner.error).__name__}: {runner.error}', file=sys.stderr)
+            return 1
+        return 1 if runner.failed else 0
+
+    try:
+        call = build_call(func, values)
+    except ValueError as e:
+        func_parser.error(str(e))
+    try:
+        run_call(call, options.json)
+    except Exception as e:
+        if options.json:
+            print(json.dumps({'error': f'{type(e).__name__}: {e}'}), flush=True)
+        else:
+            print(f'{type(e).__name__}: {e}', file=sys.stderr)
+        return 1
+    return 0
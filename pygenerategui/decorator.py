@@ -0,0 +1,91 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Library modules import this just to tag their functions, so it must not pull in tkinter (or anything slow)
+from pygenerategui import registry
+from pygenerategui.result_cache import ResultCache
+
+# Decorator args that configure pggui itself rather than override a function param
+OPTIONS = ('cache', 'cache_ttl', 'cache_max', 'timeout', 'max_memory', 'max_cpu_seconds')
+# Options that make the function run in a subprocess that's killed when it goes past them (see limits.py)
+LIMITS = ('timeout', 'max_memory', 'max_cpu_seconds')
+
+
+def _param_names(func) -> tuple:
+    """The names of func's params, read off its code object (inspect is too slow to import here)"""
+    code = getattr(getattr(func, '__func__', func), '__code__', None)
+    if code is None:
+        return ()
+    return code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+
+
+def _check_option(option: str, value):
+    if option == 'cache':
+        valid = isinstance(value, bool)
+    else:
+        valid = value is None or (isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0)
+    if not valid:
+        expected = 'True or False' if option == 'cache' else 'a positive number'
+        raise TypeError(f'@pggui option {option} must be {expected}, not {value!r}. (To override an arg named '
+                        f'{option}, the function needs a param of that name.)')
+
+
+def pggui(name = None, **kwargs):
+    """
+    Add _pggui_name to a routine so it will be identified as a pggui function
+    :param name: The name it should appear as in the function list. Will use func name if none supplied.
+    :param kwargs: Overrides for function params - dict, list, tuple, enum, or callable
+                   Or options:
+                   cache: True to reuse the result of a previous run with the same args
+                   cache_ttl: Seconds a cached result is reused for (forever by default)
+                   cache_max: Most results to keep cached (default 128)
+                   timeout: Seconds a run may take before it's stopped
+                   max_memory: Bytes of memory a run may use (Unix only)
+                   max_cpu_seconds: Seconds of CPU time a run may use (Unix only)
+                   Functions with any of these limits run in a subprocess, so must be importable and their args and
+                   results picklable.
+                   An option name that's also the name of one of the function's params overrides that param instead.
+    """
+    if callable(name):
+        return pggui()(name)
+    def decorator(func):
+        params = _param_names(func)
+        overrides = {k: v for k, v in kwargs.items() if k not in OPTIONS or k in params}
+        options = {k: v for k, v in kwargs.items() if k not in overrides}
+        for option, value in options.items():
+            _check_option(option, value)
+        for kwarg in overrides:
+            kwarg_name = f'_pggui_{kwarg}'
+            kwarg_value = overrides[kwarg]
+            setattr(func, kwarg_name, kwarg_value)
+        func._pggui_overrides = overrides
+        func._pggui_options = options
+        if options.get('cache'):
+            func._pggui_result_cache = ResultCache(max_size=options.get('cache_max', 128), ttl=options.get('cache_ttl'))
+        limits = {k: v for k, v in options.items() if k in LIMITS and v is not None}
+        if limits:
+            func._pggui_limits = limits
+        func._pggui_name = func.__name__ if name is None else name
+        registry.register(func)
+        return func
+    return decorator
@@ -0,0 +1,1038 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import collections.abc
+import concurrent.futures
+import importlib
+import inspect
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import deque, namedtuple
+from enum import Enum
+
+from pygenerategui.metrics import measure
+from pygenerategui.progress import Progress, ProgressRelay, progress_params
+from pygenerategui.result_cache import make_key
+from pygenerategui.result_store import ResultRef
+
+
+class FunctionCall:
+    """
+    A function bound to the values read from its gui.
+    Args overridden with another function hold a nested FunctionCall, which is only run when this call is run,
+    so everything after reading the widgets can happen off of the Tk thread.
+    Nested calls that don't depend on each other run at the same time, and a nested call appearing more than once
+    in the tree with the same inputs is only run once.
+    """
+    def __init__(self, func, kwargs: dict, use_cache: bool = True):
+        self.func = func
+        self.kwargs = kwargs
+        self.use_cache = use_cache
+        # Filled in while running, e.g. 'cached': True when the result came from the function's result cache,
+        # 'elapsed' / 'cpu': seconds (wall / CPU) spent running the function itself (not counting nested calls)
+        self.info = {}
+        # metrics.MeasureOptions for the whole run (set on the top call), see metrics.measure
+        self.instrument = None
+        # Passed to the function's Progress params (the job's, for the top call). A new one each run if none set.
+        self.progress = None
+        # Directory to write every item of a streamed result to a file in (set on the top call). The file is written
+        # where the stream is consumed, so it has every item even if the job drops some, see Job.max_buffered_items.
+        self.capture = None
+
+    @property
+    def name(self) -> str:
+        return getattr(self.func, '_pggui_name', getattr(self.func, '__name__', repr(self.func)))
+
+    def walk(self):
+        """This call and all nested calls, depth first"""
+        yield self
+        for v in self.kwargs.values():
+            if isinstance(v, FunctionCall):
+                yield from v.walk()
+
+    def identity(self):
+        """
+        Hashable description of the call, equal for calls of the same function with the same inputs
+        :return: None if any input can't be hashed, in which case the call is never treated as a duplicate
+        """
+        items = []
+        for k in sorted(self.kwargs):
+            v = self.kwargs[k]
+            if isinstance(v, FunctionCall):
+                v = v.identity()
+                if v is None:
+                    return None
+            items.append((k, type(v), v))
+        identity = (self.func, tuple(items))
+        try:
+            hash(identity)
+        except TypeError:
+            return None
+        return identity
+
+    def resolve_kwargs(self, cancelled: threading.Event = None) -> dict:
+        """
+        Run any nested calls
+        :param cancelled: Stop starting nested calls once this is set
+        :return: kwargs ready to be passed to func
+        """
+        if not any(isinstance(v, FunctionCall) for v in self.kwargs.values()):
+            return {k: _value(v) for k, v in self.kwargs.items()}
+        results = _NestedEvaluation(self, cancelled).run()
+        return {k: results[id(v)] if isinstance(v, FunctionCall) else _value(v) for k, v in self.kwargs.items()}
+
+    def resolve_refs(self):
+        """Replace stored result references in this call and all nested calls with the results themselves"""
+        for call in self.walk():
+            call.kwargs = {k: _value(v) for k, v in call.kwargs.items()}
+
+    def __call__(self, cancelled: threading.Event = None):
+        return self.run_with(self.resolve_kwargs(cancelled), cancelled)
+
+    def run_with(self, kwargs: dict, cancelled: threading.Event = None):
+        """
+        Run just this call's function (using its result cache if enabled), with nested calls already resolved
+        :param cancelled: Stops functions with @pggui limits, which run in a subprocess, once set
+        """
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            cache, key = self._cache_key(kwargs)
+            if key is not None:
+                result = cache.get(key)
+                if not cache.is_missing(result):
+                    self.info['cached'] = True
+                    return result
+            for arg in progress_params(self.func):
+                kwargs[arg] = self.progress if self.progress is not None else Progress()
+            limits = getattr(self.func, '_pggui_limits', None)
+            if limits:
+                from pygenerategui.limits import run_limited
+                result = run_limited(self.func, kwargs, limits, cancelled)
+                self._cache_put(cache, key, result)
+                return result
+            result = self.func(**kwargs)
+            if inspect.iscoroutine(result):
+                # async def functions nested in (or run from) synchronous code still run on the shared loop
+                # (inspect, not asyncio: before 3.12 asyncio.iscoroutine is also True for plain generators)
+                result = get_event_loop_thread().run(result)
+            self._cache_put(cache, key, result)
+            return result
+        finally:
+            self.info['elapsed'] = time.perf_counter() - start
+            self.info['cpu'] = time.thread_time() - cpu_start
+
+    async def run_with_async(self, kwargs: dict):
+        """run_with, for running on the event loop thread"""
+        start = time.perf_counter()
+        try:
+            cache, key = self._cache_key(kwargs)
+            if key is not None:
+                result = cache.get(key)
+                if not cache.is_missing(result):
+                    self.info['cached'] = True
+                    return result
+            for arg in progress_params(self.func):
+                kwargs[arg] = self.progress if self.progress is not None else Progress()
+            limits = getattr(self.func, '_pggui_limits', None)
+            if limits:
+                from pygenerategui.limits import run_limited
+                stop = threading.Event()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(None, run_limited, self.func, kwargs,
+                                                                              limits, stop)
+                except asyncio.CancelledError:
+                    stop.set()
+                    raise
+                self._cache_put(cache, key, result)
+                return result
+            result = self.func(**kwargs)
+            if inspect.iscoroutine(result):
+                result = await result
+            self._cache_put(cache, key, result)
+            return result
+        finally:
+            self.info['elapsed'] = time.perf_counter() - start
+
+    def _cache_key(self, kwargs: dict) -> tuple:
+        """(cache, key) for this call with these args, or (None, None) if it isn't cached"""
+        cache = getattr(self.func, '_pggui_result_cache', None)
+        if cache is None or not self.use_cache:
+            return None, None
+        key = make_key(self.func, kwargs)
+        return (None, None) if key is None else (cache, key)
+
+    @staticmethod
+    def _cache_put(cache, key, result):
+        # Streams can only be consumed once, so they're never cached
+        if key is not None and not is_stream(result):
+            cache.put(key, result)
+
+    def timing_report(self) -> str:
+        """One line per call in the tree with how long it took, or '' if there are no nested calls"""
+        if not any(isinstance(v, FunctionCall) for v in self.kwargs.values()):
+            return ''
+        lines = []
+
+        def _add(call, depth):
+            info = call.info
+            text = f'{"  " * depth}{call.name}: '
+            text += f'{info["elapsed"]:.3f}s' if 'elapsed' in info else 'not run'
+            if info.get('cached'):
+                text += ' (cached)'
+            if info.get('deduplicated'):
+                text += ' (same as an identical call)'
+            lines.append(text)
+            for v in call.kwargs.values():
+                if isinstance(v, FunctionCall):
+                    _add(v, depth + 1)
+        _add(self, 0)
+        return '\n'.join(lines)
+
+
+def _value(v):
+    # Stored results are looked up when the call runs, off of the Tk thread
+    return v.get() if isinstance(v, ResultRef) else v
+
+
+_nested_pool = None
+_nested_pool_lock = threading.Lock()
+nested_workers = 8
+
+
+def _get_nested_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _nested_pool
+    with _nested_pool_lock:
+        if _nested_pool is None:
+            _nested_pool = concurrent.futures.ThreadPoolExecutor(nested_workers, thread_name_prefix='pggui-nested')
+        return _nested_pool
+
+
+class _NestedEvaluation:
+    """
+    Runs the nested calls of a tree as a dependency graph: a call is started on the shared nested pool as soon
+    as all of its own nested calls are done. Pool threads never wait on each other, so trees of any depth can't
+    deadlock the pool.
+    """
+    def __init__(self, root: FunctionCall, cancelled: threading.Event = None):
+        self.cancelled = cancelled
+        self.calls = list(root.walk())[1:]
+        self.original = {}  # id(call) -> the call actually run for it (itself, unless it's a duplicate)
+        self.waiting = {}  # id(run call) -> number of its nested calls not done yet
+        self.parents = {}  # id(run call) -> run calls waiting on it
+        self.results = {}  # id(run call) -> result
+        self.error = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+        by_identity = {}
+        for call in self.calls:
+            identity = call.identity()
+            self.original[id(call)] = call if identity is None else by_identity.setdefault(identity, call)
+        self.to_run = [c for c in self.calls if self.original[id(c)] is c]
+        for call in self.to_run:
+            children = {id(self.original[id(v)]): self.original[id(v)] for v in call.kwargs.values()
+                        if isinstance(v, FunctionCall)}
+            self.waiting[id(call)] = len(children)
+            for child_id in children:
+                self.parents.setdefault(child_id, []).append(call)
+        self.remaining = len(self.to_run)
+
+    def run(self) -> dict:
+        """
+        :return: id(call) -> result, for every nested call in the tree
+        """
+        if len(self.to_run) == 1:
+            # Nothing to run alongside it
+            self._run_node(self.to_run[0])
+        else:
+            for call in self.to_run:
+                if self.waiting[id(call)] == 0:
+                    self._submit(call)
+            self._done.wait()
+        if self.error is not None:
+            raise self.error
+        for call in self.calls:
+            original = self.original[id(call)]
+            if original is not call:
+                call.info.update(original.info, deduplicated=True)
+        return {id(call): self.results[id(self.original[id(call)])] for call in self.calls}
+
+    def _submit(self, call: FunctionCall):
+        try:
+            _get_nested_pool().submit(self._run_node, call)
+        except RuntimeError as e:
+            # Pool shut down at interpreter exit
+            self._fail(e)
+
+    def _run_node(self, call: FunctionCall):
+        if self.error is not None or (self.cancelled is not None and self.cancelled.is_set()):
+            self._fail(self.error or RuntimeError('Cancelled'))
+            return
+        try:
+            kwargs = {k: self.results[id(self.original[id(v)])] if isinstance(v, FunctionCall) else _value(v)
+                      for k, v in call.kwargs.items()}
+            result = call.run_with(kwargs, self.cancelled)
+        except BaseException as e:
+            self._fail(e)
+            return
+        ready = []
+        with self._lock:
+            self.results[id(call)] = result
+            self.remaining -= 1
+            for parent in self.parents.get(id(call), ()):
+                self.waiting[id(parent)] -= 1
+                if self.waiting[id(parent)] == 0:
+                    ready.append(parent)
+            if self.remaining == 0:
+                self._done.set()
+        for parent in ready:
+            self._submit(parent)
+
+    def _fail(self, error: BaseException):
+        with self._lock:
+            if self.error is None:
+                self.error = error
+        # Calls already running finish in the background, but nothing waits on them
+        self._done.set()
+
+
+def is_stream(value) -> bool:
+    """True for generators, iterators and async generators, whose items should be shown as they arrive"""
+    if isinstance(value, (str, bytes, bytearray, memoryview, io.IOBase)):
+        return False
+    return isinstance(value, (collections.abc.Iterator, collections.abc.AsyncIterator))
+
+
+class _StreamBatcher:
+    """
+    Collects stream items as text and emits them in batches, so the Tk thread gets a few events, not millions
+    :param capture: Directory to also write every item (in full) to a temp file in, whose path is emitted as
+                    ('capture', path)
+    """
+    flush_interval = 0.05
+    flush_items = 1000
+    max_line_length = 1000
+
+    def __init__(self, emit, capture: str = None):
+        self.emit = emit
+        self.batch = []
+        self.count = 0
+        self.last_flush = time.monotonic()
+        self.capture_file = None
+        if capture is not None:
+            self.capture_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', prefix='pggui_stream_',
+                                                            suffix='.txt', dir=capture, delete=False)
+            self.emit('capture', self.capture_file.name)
+
+    def add(self, item):
+        self.count += 1
+        try:
+            line = str(item)
+        except Exception:
+            line = '<Object>'
+        if self.capture_file is not None:
+            self.capture_file.write(f'{line}\n')
+        self.batch.append(line[:self.max_line_length])
+        if len(self.batch) >= self.flush_items or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            if self.capture_file is not None and not self.capture_file.closed:
+                # Whatever is shown is in the file too
+                self.capture_file.flush()
+            self.emit('items', self.batch)
+            self.batch = []
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.capture_file is not None:
+            self.capture_file.close()
+
+
+def consume_stream(stream, emit, cancelled: threading.Event = None, capture: str = None) -> int:
+    """
+    Drain a generator/iterator/async generator, emitting ('stream', type name) and then ('items', [str]) batches
+    :param stream: What the function returned
+    :param emit: f(kind: str, payload)
+    :param cancelled: Stop early (closing the generator) once this is set
+    :param capture: Directory to also write every item to a file in, see FunctionCall.capture
+    :return: The number of items
+    """
+    if isinstance(stream, collections.abc.AsyncIterator):
+        return asyncio.run(consume_async_stream(stream, emit, cancelled, capture))
+    emit('stream', type(stream).__name__)
+    batcher = _StreamBatcher(emit, capture)
+    try:
+        for item in stream:
+            batcher.add(item)
+            if cancelled is not None and cancelled.is_set():
+                break
+    finally:
+        if hasattr(stream, 'close'):
+            stream.close()
+        batcher.close()
+    batcher.flush()
+    return batcher.count
+
+
+async def consume_async_stream(stream, emit, cancelled: threading.Event = None, capture: str = None) -> int:
+    """consume_stream for async generators, for running on an event loop"""
+    emit('stream', type(stream).__name__)
+    batcher = _StreamBatcher(emit, capture)
+    try:
+        async for item in stream:
+            batcher.add(item)
+            if cancelled is not None and cancelled.is_set():
+                break
+    finally:
+        if hasattr(stream, 'aclose'):
+            await stream.aclose()
+        batcher.close()
+    batcher.flush()
+    return batcher.count
+
+
+def execute(call: FunctionCall, emit, cancelled: threading.Event = None):
+    """
+    Run a call on a worker
+    :param call: The call to run
+    :param emit: f(kind: str, payload) used to send intermediate events back to the job
+    :param cancelled: Set when the job is cancelled, for work that can stop early
+    :return: Whatever the function returned, or the number of items if it returned a stream
+    """
+    with measure(call):
+        result = call(cancelled)
+        if is_stream(result):
+            # Producing the items is the function's work too
+            cpu_start = time.thread_time()
+            try:
+                return consume_stream(result, emit, cancelled, call.capture)
+            finally:
+                call.info['cpu'] = call.info.get('cpu', 0.0) + time.thread_time() - cpu_start
+        return result
+
+
+def is_async_function(func) -> bool:
+    """True for async def functions and async generator functions (including bound methods of them)"""
+    func = getattr(func, '__func__', func)
+    return asyncio.iscoroutinefunction(func) or inspect.isasyncgenfunction(func)
+
+
+class EventLoopThread:
+    """
+    A long-lived asyncio event loop on a daemon thread
+    Every async function run is a task on this one loop, so any number of them can be in flight without a thread
+    each. Use get_event_loop_thread() rather than making more of these.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name='pggui-asyncio', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop. Cancelling the returned future cancels the task."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Run a coroutine on the loop, blocking the calling thread (which can't be the loop's) until it's done"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError('Cannot block the event loop waiting on itself - await the coroutine instead')
+        return self.submit(coro).result()
+
+
+_event_loop_thread = None
+_event_loop_lock = threading.Lock()
+
+
+def get_event_loop_thread() -> EventLoopThread:
+    """The shared event loop thread, started the first time it's needed"""
+    global _event_loop_thread
+    with _event_loop_lock:
+        if _event_loop_thread is None:
+            _event_loop_thread = EventLoopThread()
+        return _event_loop_thread
+
+
+async def _run_async_job(job: 'Job'):
+    if not job._start():
+        return
+    call = job.call
+    loop = asyncio.get_running_loop()
+    try:
+        with measure(call, on_event_loop=True):
+            if any(isinstance(v, (FunctionCall, ResultRef)) for v in call.kwargs.values()):
+                # Nested calls are ordinary blocking functions (and stored results may be read from disk), so
+                # they're resolved on a thread rather than on the loop
+                kwargs = await loop.run_in_executor(None, call.resolve_kwargs, job.cancelled)
+            else:
+                kwargs = dict(call.kwargs)
+            result = await call.run_with_async(kwargs)
+            if isinstance(result, collections.abc.AsyncIterator):
+                result = await consume_async_stream(result, job.emit, job.cancelled, call.capture)
+            elif is_stream(result):
+                result = await loop.run_in_executor(None, consume_stream, result, job.emit, job.cancelled,
+                                                    call.capture)
+    except asyncio.CancelledError:
+        # Cancelled from the job, which is already marked as such
+        return
+    except BaseException as e:
+        job._finish(error=e)
+    else:
+        job._finish(result=result)
+
+
+class JobStatus(Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+
+class Job:
+    """
+    Handle for a call submitted to an executor.
+    Workers update it, the Tk thread polls it - nothing here touches tkinter.
+    """
+    FINISHED = (JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED)
+    # Most stream items held until they're taken. A stream that outruns whoever takes them (or one nobody takes, e.g.
+    # in a batch) drops its oldest items past this, counting them, so memory doesn't grow with the stream's length.
+    max_buffered_items = 100_000
+
+    def __init__(self, call: FunctionCall):
+        self.call = call
+        self.status = JobStatus.QUEUED
+        self.result = None
+        self.error = None
+        # (kind, payload) tuples emitted while the job runs. Stream items aren't queued themselves: an
+        # ('items', None) event says there are some to get with take_items().
+        self.events = queue.SimpleQueue()
+        self._items = deque(maxlen=self.max_buffered_items)
+        self._dropped = 0
+        self._items_lock = threading.Lock()
+        # What the function reports through its Progress param, if it has one
+        self.progress = call.progress = Progress()
+        self.cancelled = threading.Event()
+        self._cancel_hook = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in self.FINISHED
+
+    def cancel(self) -> bool:
+        """
+        Cancel the job. A queued job will never start; a running job is terminated if the executor supports it,
+        otherwise its result is discarded when it finishes.
+        :return: False if the job had already finished
+        """
+        with self._lock:
+            if self.done:
+                return False
+            self.status = JobStatus.CANCELLED
+            self.cancelled.set()
+            hook = self._cancel_hook
+        if hook is not None:
+            hook()
+        self._run_callbacks()
+        return True
+
+    def add_done_callback(self, fn):
+        """
+        Call fn(job) once the job finishes - from the worker thread, or right away if it already has
+        """
+        with self._lock:
+            if not self.done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _run_callbacks(self):
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+    def emit(self, kind: str, payload):
+        if kind == 'items':
+            with self._items_lock:
+                # Only the first batch since the last take_items needs an event, later ones are coalesced into it
+                pending = bool(self._items) or self._dropped > 0
+                self._dropped += max(0, len(self._items) + len(payload) - self.max_buffered_items)
+                self._items.extend(payload)
+            if pending:
+                return
+            payload = None
+        self.events.put((kind, payload))
+
+    def take_items(self) -> tuple:
+        """
+        :return: (the stream items emitted since the last take, how many items before those were dropped because
+                 they weren't taken in time)
+        """
+        with self._items_lock:
+            items = list(self._items)
+            self._items.clear()
+            dropped, self._dropped = self._dropped, 0
+        return items, dropped
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self.cancelled.is_set():
+                return False
+            self.status = JobStatus.RUNNING
+            return True
+
+    def _set_cancel_hook(self, hook) -> bool:
+        """Returns True if the job was cancelled before the hook could be set"""
+        with self._lock:
+            self._cancel_hook = hook
+            return self.cancelled.is_set()
+
+    def _finish(self, result=None, error: BaseException = None):
+        with self._lock:
+            if self.cancelled.is_set():
+                return
+            self.result = result
+            self.error = error
+            self.status = JobStatus.DONE if error is None else JobStatus.FAILED
+        self._run_callbacks()
+
+
+class ThreadExecutor:
+    """
+    Runs calls on a pool of daemon threads, so a hung function never keeps the app from closing
+    :param max_workers: Max number of calls running at once
+    """
+    # Run async def functions on the shared event loop thread rather than tying up a worker each
+    async_on_event_loop = True
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+        self._idle = threading.Semaphore(0)
+        self._jobs = set()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, call: FunctionCall) -> Job:
+        if self._shutdown:
+            raise RuntimeError('Cannot submit to an executor after shutdown')
+        job = Job(call)
+        with self._lock:
+            self._jobs.add(job)
+        if self.async_on_event_loop and is_async_function(call.func):
+            self._submit_async(job)
+            return job
+        self._queue.put(job)
+        self._adjust_thread_count()
+        return job
+
+    def _submit_async(self, job: Job):
+        """Run an async function's job as a task on the shared event loop instead of on a worker thread"""
+        job.add_done_callback(self._discard)
+        future = get_event_loop_thread().submit(_run_async_job(job))
+        if job._set_cancel_hook(future.cancel):
+            future.cancel()
+
+    def _discard(self, job: Job):
+        with self._lock:
+            self._jobs.discard(job)
+
+    def shutdown(self):
+        """Cancel everything queued or running and let the workers exit"""
+        self._shutdown = True
+        with self._lock:
+            jobs = list(self._jobs)
+        for job in jobs:
+            job.cancel()
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _adjust_thread_count(self):
+        if self._idle.acquire(timeout=0):
+            return
+        if len(self._threads) < self.max_workers:
+            t = threading.Thread(target=self._worker, name=f'pggui-worker-{len(self._threads)}', daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._jobs.discard(job)
+            self._idle.release()
+
+    def _run(self, job: Job):
+        if not job._start():
+            return
+        try:
+            result = execute(job.call, job.emit, job.cancelled)
+        except BaseException as e:
+            job._finish(error=e)
+        else:
+            job._finish(result=result)
+
+
+def _run_and_send(conn, call: FunctionCall):
+    """Run a call in a worker process, sending back its events, then the info of every call, then the outcome"""
+    lock = threading.Lock()
+
+    def emit(kind, payload):
+        # Progress is sent from the relay's thread too
+        with lock:
+            conn.send((kind, payload))
+    if call.progress is None:
+        call.progress = Progress()
+    try:
+        with ProgressRelay(call.progress, emit):
+            outcome = ('result', execute(call, emit))
+    except BaseException as e:
+        outcome = ('error', e)
+    conn.send(('info', [c.info for c in call.walk()]))
+    try:
+        conn.send(outcome)
+    except Exception as e:
+        # The result (or exception) could not be pickled
+        error = outcome[1] if outcome[0] == 'error' else e
+        conn.send(('error', RuntimeError(f'{type(error).__name__}: {str(error)}')))
+
+
+def _process_main(conn, call: FunctionCall):
+    try:
+        _run_and_send(conn, call)
+    finally:
+        conn.close()
+
+
+class ProcessExecutor(ThreadExecutor):
+    """
+    Runs each call in its own process, so cancelling a running job really terminates it.
+    Functions, args and return values must be picklable.
+    :param max_workers: Max number of processes running at once
+    :param mp_context: multiprocessing start method - 'spawn' is the default since forking a process running Tk
+                       is not safe on every platform
+    """
+    # Async functions run in the worker process too, on that process's own event loop
+    async_on_event_loop = False
+
+    def __init__(self, max_workers: int = 2, mp_context: str = 'spawn'):
+        super().__init__(max_workers)
+        self._ctx = multiprocessing.get_context(mp_context)
+
+    def _run(self, job: Job):
+        if not job._start():
+            return
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(target=_process_main, args=(child_conn, job.call), daemon=True)
+        try:
+            # The store lives in this process, so stored results are sent along with the call
+            job.call.resolve_refs()
+            proc.start()
+        except Exception as e:
+            job._finish(error=e)
+            return
+        finally:
+            child_conn.close()
+        if job._set_cancel_hook(proc.terminate):
+            proc.terminate()
+        try:
+            while True:
+                kind, payload = parent_conn.recv()
+                if kind == 'result':
+                    job._finish(result=payload)
+                    break
+                elif kind == 'error':
+                    job._finish(error=payload)
+                    break
+                elif kind == 'info':
+                    for c, info in zip(job.call.walk(), payload):
+                        c.info.update(info)
+                    continue
+                elif kind == 'progress':
+                    job.progress.set_state(payload)
+                    continue
+                job.emit(kind, payload)
+        except EOFError:
+            proc.join()
+            job._finish(error=RuntimeError(f'Worker process exited unexpectedly (exit code {proc.exitcode})'))
+        finally:
+            parent_conn.close()
+            proc.join()
+
+
+# Warm worker processes
+
+class _RemoteCall(namedtuple('_RemoteCall', 'func kwargs use_cache instrument capture', defaults=(None, None))):
+    """
+    A FunctionCall as sent to a warm worker: func is a key the worker looks up (or the function itself, pickled,
+    if it can't be found by name), nested calls are _RemoteCalls too
+    """
+    __slots__ = ()
+
+
+def _memory_used() -> int:
+    """Resident memory of this process in bytes, or its peak if the current size isn't available (0 if neither)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _WarmWorkerState:
+    """The components and looked up functions of one warm worker process"""
+    def __init__(self, components: list):
+        from pygenerategui.lazy import import_component
+        self.components = [import_component(c) if isinstance(c, str) else c for c in components]
+        self.functions = {}
+
+    def function(self, key):
+        if not isinstance(key, tuple):
+            return key
+        func = self.functions.get(key)
+        if func is None:
+            if key[0] == 'component':
+                func = getattr(self.components[key[1]], key[2])
+            else:
+                func = importlib.import_module(key[1])
+                for part in key[2].split('.'):
+                    func = getattr(func, part)
+            self.functions[key] = func
+        return func
+
+    def call(self, remote: _RemoteCall) -> FunctionCall:
+        kwargs = {k: self.call(v) if isinstance(v, _RemoteCall) else v for k, v in remote.kwargs.items()}
+        call = FunctionCall(self.function(remote.func), kwargs, remote.use_cache)
+        call.instrument = remote.instrument
+        call.capture = remote.capture
+        return call
+
+
+def _warm_worker_main(conn, components: list, max_calls: int, max_memory: int):
+    try:
+        state = _WarmWorkerState(components)
+        startup_error = None
+    except BaseException as e:
+        state = None
+        startup_error = RuntimeError(f'Worker could not load its components: {type(e).__name__}: {str(e)}')
+    calls = 0
+    try:
+        while True:
+            try:
+                remote = conn.recv()
+            except EOFError:
+                return
+            if remote is None:
+                return
+            calls += 1
+            try:
+                if startup_error is not None:
+                    raise startup_error
+                call = state.call(remote)
+            except BaseException as e:
+                conn.send(('error', e))
+            else:
+                _run_and_send(conn, call)
+            # Exits after telling the executor it's being replaced, rather than growing or leaking forever
+            recycle = startup_error is not None or (max_calls is not None and calls >= max_calls) \
+                or (max_memory is not None and _memory_used() > max_memory)
+            conn.send(('done', recycle))
+            if recycle:
+                return
+    finally:
+        conn.close()
+
+
+class _WarmWorker:
+    """The executor's handle on one warm worker process"""
+    def __init__(self, ctx, components: list, max_calls: int, max_memory: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.proc = ctx.Process(target=_warm_worker_main, args=(child_conn, components, max_calls, max_memory),
+                                daemon=True)
+        try:
+            self.proc.start()
+        finally:
+            child_conn.close()
+
+    def terminate(self):
+        self.proc.terminate()
+
+    def close(self, timeout: float = 1.0):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.conn.close()
+        self.proc.join(timeout)
+        if self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join()
+
+
+class WarmProcessExecutor(ThreadExecutor):
+    """
+    Runs calls in long-lived worker processes that have already imported the components, so a crash, hang or leak
+    in a function can't take the app down, without paying for the imports on every run.
+    Calls are sent by function name (module and qualname, or component and attribute for methods of component
+    instances) with pickled args. Args and return values must be picklable; instance components are copied into
+    each worker, so must be picklable too.
+    :param components: Modules, classes, instances, or 'package.module[:Class]' paths, as given to PGGUI_App
+    :param max_workers: Number of worker processes, all started right away
+    :param max_calls: Replace a worker after it has run this many calls. Never if none supplied.
+    :param max_memory: Replace a worker once its resident memory passes this many bytes. Never if none supplied.
+    :param mp_context: multiprocessing start method - 'spawn' is the default since forking a process running Tk
+                       is not safe on every platform
+    """
+    async_on_event_loop = False
+
+    def __init__(self, components: list, max_workers: int = 2, max_calls: int = None, max_memory: int = None,
+                 mp_context: str = 'spawn'):
+        super().__init__(max_workers)
+        from pygenerategui.lazy import component_path
+        self.components = list(components)
+        # Modules can't be pickled, so they (and classes) are sent by path and imported by the worker
+        self._component_args = [c if isinstance(c, str) or component_path(c) is None else component_path(c)
+                                for c in self.components]
+        self.max_calls = max_calls
+        self.max_memory = max_memory
+        self.recycled = 0
+        self._ctx = multiprocessing.get_context(mp_context)
+        self._idle_workers = []
+        self._workers_lock = threading.Lock()
+        for _ in range(max_workers):
+            self._idle_workers.append(self._start_worker())
+
+    def _start_worker(self) -> _WarmWorker:
+        return _WarmWorker(self._ctx, self._component_args, self.max_calls, self.max_memory)
+
+    def _checkout(self) -> _WarmWorker:
+        with self._workers_lock:
+            if self._idle_workers:
+                return self._idle_workers.pop()
+        return self._start_worker()
+
+    def _checkin(self, worker: _WarmWorker):
+        with self._workers_lock:
+            if not self._shutdown:
+                self._idle_workers.append(worker)
+                return
+        worker.close()
+
+    def _function_key(self, func):
+        """How the worker finds func: ('component', index, attr), ('name', module, qualname), or func itself"""
+        owner = getattr(func, '__self__', None)
+        if owner is not None and not isinstance(owner, (type, types.ModuleType)):
+            index = next((i for i, c in enumerate(self.components) if c is owner), None)
+            return func if index is None else ('component', index, func.__name__)
+        module = getattr(func, '__module__', None)
+        qualname = getattr(func, '__qualname__', None)
+        if module is None or qualname is None or '<locals>' in qualname or module == '__main__':
+            return func
+        return 'name', module, qualname
+
+    def _encode(self, call: FunctionCall) -> _RemoteCall:
+        kwargs = {k: self._encode(v) if isinstance(v, FunctionCall) else v for k, v in call.kwargs.items()}
+        return _RemoteCall(self._function_key(call.func), kwargs, call.use_cache, call.instrument, call.capture)
+
+    def _run(self, job: Job):
+        if not job._start():
+            return
+        worker = self._checkout()
+        try:
+            # The store lives in this process, so stored results are sent along with the call
+            job.call.resolve_refs()
+            worker.conn.send(self._encode(job.call))
+        except Exception as e:
+            # Nothing was sent (pickling happens before writing), so the worker is still good
+            job._finish(error=e)
+            self._checkin(worker)
+            return
+        if job._set_cancel_hook(worker.terminate):
+            worker.terminate()
+        recycle = True
+        try:
+            while True:
+                kind, payload = worker.conn.recv()
+                if kind == 'result':
+                    job._finish(result=payload)
+                elif kind == 'error':
+                    job._finish(error=payload)
+                elif kind == 'info':
+                    for c, info in zip(job.call.walk(), payload):
+                        c.info.update(info)
+                elif kind == 'progress':
+                    job.progress.set_state(payload)
+                elif kind == 'done':
+                    recycle = payload
+                    break
+                else:
+                    job.emit(kind, payload)
+        except (EOFError, OSError):
+            worker.proc.join()
+            job._finish(error=RuntimeError(f'Worker process exited unexpectedly (exit code {worker.proc.exitcode})'))
+        if recycle or job.cancelled.is_set():
+            worker.close()
+            self.recycled += 1
+            # The replacement starts importing now, so it's warm by the time it's needed
+            if not self._shutdown:
+                self._checkin(self._start_worker())
+        else:
+            self._checkin(worker)
+
+    def shutdown(self):
+        """Cancel everything queued or running and stop the worker processes"""
+        super().shutdown()
+        with self._workers_lock:
+            workers, self._idle_workers = self._idle_workers, []
+        for worker in workers:
+            worker.close()
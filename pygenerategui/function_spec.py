@@ -0,0 +1,427 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import atexit
+import collections.abc
+import hashlib
+import inspect
+import json
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from enum import EnumMeta
+from types import MappingProxyType
+from typing import Union, get_args, get_origin
+
+_WHITESPACE_RE = re.compile(r'\s{2,}')
+_DESCRIPTION_RE = re.compile(r'^(.*?)(?::|$)', re.DOTALL)
+# One pass over the docstring picks up every ':param x:' and ':return...:' field
+_FIELD_RE = re.compile(r':(?:param\s+(\w+)|(return)[^:]*):\s+(.*?)(?=:|$)', re.DOTALL | re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ArgInfo:
+    """Class for arg info"""
+    name: str = ''
+    description: str = ''
+    data_type: type = None
+    default: object = None
+    override: object = None
+    # True if the signature has no default for the arg
+    required: bool = False
+
+    def options(self) -> dict:
+        """
+        option_map of the override, built the first time it's needed and then kept with the (memoized) spec.
+        OptionSources are asked every time, since they reload on their own ttl.
+        """
+        if isinstance(self.override, OptionSource):
+            return self.override.load()
+        try:
+            return self.__dict__['_options']
+        except KeyError:
+            # Frozen, so set directly (like functools.cached_property); not a field, so not compared or hashed
+            options = self.__dict__['_options'] = option_map(self.override)
+            return options
+
+
+@dataclass(frozen=True)
+class FunctionSpec:
+    """
+    Everything the gui needs to know about a function, parsed once from its signature and docstring
+    Use get_function_spec() rather than building these directly.
+    """
+    func_name: str
+    description: str
+    args: MappingProxyType  # arg name -> ArgInfo, in signature order
+    returns: ArgInfo
+
+    @property
+    def args_info(self) -> dict:
+        """Args plus 'return', the layout FunctionGUI takes"""
+        args_info = dict(self.args)
+        args_info['return'] = self.returns
+        return args_info
+
+
+def option_map(source) -> dict:
+    """
+    The {label: value} choices for an arg overridden with a list, tuple, enum, dict, or OptionSource
+    A '_manual' key holds a function converting free text that isn't one of the labels.
+    An OptionSource is loaded (blocking) if it hasn't been already.
+    """
+    if type(source) in (list, tuple):
+        return {str(item): item for item in source}
+    elif type(source) is EnumMeta:
+        return {item.name: item for item in source}
+    elif isinstance(source, OptionSource):
+        return source.load()
+    return source
+
+
+class OptionSource:
+    """
+    Options for an arg that are only loaded when a form needs them, on a background thread, and then cached.
+    For big or slow option lists, e.g. @pggui(host=OptionSource(inventory.host_names, ttl=300))
+    :param loader: f() returning the options (list, tuple, dict, enum, or any iterable), or an iterable of them
+    :param ttl: Seconds loaded options are used before they're loaded again. Forever if none supplied (or if loader
+                isn't callable, since an iterable may only be read once).
+    """
+    def __init__(self, loader, ttl: float = None):
+        self.loader = loader
+        self.ttl = ttl
+        self.error = None
+        self._options = None
+        self._loaded_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def get(self, allow_expired: bool = False) -> Union[dict, None]:
+        """
+        The loaded options, or None if they aren't loaded (or have expired)
+        :param allow_expired: Return options even if they're past their ttl
+        """
+        options = self._options
+        if options is None or allow_expired:
+            return options
+        if self.ttl is not None and callable(self.loader) and time.monotonic() - self._loaded_at > self.ttl:
+            return None
+        return options
+
+    @property
+    def loading(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def load(self, force: bool = False) -> dict:
+        """
+        :param force: Load again even if the cached options are still valid
+        :return: The options, as {label: value}
+        """
+        if not force:
+            options = self.get()
+            if options is not None:
+                return options
+        raw = self.loader() if callable(self.loader) else self.loader
+        options = option_map(raw)
+        if isinstance(options, collections.abc.Mapping):
+            options = dict(options)
+        elif type(options) is not dict:
+            options = {str(item): item for item in options}
+        self._options, self._loaded_at, self.error = options, time.monotonic(), None
+        return options
+
+    def load_async(self, force: bool = False):
+        """Start loading on a background thread, unless already loading (or loaded, without force)"""
+        with self._lock:
+            if self.loading or (not force and self.get() is not None):
+                return
+            self.error = None
+            self._thread = threading.Thread(target=self._load_quietly, args=(force,), name='pggui-options',
+                                            daemon=True)
+            self._thread.start()
+
+    def _load_quietly(self, force: bool):
+        try:
+            self.load(force)
+        except Exception as e:
+            # Shown by the combobox, which can retry
+            self.error = e
+
+
+def default_option(options: dict, default=None) -> str:
+    """
+    The label a choice of options starts on: the one whose value is default if there is one, otherwise the first.
+    Blank when free text is allowed ('_manual').
+    """
+    if '_manual' in options:
+        return ''
+    selection = next(iter(options), '')
+    for key in options:
+        if options[key] == default:
+            selection = key
+    return selection
+
+
+def has_options(arg_info: ArgInfo) -> bool:
+    return type(arg_info.override) in (dict, list, tuple, EnumMeta) or isinstance(arg_info.override, OptionSource)
+
+
+_TRUE_STRINGS = ('1', 'true', 'yes', 'y', 'on')
+
+
+def convert_arg(arg_info: ArgInfo, raw):
+    """
+    Convert a raw value (usually text, e.g. from a csv or the command line) the way the arg's widget would
+    :param arg_info: The arg
+    :param raw: The raw value
+    :return: The value to pass to the function
+    """
+    if raw is None:
+        return None
+    if has_options(arg_info):
+        options = arg_info.options()
+        if str(raw) in options:
+            return options[str(raw)]
+        if '_manual' in options:
+            return options['_manual'](raw)
+        raise ValueError(f'Invalid Input: {raw}')
+    if arg_info.data_type is bool:
+        return raw.strip().lower() in _TRUE_STRINGS if isinstance(raw, str) else bool(raw)
+    if arg_info.data_type in (int, float, complex, str):
+        return arg_info.data_type(raw)
+    return raw
+
+
+def cleanup_string(s: str) -> str:
+    return _WHITESPACE_RE.sub(' ', s.strip())
+
+
+def parse_docstring(doc: str) -> tuple:
+    """
+    Split a docstring into its parts
+    :param doc: The docstring
+    :return: (description, {lowercase param name: description}, return description)
+    """
+    if doc is None or doc == '':
+        return '<No Description>', {}, ''
+    description = cleanup_string(_DESCRIPTION_RE.search(doc)[1])
+    params = {}
+    return_desc = None
+    for m in _FIELD_RE.finditer(doc):
+        if m[1] is not None:
+            params.setdefault(m[1].lower(), cleanup_string(m[3]))
+        elif return_desc is None:
+            return_desc = cleanup_string(m[3])
+    return description, params, '' if return_desc is None else return_desc
+
+
+def _signature(func) -> tuple:
+    """(args, defaults, annotations), read straight off the code object where possible"""
+    target = func.__func__ if inspect.ismethod(func) else func
+    code = getattr(target, '__code__', None)
+    if inspect.isfunction(target) and code is not None:
+        return (code.co_varnames[:code.co_argcount], target.__defaults__ or (),
+                getattr(target, '__annotations__', None) or {})
+    fas = inspect.getfullargspec(func)
+    return fas.args, fas.defaults or (), fas.annotations
+
+
+def _resolve_type(anno):
+    # A Union is treated as the first of bool, str, int, float, complex it contains
+    if get_origin(anno) == Union:
+        if bool in get_args(anno):
+            return bool
+        for x in (str, int, float, complex):
+            if x in get_args(anno):
+                return x
+    return anno
+
+
+class SpecDiskCache:
+    """
+    Parsed docstrings persisted to a json file, keyed by module path, qualname, and a hash of the code,
+    so a cold start can skip parsing for functions that haven't changed
+    :param path: The cache file. Created on save if it doesn't exist.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def key(func) -> Union[str, None]:
+        target = func.__func__ if inspect.ismethod(func) else func
+        code = getattr(target, '__code__', None)
+        if code is None:
+            return None
+        module = sys.modules.get(getattr(target, '__module__', None))
+        module_path = getattr(module, '__file__', None) or getattr(target, '__module__', '')
+        digest = hashlib.sha1(marshal.dumps(code))
+        digest.update((target.__doc__ or '').encode('utf-8', 'replace'))
+        return f'{module_path}:{target.__qualname__}:{digest.hexdigest()}'
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0], entry[1], entry[2]
+
+    def put(self, key: str, parsed: tuple):
+        with self._lock:
+            self._entries[key] = list(parsed)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = f'{self.path}.tmp'
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+
+# (function, whether it's bound) -> spec. Bound methods are keyed by their function, so every instance shares one
+# spec and the cache doesn't keep instances alive.
+_specs = {}
+_specs_lock = threading.Lock()
+_disk_cache = None  # type: Union[SpecDiskCache, None]
+
+
+@atexit.register
+def _save_disk_cache():
+    if _disk_cache is not None:
+        _disk_cache.save()
+
+
+def enable_spec_disk_cache(path: str) -> SpecDiskCache:
+    """
+    Persist parsed docstrings to path. The file is written when the interpreter exits.
+    :param path: The cache file
+    :return: The cache
+    """
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.save()
+    _disk_cache = SpecDiskCache(path)
+    return _disk_cache
+
+
+def clear_spec_cache(func=None):
+    """
+    Forget memoized specs
+    :param func: Only forget this function's spec. Forget all if none supplied.
+    """
+    with _specs_lock:
+        if func is None:
+            _specs.clear()
+        else:
+            try:
+                _specs.pop(_spec_key(func), None)
+            except TypeError:
+                pass
+
+
+def _spec_key(func) -> tuple:
+    if inspect.ismethod(func):
+        return func.__func__, True
+    return func, False
+
+
+def get_function_spec(func) -> FunctionSpec:
+    """
+    Get the spec for a function, parsing it the first time it's asked for
+    :param func: The function (or bound method)
+    :return: The function's FunctionSpec
+    """
+    key = _spec_key(func)
+    try:
+        return _specs[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable callable, can't be memoized
+        return _build_spec(func)
+    spec = _build_spec(func)
+    with _specs_lock:
+        return _specs.setdefault(key, spec)
+
+
+def _build_spec(func) -> FunctionSpec:
+    args, defaults, annotations = _signature(func)
+
+    parsed = None
+    key = None
+    if _disk_cache is not None:
+        key = SpecDiskCache.key(func)
+        if key is not None:
+            parsed = _disk_cache.get(key)
+    if parsed is None:
+        parsed = parse_docstring(func.__doc__)
+        if key is not None:
+            _disk_cache.put(key, parsed)
+    description, param_descs, return_desc = parsed
+
+    # Arrange for arg list and defaults list to be same length
+    n_required = len(args) - len(defaults)
+    defaults = [None] * n_required + list(defaults)
+    # Skip first arg on methods
+    first = 1 if inspect.ismethod(func) else 0
+    # Functions tagged by older versions of the decorator only have the _pggui_<arg> attributes
+    overrides = getattr(func, '_pggui_overrides', None)
+    args_info = {}
+    for i, arg in enumerate(args):
+        override = overrides.get(arg) if overrides is not None else getattr(func, f'_pggui_{arg}', None)
+        if isinstance(override, collections.abc.Iterable) and not callable(override) \
+                and type(override) not in (dict, list, tuple, str, bytes) and not isinstance(override, OptionSource):
+            # Other iterables (generators, sets, ranges...) are read once, when first needed
+            override = OptionSource(override)
+        if i < first:
+            args_info[arg] = ArgInfo(name=arg, description=param_descs.get(arg.lower(), ''), override=override)
+            continue
+        try:
+            data_type = _resolve_type(annotations[arg])
+        except KeyError:
+            # It's okay if the annotation is missing on overridden params
+            if override is None:
+                raise
+            data_type = None
+        args_info[arg] = ArgInfo(name=arg, description=param_descs.get(arg.lower(), ''), data_type=data_type,
+                                 default=defaults[i], override=override, required=i < n_required)
+
+    returns = ArgInfo(name='return', description=return_desc, data_type=annotations.get('return'), default=None)
+    return FunctionSpec(func_name=getattr(func, '_pggui_name', func.__name__), description=description,
+                        args=MappingProxyType(args_info), returns=returns)
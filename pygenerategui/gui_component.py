@@ -22,12 +22,24 @@
 # SOFTWARE.
 
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog, ttk
 from typing import Union, get_args, get_origin
 from enum import EnumMeta, Enum, IntEnum, Flag, IntFlag
+import dataclasses
 from dataclasses import dataclass
+from collections import deque
 import inspect
-import re
+import itertools
+import json
+
+from pygenerategui.executor import FunctionCall
+from pygenerategui.batch import BatchRunner, count_rows, parameter_sweep, read_rows
+from pygenerategui.function_spec import ArgInfo, OptionSource, convert_arg, default_option, get_function_spec, \
+    has_options, option_map
+from pygenerategui.progress import is_progress_param
+from pygenerategui.render import preview_text
+from pygenerategui.search import FunctionIndex, function_entry
+from pygenerategui.result_view import PagedTextViewer, TableView
 
 class ParamInputFrame(ttk.Frame):
     def __init__(self, parent: ttk.Frame, entry_description: str):
@@ -60,64 +72,141 @@ class ParamInputFrame(ttk.Frame):
 
 
 class ComboBoxBlock(ParamInputFrame):
+    # Sources with more options than this are filtered as you type, rather than all being put in the dropdown
+    max_listed = 500
+    # How often (ms) a loading OptionSource is checked
+    load_poll_interval = 100
+
     def __init__(self, parent: ttk.Frame, entry_description: str,
-                 source: Union[dict, EnumMeta, list], on_select = None, default = None):
+                 source: Union[dict, EnumMeta, list, OptionSource], on_select = None, default = None):
         """
         Combo Box input frame.
         :param parent: Parent Frame
         :param entry_description: Text to display at top of frame
-        :param source: A dictionary, enum, or list to generate items from
+        :param source: A dictionary, enum, or list to generate items from, or an OptionSource to load them from in
+                       the background
         :param on_select: f(c: ComboBoxBlock) to call when selection is updated
         """
         super().__init__(parent, entry_description)
         # ComboBox
         self.selection = tk.StringVar()
-        if type(source) in (list, tuple):
-            s = {}
-            for item in source:
-                s[str(item)] = item
-            self._source = s
-        elif type(source) is EnumMeta:
-            s = {}
-            for item in source:
-                s[item.name] = item
-            self._source = s
+        self.combobox = ttk.Combobox(self.frame, textvariable=self.selection, width=65)
+        self.btn_refresh = ttk.Button(self.frame, text='\u27f3', width=3, command=self.refresh_source)
+        self.on_select = on_select
+        self.combobox.bind('<<ComboboxSelected>>', self._on_select)
+        self.combobox.bind('<FocusOut>', self._on_focus_out)
+        self.combobox.bind('<KeyRelease>', self._on_key)
+        self.set_source(source, default)
+        self.grid_items()
+
+    def set_source(self, source: Union[dict, EnumMeta, list, OptionSource], default=None, selection: str = None):
+        """
+        Replace the options, selecting default (or the first option)
+        :param selection: Label to select instead of default's, e.g. one the user picked before
+        """
+        self._lazy = source if isinstance(source, OptionSource) else None
+        self._default = default
+        self._pending_selection = selection
+        # A new token makes polls for a previous source stop
+        self._load_token = object()
+        if self._lazy is not None:
+            self.btn_refresh.grid(row=1, column=2, sticky='w')
+            options = self._lazy.get()
+            if options is None:
+                self._start_loading()
+                return
         else:
-            self._source = source
+            self.btn_refresh.grid_remove()
+            options = option_map(source)
+        self._set_options(options)
+
+    def _set_options(self, options: dict):
+        self._source = options
         try:
             assert type(self._source) is dict, f'Could not convert source to dict: {type(self._source)}'
         except AssertionError:
             raise
-        self.combobox = ttk.Combobox(self.frame, textvariable=self.selection, width=65)
-        self.on_select = on_select
-        self.combobox.bind('<<ComboboxSelected>>', self._on_select)
+        self.labels = [x for x in self._source if x != '_manual']
+        # Big (or loaded) option lists are typed into to filter them, so they can't be readonly
+        self._filtered = len(self.labels) > self.max_listed or self._lazy is not None
         # Set up default values and whether to allow manual entry
-        self.combobox['values'] = [x for x in self._source if x != '_manual']
-        if '_manual' not in self._source:
+        self.combobox['values'] = self.labels[:self.max_listed]
+        self.combobox.state(['!disabled'])
+        if '_manual' in self._source or self._filtered:
+            self.combobox.state(['!readonly'])
+        else:
             self.combobox.state(['readonly'])
-            keys = list(self._source.keys())
-            self.selection.set(keys[0])
-            for key in keys:
-                if self._source[key] == default:
-                    self.selection.set(key)
+        selection = self._pending_selection
+        self._pending_selection = None
+        self.selection.set(default_option(self._source, self._default) if not selection else selection)
+
+    @property
+    def loading(self) -> bool:
+        return self._source is None
+
+    def _start_loading(self):
+        self._source = None
+        self.combobox.state(['disabled'])
+        self.selection.set('Loading options...')
+        self._lazy.load_async(force=True)
+        self.frame.after(self.load_poll_interval, self._poll_source, self._load_token)
+
+    def _poll_source(self, token):
+        if token is not self._load_token:
+            # The source was replaced meanwhile
+            return
+        options = self._lazy.get()
+        if options is not None and not self._lazy.loading:
+            self._set_options(options)
+        elif self._lazy.error is not None and not self._lazy.loading:
+            self.selection.set(f'Could not load options: {str(self._lazy.error)}')
         else:
-            self.combobox.bind('<FocusOut>', self._on_select)
-        self.grid_items()
+            self.frame.after(self.load_poll_interval, self._poll_source, token)
+
+    def refresh_source(self):
+        """Load an OptionSource's options again, keeping the selection if it's still an option"""
+        if self._lazy is None or self._lazy.loading:
+            return
+        self._pending_selection = None if self.loading else self.selection.get()
+        self._load_token = object()
+        self._start_loading()
+
+    def _on_key(self, e):
+        if not self._filtered or self.loading:
+            return
+        text = self.selection.get().lower()
+        # Stops at max_listed matches, so typing stays fast however many options there are
+        matches = (label for label in self.labels if text in label.lower())
+        self.combobox['values'] = list(itertools.islice(matches, self.max_listed))
+
+    def _on_focus_out(self, e):
+        # Manually entered values are only checked once the user leaves the box
+        if not self.loading and '_manual' in self._source:
+            self._on_select(e)
 
     def grid_items(self):
         self.lbl.grid(row=0, sticky='w')
         self.combobox.grid(row=1, column=0, columnspan=2, sticky='w')
 
     def get_value(self):
+        if self.loading:
+            if self._lazy.error is not None and not self._lazy.loading:
+                raise ValueError(f'Could not load options: {str(self._lazy.error)}')
+            raise ValueError(f'Options are still loading: {self.lbl["text"]}')
         try:
             return self._source[str(self.selection.get())]
         except KeyError:
+            if '_manual' not in self._source:
+                raise ValueError(f'Invalid Input: {self.selection.get()}')
             try:
                 return self._source['_manual'](self.selection.get())
             except ValueError:
                 raise ValueError(f'Invalid Input: {self.selection.get()}')
 
     def set_value(self, value: str):
+        if self.loading:
+            self._pending_selection = value
+            return
         if not '_manual' in self._source:
             assert value in self._source, 'Invalid Setting'
         self.selection.set(value)
@@ -130,6 +219,94 @@ class ComboBoxBlock(ParamInputFrame):
                 self.on_select('INVALID ENTRY')
 
 
+class FunctionPicker(ParamInputFrame):
+    # Most matches listed at once - the rest are reached by typing more
+    max_shown = 200
+
+    def __init__(self, parent: ttk.Frame, entry_description: str, source: dict, on_select=None):
+        """
+        Type-ahead function search: a search box over a list of the best matches, updated on every keystroke
+        :param parent: Parent Frame
+        :param entry_description: Text to display at top of frame
+        :param source: {name: function}
+        :param on_select: f(function) to call when a function is selected
+        """
+        super().__init__(parent, entry_description)
+        self.on_select = on_select
+        self.query = tk.StringVar()
+        self.entry = ttk.Entry(self.frame, textvariable=self.query, width=65)
+        self.lbl_count = ttk.Label(self.frame, text='')
+        self.listbox = tk.Listbox(self.frame, height=8, width=80, exportselection=False, activestyle='dotbox')
+        self.vscroll = ttk.Scrollbar(self.frame, orient='vertical', command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=self.vscroll.set)
+        self.query.trace_add('write', lambda *_: self.refresh())
+        self.entry.bind('<Down>', self._focus_list)
+        self.entry.bind('<Return>', lambda e: self._select_index(0))
+        self.listbox.bind('<<ListboxSelect>>', lambda e: self._select_index(self._current_index()))
+        self.listbox.bind('<Return>', lambda e: self._select_index(self._current_index()))
+        self.shown = []  # Names listed, in listbox order
+        self.selected = None
+        self.set_source(source)
+        if self.names:
+            self.selected = self.names[0]
+        self.grid_items()
+
+    def grid_items(self):
+        self.lbl.grid(row=0, column=0, sticky='w')
+        self.lbl_count.grid(row=0, column=1, sticky='e')
+        self.entry.grid(row=1, column=0, columnspan=2, sticky='we')
+        self.listbox.grid(row=2, column=0, columnspan=2, sticky='we')
+        self.vscroll.grid(row=2, column=2, sticky='ns')
+
+    def set_source(self, source: dict):
+        """Rebuild the search index for a new function list, keeping the query and selection where possible"""
+        self._source = source
+        self.names = list(source)
+        self.index = FunctionIndex([function_entry(name, func) for name, func in source.items()])
+        if self.selected not in source:
+            self.selected = self.names[0] if self.names else None
+        self.refresh()
+
+    def refresh(self):
+        ranked, total = self.index.search(self.query.get(), self.max_shown)
+        self.shown = [self.index.names[i] for i in ranked]
+        self.listbox.delete(0, 'end')
+        if self.shown:
+            self.listbox.insert('end', *self.shown)
+        if self.selected in self.shown:
+            self.listbox.selection_set(self.shown.index(self.selected))
+        more = f' (showing {len(self.shown)})' if total > len(self.shown) else ''
+        self.lbl_count['text'] = f'{total} of {len(self.index)} functions{more}'
+
+    def _current_index(self) -> int:
+        selection = self.listbox.curselection()
+        return selection[0] if selection else 0
+
+    def _focus_list(self, e):
+        if self.shown:
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, 'end')
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+    def _select_index(self, i: int):
+        if i >= len(self.shown):
+            return
+        self.selected = self.shown[i]
+        self.listbox.selection_clear(0, 'end')
+        self.listbox.selection_set(i)
+        if self.on_select is not None:
+            self.on_select(self.get_value())
+
+    def get_value(self):
+        return None if self.selected is None else self._source[self.selected]
+
+    def set_value(self, value: str):
+        assert value in self._source, 'Invalid Setting'
+        self.selected = value
+        self.refresh()
+
+
 class TextInputBlock(ParamInputFrame):
     def __init__(self, parent: ttk.Frame, entry_description: str, entry_default: str = '', entry_type: type = None):
         super().__init__(parent, entry_description)
@@ -152,6 +329,26 @@ class TextInputBlock(ParamInputFrame):
         return self.entry_text.set(value)
 
 
+class ResultRefBlock(TextInputBlock):
+    def __init__(self, parent: ttk.Frame, entry_description: str, result_store):
+        """
+        Input for an arg with no widget of its own (lists, DataFrames, custom classes...), filled in with a stored
+        result by entering its $key. Left empty, the arg isn't passed at all.
+        :param result_store: The ResultStore results are looked up in
+        """
+        super().__init__(parent, f'{entry_description} (enter a stored result, e.g. $r1)', entry_default='')
+        self.result_store = result_store
+
+    def is_empty(self) -> bool:
+        return self.entry_text.get().strip() == ''
+
+    def get_value(self):
+        ref = self.result_store.parse_ref(self.entry_text.get())
+        if ref is None:
+            raise ValueError(f'No stored result {self.entry_text.get().strip()}')
+        return ref
+
+
 class BoolInputBlock(ParamInputFrame):
     def __init__(self, parent: ttk.Frame, entry_description: str, entry_default: bool = False):
         super().__init__(parent, entry_description)
@@ -174,6 +371,9 @@ class BoolInputBlock(ParamInputFrame):
 
 
 class ReturnLabelBlock(ttk.Frame):
+    # Most characters of the result shown inline, the rest is in the VIEW ALL window
+    preview_length = 256
+
     def __init__(self, parent: ttk.Frame, return_description: str, return_value = None):
         super().__init__(parent)
 
@@ -182,45 +382,390 @@ class ReturnLabelBlock(ttk.Frame):
         self.description_lbl = ttk.Label(self.frame, text=return_description, anchor='nw', wraplength=450)
 
         self.return_value = return_value
-        try:
-            return_value_text = str(return_value)[:256]
-        except Exception:
-            return_value_text = '<Object>'
-        self.return_text = f'{return_value_text}'[:256]
+        self.return_text, truncated = preview_text(return_value, self.preview_length)
         self.return_lbl = tk.Text(self.frame, width=60, height=1 + (len(self.return_text)//60))
         self.return_lbl.insert(1.0, self.return_text)
         self.return_lbl.configure(state='disabled')
+        self.btn_view = None
+        if truncated:
+            self.btn_view = ttk.Button(self.frame, text='VIEW ALL', command=self.view_all)
         self.grid_items()
 
+    def view_all(self):
+        PagedTextViewer(self.frame, 'Result', self.return_value)
+
     def grid_items(self):
         self.description_lbl.grid(row=0, sticky='w')
         self.return_lbl.grid(row=1, sticky='w')
+        if self.btn_view is not None:
+            self.btn_view.grid(row=2, sticky='w')
+
+    def place(self, row=0, column=0, padx=5, pady=5, sticky='w'):
+        self.frame.grid(row=row, column=column, padx=padx, pady=pady, sticky=sticky)
+
+    def remove(self):
+        self.frame.grid_forget()
+        self.frame.destroy()
+        self.destroy()
+
+    def get_value(self):
+        return self.return_value
+
+
+class TableResultBlock(ttk.Frame):
+    def __init__(self, parent: ttk.Frame, return_description: str, return_value, table):
+        """
+        Shows a tabular result (see render.as_table) in a scrollable, sortable table
+        :param parent: Parent Frame
+        :param return_description: Text to display at top of frame
+        :param return_value: The result
+        :param table: render.TableModel over the result
+        """
+        super().__init__(parent)
+        self.frame = ttk.Frame(parent, borderwidth = 3, relief = 'ridge')
+        self.description_lbl = ttk.Label(self.frame, text=return_description, anchor='nw', wraplength=450)
+        self.return_value = return_value
+        self.table = TableView(self.frame, table)
+        self.grid_items()
+
+    def grid_items(self):
+        self.description_lbl.grid(row=0, sticky='w')
+        self.table.grid(row=1, sticky='w')
 
     def place(self, row=0, column=0, padx=5, pady=5, sticky='w'):
         self.frame.grid(row=row, column=column, padx=padx, pady=pady, sticky=sticky)
 
     def remove(self):
         self.frame.grid_forget()
+        self.frame.destroy()
         self.destroy()
 
     def get_value(self):
         return self.return_value
 
 
-class ArgInfo:
-    """Class for arg info"""
-    def __init__(self, name: str = '', description: str = '', data_type: type = None, default = None, override = None):
-        self.name = name
-        self.description = description
-        self.data_type = data_type
-        self.default = default
-        self.override = override
+def _n_bytes(line: str) -> int:
+    """Size of a line and its newline in utf-8"""
+    # Counting characters is exact for ascii, the common case, without encoding a copy of every line
+    return len(line) + 1 if line.isascii() else len(line.encode('utf-8', 'replace')) + 1
+
+
+class StreamResultBlock(ttk.Frame):
+    def __init__(self, parent: ttk.Frame, return_description: str, max_lines: int = 10000,
+                 max_bytes: int = 10_000_000):
+        """
+        Shows the items of a streamed result as they arrive. Only the last max_lines / max_bytes are kept.
+        :param parent: Parent Frame
+        :param return_description: Text to display at top of frame
+        :param max_lines: Most lines to keep
+        :param max_bytes: Most bytes (of utf-8 text) to keep
+        """
+        super().__init__(parent)
+        self.frame = ttk.Frame(parent, borderwidth = 3, relief = 'ridge')
+        self.return_description = return_description
+        self.description_lbl = ttk.Label(self.frame, text=return_description, anchor='nw', wraplength=450)
+        self.return_lbl = tk.Text(self.frame, width=60, height=10, wrap='none')
+        self.vscroll = ttk.Scrollbar(self.frame, orient='vertical', command=self.return_lbl.yview)
+        self.return_lbl.configure(yscrollcommand=self.vscroll.set, state='disabled')
+        self.max_lines = max(1, max_lines)
+        self.max_bytes = max_bytes
+        # Ring buffer mirroring the lines in the Text widget
+        self.lines = deque()
+        self.n_bytes = 0
+        self.count = 0
+        # Items the job dropped because they came faster than they were shown (see Job.max_buffered_items)
+        self.dropped = 0
+        # File the worker writes every item to (see FunctionCall.capture), shown once the stream ends
+        self.capture_path = None
+        self.grid_items()
+
+    def grid_items(self):
+        self.description_lbl.grid(row=0, sticky='w')
+        self.return_lbl.grid(row=1, column=0, sticky='w')
+        self.vscroll.grid(row=1, column=1, sticky='ns')
+
+    def place(self, row=0, column=0, padx=5, pady=5, sticky='w'):
+        self.frame.grid(row=row, column=column, padx=padx, pady=pady, sticky=sticky)
+
+    def append(self, lines: list, dropped: int = 0):
+        """
+        Add a batch of lines, dropping the oldest ones over the limits
+        :param lines: Lines of text (without newlines)
+        :param dropped: Items that came before these but were dropped without being shown
+        """
+        self.count += dropped
+        self.dropped += dropped
+        if not lines:
+            return
+        self.count += len(lines)
+        for line in lines:
+            self.lines.append(line)
+            self.n_bytes += _n_bytes(line)
+        while len(self.lines) > self.max_lines or (self.n_bytes > self.max_bytes and len(self.lines) > 1):
+            self.n_bytes -= _n_bytes(self.lines.popleft())
+        # Only the new lines that survived go in the widget, then the oldest ones are trimmed off its top
+        new = lines[len(lines) - min(len(lines), len(self.lines)):]
+        follow = self.return_lbl.yview()[1] >= 1.0
+        self.return_lbl.configure(state='normal')
+        self.return_lbl.insert('end', ''.join(f'{line}\n' for line in new))
+        shown = int(self.return_lbl.index('end-1c').split('.')[0]) - 1
+        excess = shown - len(self.lines)
+        if excess > 0:
+            self.return_lbl.delete('1.0', f'{excess + 1}.0')
+        self.return_lbl.configure(state='disabled')
+        if follow:
+            self.return_lbl.see('end')
+        self.description_lbl['text'] = f'{self.return_description}\n\nItems received: {self.count}'
+
+    def finish(self, summary: str, details: str = ''):
+        """
+        Stream ended (or was cancelled) - show the summary and where the full capture is
+        :param details: More text to show after those, e.g. the run's metrics
+        """
+        text = f'{self.return_description}\n\n{summary}'
+        if len(self.lines) < self.count:
+            text += f' (showing the last {len(self.lines)})'
+        if self.dropped:
+            text += f'\n{self.dropped} items came faster than they could be shown and were skipped'
+        if self.capture_path is not None:
+            text += f'\nFull output: {self.capture_path}'
+        if details:
+            text += f'\n\n{details}'
+        self.description_lbl['text'] = text
+
+    def remove(self):
+        self.frame.grid_forget()
+        self.frame.destroy()
+        self.destroy()
+
+    def get_value(self):
+        return list(self.lines)
+
+
+class VirtualArgForm(ttk.Frame):
+    def __init__(self, parent: ttk.Frame, fields: list, result_store=None, height: int = 10):
+        """
+        The inputs of a form with a lot of args. What's entered is kept in self.values; only `height` rows of widgets
+        are ever created, and they're rebound to other args as the form scrolls.
+        :param parent: Parent Frame
+        :param fields: (arg name, ArgInfo, kind) per arg, kind as returned by FunctionGUI.arg_kind
+        :param result_store: Where $key references are looked up
+        :param height: Rows of widgets
+        """
+        super().__init__(parent)
+        self.fields = fields
+        self.result_store = result_store
+        self.height = min(height, len(fields))
+        self.offset = 0
+        self._options = {}  # arg -> {label: value}, for 'options' args
+        # arg -> what's entered: text for text/ref args, bool for bool args, the selected label for option args
+        self.values = {arg: self.initial_value(arg, arg_info, kind) for arg, arg_info, kind in fields}
+        # Per row of widgets, the arg it's showing and its blocks by kind (created the first time a kind is needed)
+        self.slot_args = [None] * self.height
+        self.slot_kinds = [None] * self.height
+        self.slot_blocks = [{} for _ in range(self.height)]
+        self.slot_frames = [ttk.Frame(self) for _ in range(self.height)]
+        for k, frame in enumerate(self.slot_frames):
+            frame.grid(row=k, column=0, sticky='w')
+            self._bind_wheel(frame)
+        self.vscroll = ttk.Scrollbar(self, orient='vertical', command=self._on_scroll)
+        self.vscroll.grid(row=0, column=1, rowspan=max(1, self.height), sticky='ns')
+        self.lbl_position = ttk.Label(self, text='')
+        self.lbl_position.grid(row=self.height, column=0, sticky='w')
+        self.refresh()
+
+    def options(self, arg: str, arg_info: ArgInfo) -> Union[dict, OptionSource]:
+        """The arg's options, or its OptionSource (left for the combobox to load)"""
+        if isinstance(arg_info.override, OptionSource):
+            return arg_info.override
+        if arg not in self._options:
+            self._options[arg] = arg_info.options()
+        return self._options[arg]
+
+    def initial_value(self, arg: str, arg_info: ArgInfo, kind: str):
+        # Same as what the widget would start with. Blank for options that aren't loaded yet, meaning the default.
+        if kind == 'options':
+            options = self.options(arg, arg_info)
+            if isinstance(options, OptionSource):
+                options = options.get()
+                if options is None:
+                    return ''
+            return default_option(options, arg_info.default)
+        elif kind == 'bool':
+            return bool(arg_info.default)
+        elif kind == 'text':
+            return str(arg_info.default)
+        return ''
+
+    def _bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', lambda e: self.scroll_to(self.offset - (1 if e.delta > 0 else -1) * 3), add='+')
+        widget.bind('<Button-4>', lambda e: self.scroll_to(self.offset - 3), add='+')
+        widget.bind('<Button-5>', lambda e: self.scroll_to(self.offset + 3), add='+')
+
+    def _block(self, k: int, arg: str, arg_info: ArgInfo, kind: str) -> ParamInputFrame:
+        block = self.slot_blocks[k].get(kind)
+        if block is None:
+            parent = self.slot_frames[k]
+            if kind == 'options':
+                block = ComboBoxBlock(parent, '', source=self.options(arg, arg_info))
+            elif kind == 'bool':
+                block = BoolInputBlock(parent, '')
+            else:
+                block = TextInputBlock(parent, '', entry_type=str)
+            for widget in (block.frame,) + tuple(block.frame.winfo_children()):
+                self._bind_wheel(widget)
+            self.slot_blocks[k][kind] = block
+        return block
+
+    def save(self):
+        """Copy what's entered in the widgets into self.values"""
+        for k, arg in enumerate(self.slot_args):
+            if arg is None:
+                continue
+            block = self.slot_blocks[k][self.slot_kinds[k]]
+            if isinstance(block, BoolInputBlock):
+                self.values[arg] = block.checked.get()
+            elif isinstance(block, ComboBoxBlock):
+                if not block.loading:
+                    self.values[arg] = block.selection.get()
+            else:
+                self.values[arg] = block.entry_text.get()
+
+    def set_values(self, values: dict):
+        """Replace what's entered for args in values (as self.values holds them), e.g. after the form was rebuilt"""
+        self.save()
+        self.values.update((arg, value) for arg, value in values.items() if arg in self.values)
+        # Unbound rows aren't saved by refresh, so the new values are what's shown
+        self.slot_args = [None] * self.height
+        self.refresh()
+
+    def scroll_to(self, offset: int):
+        self.offset = min(max(offset, 0), max(0, len(self.fields) - self.height))
+        self.refresh()
+
+    def _on_scroll(self, action, amount, what=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.fields)))
+        elif what == 'pages':
+            self.scroll_to(self.offset + int(amount) * self.height)
+        else:
+            self.scroll_to(self.offset + int(amount))
+
+    def refresh(self):
+        """Rebind the rows of widgets to the args at the current offset"""
+        self.save()
+        for k in range(self.height):
+            arg, arg_info, kind = self.fields[self.offset + k]
+            block = self._block(k, arg, arg_info, kind)
+            if self.slot_kinds[k] != kind:
+                if self.slot_kinds[k] is not None:
+                    self.slot_blocks[k][self.slot_kinds[k]].frame.grid_remove()
+                block.place(row=0, pady=2)
+                self.slot_kinds[k] = kind
+            description = f'{arg_info.name}: {arg_info.description}'
+            if kind == 'ref':
+                description += ' (enter a stored result, e.g. $r1)'
+            block.lbl['text'] = description
+            value = self.values[arg]
+            if kind == 'options':
+                if self.slot_args[k] != arg:
+                    block.set_source(self.options(arg, arg_info), arg_info.default, selection=value)
+                elif not block.loading:
+                    block.selection.set(value)
+            elif kind == 'bool':
+                block.checked.set(value)
+            else:
+                block.entry_text.set(value)
+            self.slot_args[k] = arg
+        n = len(self.fields)
+        if n == 0:
+            self.vscroll.set(0, 1)
+        else:
+            self.vscroll.set(self.offset / n, (self.offset + self.height) / n)
+        self.lbl_position['text'] = f'Args {self.offset + 1}-{self.offset + self.height} of {n} (scroll for more)'
+
+    def get_values(self) -> dict:
+        """
+        The entered values, converted the way each arg's widget would convert them
+        Empty stored result entries are left out.
+        """
+        self.save()
+        kwargs = {}
+        for arg, arg_info, kind in self.fields:
+            raw = self.values[arg]
+            if kind == 'options':
+                options = self.options(arg, arg_info)
+                if isinstance(options, OptionSource):
+                    # Converted with the options already loaded (what the user picked from), so the Tk thread is
+                    # never blocked loading them
+                    options = options.get(allow_expired=True)
+                    if options is None:
+                        raise ValueError(f'Options for {arg} are still loading')
+                    raw = raw or default_option(options, arg_info.default)
+                    arg_info = dataclasses.replace(arg_info, override=options)
+                kwargs[arg] = convert_arg(arg_info, raw)
+            elif kind == 'bool':
+                kwargs[arg] = raw
+            elif self.result_store is not None and self.result_store.parse_ref(raw) is not None:
+                kwargs[arg] = self.result_store.parse_ref(raw)
+            elif kind == 'ref':
+                if raw.strip() != '':
+                    raise ValueError(f'No stored result {raw.strip()}')
+            else:
+                kwargs[arg] = arg_info.data_type(raw)
+        return kwargs
+
+
+class CollapsedFunctionGUI(ttk.Frame):
+    def __init__(self, parent: ttk.Frame, arg_info: ArgInfo, result_store=None):
+        """
+        A nested function gui that's only built when it's first expanded (or its values are first needed)
+        :param parent: Parent Frame
+        :param arg_info: The arg overridden with a function
+        :param result_store: Passed on to the nested gui
+        """
+        super().__init__(parent)
+        self.arg_info = arg_info
+        self.result_store = result_store
+        self.fgui = None  # type: Union[FunctionGUI, None]
+        self.expanded = False
+        self.frame = ttk.Frame(parent)
+        self.description = f'{arg_info.name}: {arg_info.description}'
+        self.btn_toggle = ttk.Button(self.frame, text=f'\u25b6 {self.description}', command=self.toggle)
+        self.btn_toggle.grid(row=0, column=0, sticky='w')
+
+    def place(self, row=0, column=0, padx=5, pady=5, sticky='w'):
+        self.frame.grid(row=row, column=column, padx=padx, pady=pady, sticky=sticky)
+
+    def build(self) -> 'FunctionGUI':
+        if self.fgui is None:
+            self.fgui = FunctionGUI.build_function_gui(self.frame, self.arg_info.override, self.result_store)
+        return self.fgui
+
+    def toggle(self):
+        self.expanded = not self.expanded
+        if self.expanded:
+            self.build().place(row=1)
+        else:
+            self.fgui.hide()
+        arrow = '\u25bc' if self.expanded else '\u25b6'
+        self.btn_toggle['text'] = f'{arrow} {self.description}'
+
+    def get_call(self) -> FunctionCall:
+        # Built (but not shown) if never expanded, so the defaults come out exactly as the widgets would give them
+        return self.build().get_call()
 
 
 class FunctionGUI(ttk.Frame):
-    def __init__(self, parent: ttk.Frame, func, func_description: str, args_info: dict[str, ArgInfo]):
+    # Forms with more args than this only create widgets for the args on screen
+    virtualize_threshold = 40
+
+    def __init__(self, parent: ttk.Frame, func, func_description: str, args_info: dict[str, ArgInfo],
+                 result_store=None):
         super().__init__(parent)
         self.func = func
+        # Where $key references entered for args are looked up. Entered text is taken literally if none supplied.
+        self.result_store = result_store
         # Base Frame
         self.frame = ttk.Frame(parent, borderwidth = 3, relief = 'ridge')
         # Entry Label
@@ -228,31 +773,69 @@ class FunctionGUI(ttk.Frame):
         self.lbl_func_description.grid(row = 0, column = 0, padx = 5, pady = 5, sticky = 'w')
         self.args_info = args_info
         self.arg_guis = {}  # type: dict[str, ParamInputFrame]
-        for arg in args_info:
-            if arg == 'return':
-                continue
-            arg_gui = self.get_arg_input_gui(arg, args_info[arg])
-            if arg_gui is not None:
-                self.arg_guis[arg] = self.get_arg_input_gui(arg, args_info[arg])
-
-        # Place function gui + output labels
+        # Big forms: a VirtualArgForm for the inputs, and nested function guis that are built when expanded
+        self.virtual_form = None  # type: Union[VirtualArgForm, None]
+        self.groups = {}  # type: dict[str, CollapsedFunctionGUI]
+        args = [arg for arg in args_info if arg != 'return']
         n = 1
-        for arg in self.arg_guis:
-            self.arg_guis[arg].place(row=n)
+        if len(args) > self.virtualize_threshold:
+            fields = []
+            for arg in args:
+                kind = self.arg_kind(args_info[arg])
+                if kind == 'function':
+                    self.groups[arg] = CollapsedFunctionGUI(self.frame, args_info[arg], self.result_store)
+                elif kind is not None:
+                    fields.append((arg, args_info[arg], kind))
+            self.virtual_form = VirtualArgForm(self.frame, fields, self.result_store)
+            self.virtual_form.grid(row=n, column=0, padx=5, pady=5, sticky='w')
             n += 1
+            for arg in self.groups:
+                self.groups[arg].place(row=n)
+                n += 1
+        else:
+            for arg in args:
+                arg_gui = self.get_arg_input_gui(arg, args_info[arg])
+                if arg_gui is not None:
+                    self.arg_guis[arg] = arg_gui
+
+            # Place function gui + output labels
+            for arg in self.arg_guis:
+                self.arg_guis[arg].place(row=n)
+                n += 1
         self.lbl_result = ttk.Label(self.frame, text='', anchor='nw', wraplength=450)
         self.lbl_result.grid(row=n, column=0, padx=5, pady=5, sticky='w')
         n += 1
         self.lbl_error = ttk.Label(self.frame, text = '', anchor='nw', wraplength = 450)
         self.lbl_error.grid(row=n, column=0, padx=5, pady=5, sticky='w')
 
+    def arg_kind(self, arg_info: ArgInfo) -> Union[str, None]:
+        """
+        What kind of input an arg gets: 'options', 'function', 'text', 'bool', 'ref' (a stored result), or None
+        (e.g. for Progress params, which are filled in when the function runs)
+        """
+        if arg_info.override is not None:
+            if has_options(arg_info):
+                return 'options'
+            elif callable(arg_info.override):
+                return 'function'
+            return None
+        elif arg_info.data_type in (int, float, complex, str):
+            return 'text'
+        elif arg_info.data_type is bool:
+            return 'bool'
+        elif is_progress_param(arg_info):
+            return None
+        elif self.result_store is not None:
+            return 'ref'
+        return None
+
     def get_arg_input_gui(self, arg: str, arg_info: ArgInfo):
         if arg_info.override is not None:
-            if type(arg_info.override) in (dict, list, tuple, EnumMeta):
+            if has_options(arg_info):
                 return ComboBoxBlock(parent=self.frame, source=arg_info.override, default=arg_info.default,
                                      entry_description=f'{arg_info.name}: {arg_info.description}')
             elif callable(arg_info.override):
-                return self.build_function_gui(self.frame, arg_info.override)
+                return self.build_function_gui(self.frame, arg_info.override, self.result_store)
         elif arg_info.data_type in (int, float, complex, str):
             return TextInputBlock(parent=self.frame, entry_default=arg_info.default,
                                   entry_description=f'{arg_info.name}: {arg_info.description}',
@@ -260,115 +843,227 @@ class FunctionGUI(ttk.Frame):
         elif arg_info.data_type is bool:
             return BoolInputBlock(parent=self.frame, entry_default=bool(arg_info.default),
                                   entry_description=f'{arg_info.name}: {arg_info.description}')
+        elif is_progress_param(arg_info):
+            return None
+        elif self.result_store is not None:
+            return ResultRefBlock(parent=self.frame, entry_description=f'{arg_info.name}: {arg_info.description}',
+                                  result_store=self.result_store)
         else: return None
 
     @staticmethod
-    def build_function_gui(parent: ttk.Frame, func):
-        def cleanup_string(s):
-            return re.sub(r'\s{2,}', ' ', s.strip())
-        # docstring_entry_pattern = f':{entry}:\s+(.*?)(?::|$)'
-        fas = inspect.getfullargspec(func)
-        args_info = {} # type: dict[str, gui.ArgInfo]
-
-        # Grab function description
-        if func.__doc__ is None or func.__doc__ == '':
-            description = '<No Description>'
-        else:
-            desc_re = re.search(r'^(.*?)(?::|$)', func.__doc__, re.DOTALL | re.IGNORECASE)
-            if desc_re is None:
-                description = '<Description Parse Failure>'
-            else:
-                description = cleanup_string(desc_re[1])
-
-        # Grab args infos
-        for arg in fas.args:
-            # Name
-            args_info[arg] = ArgInfo(name=arg)
-            # Description
-            if func.__doc__ is None:
-                args_info[arg].description = ''
-            else:
-                docstring_entry_pattern = r':param ARG:\s+(.*?)(?::|$)'.replace('ARG', arg)
-                arg_docstring = re.search(docstring_entry_pattern, func.__doc__, re.DOTALL | re.IGNORECASE)
-                if arg_docstring is None:
-                    args_info[arg].description = ''
-                else:
-                    args_info[arg].description = cleanup_string(arg_docstring[1])
-            # Override
-            if hasattr(func, f'_pggui_{arg}'):
-                ovr = getattr(func, f'_pggui_{arg}')
-                args_info[arg].override = ovr
-
-        # Default Values and Types
-        args = list(fas.args)
-        if fas.defaults is not None:
-            # Arrange for arg list and defaults list to be same length
-            defaults = list(fas.defaults)
-            while len(defaults) < len(args):
-                defaults.insert(0, None)
-            for i in range(len(args)):
-                # Skip first arg on methods
-                if inspect.ismethod(func):
-                    if i == 0:
-                        continue
-                args_info[args[i]].default = defaults[i]
-        else:
-            for i in range(len(args)):
-                # Skip first arg on methods
-                if inspect.ismethod(func):
-                    if i == 0:
-                        continue
-                args_info[args[i]].default = None
-        for i in range(len(args)):
-            arg = args[i]
-            if inspect.ismethod(func):
-                if i == 0:
-                    continue
-            try:
-                anno_type = fas.annotations[arg]
-                if get_origin(anno_type) == Union:
-                    if bool in get_args(anno_type):
-                        anno_type = bool
-                    else:
-                        for x in (str, int, float, complex):
-                            if x in get_args(anno_type):
-                                anno_type = x
-                                break
-                args_info[arg].data_type = anno_type
-            except KeyError:
-                # It's okay if the annotation is missing on overridden params
-                if args_info[arg].override is not None:
-                    continue
-                raise
-
-        return_type = None if 'return' not in fas.annotations else fas.annotations['return']
-        if func.__doc__ is None or func.__doc__ == '':
-            return_desc = ''
-        else:
-            return_re = re.search(r':return.*?:\s+(.*?)(?::|$)', func.__doc__, re.DOTALL | re.IGNORECASE)
-            return_desc = '' if return_re is None else cleanup_string(return_re[1])
-        args_info['return'] = ArgInfo(name='return', description=return_desc, data_type=return_type, default=None)
-        return FunctionGUI(parent=parent, func=func, func_description=description, args_info=args_info)
+    def build_function_gui(parent: ttk.Frame, func, result_store=None):
+        spec = get_function_spec(func)
+        return FunctionGUI(parent=parent, func=func, func_description=spec.description, args_info=spec.args_info,
+                           result_store=result_store)
 
     def place(self, row=0, column=0, padx=5, pady=5, sticky='w'):
         self.frame.grid(row=row, column=column, padx=padx, pady=pady, sticky=sticky)
 
+    def hide(self):
+        """Take the gui off screen, keeping its widgets and values so it can be placed again"""
+        self.frame.grid_remove()
+
     def remove(self):
         self.frame.grid_forget()
+        self.frame.destroy()
         self.destroy()
 
-    def run_function(self):
+    def get_call(self) -> FunctionCall:
+        """
+        Read the arg values from the gui without running anything, so the call can be handed off to an executor
+        :return: The function bound to its args. Nested function guis become nested calls.
+        """
         kwargs = {}
+        if self.virtual_form is not None:
+            values = self.virtual_form.get_values()
+            for arg in self.args_info:
+                if arg in self.groups:
+                    kwargs[arg] = self.groups[arg].get_call()
+                elif arg in values:
+                    kwargs[arg] = values[arg]
+            return FunctionCall(self.func, kwargs)
         for arg in self.arg_guis:
             arg_gui = self.arg_guis[arg]
-            kwargs[arg] = arg_gui.get_value()
-        result = self.func(**kwargs)
+            if isinstance(arg_gui, FunctionGUI):
+                kwargs[arg] = arg_gui.get_call()
+            elif isinstance(arg_gui, ResultRefBlock) and arg_gui.is_empty():
+                continue
+            elif isinstance(arg_gui, TextInputBlock) and self.result_store is not None \
+                    and self.result_store.parse_ref(arg_gui.entry_text.get()) is not None:
+                # The stored object itself is passed, not its text
+                kwargs[arg] = self.result_store.parse_ref(arg_gui.entry_text.get())
+            else:
+                kwargs[arg] = arg_gui.get_value()
+        return FunctionCall(self.func, kwargs)
+
+    def get_entries(self) -> dict:
+        """
+        What's entered in the form as the widgets hold it (text, checkbox states, selected labels), to be put back into
+        a rebuilt gui of the same function with set_entries. Nested function guis give their own entries.
+        """
+        if self.virtual_form is not None:
+            self.virtual_form.save()
+            entries = dict(self.virtual_form.values)
+            for arg, group in self.groups.items():
+                if group.fgui is not None:
+                    entries[arg] = group.fgui.get_entries()
+        else:
+            entries = {}
+            for arg, arg_gui in self.arg_guis.items():
+                if isinstance(arg_gui, FunctionGUI):
+                    entries[arg] = arg_gui.get_entries()
+                elif isinstance(arg_gui, BoolInputBlock):
+                    entries[arg] = arg_gui.checked.get()
+                elif isinstance(arg_gui, ComboBoxBlock):
+                    if not arg_gui.loading:
+                        entries[arg] = arg_gui.selection.get()
+                else:
+                    entries[arg] = arg_gui.entry_text.get()
+        return {'signature': str(inspect.signature(self.func)), 'args': entries}
+
+    def set_entries(self, entries: dict) -> bool:
+        """
+        Put back what get_entries returned, unless the function's signature has changed since
+        Selections that are no longer options are left at the default.
+        :return: Whether the entries were put back
+        """
+        if entries['signature'] != str(inspect.signature(self.func)):
+            return False
+        values = entries['args']
+        if self.virtual_form is not None:
+            for arg, group in self.groups.items():
+                if isinstance(values.get(arg), dict):
+                    group.build().set_entries(values[arg])
+            self.virtual_form.set_values({arg: v for arg, v in values.items() if arg not in self.groups})
+            return True
+        for arg, arg_gui in self.arg_guis.items():
+            if arg not in values:
+                continue
+            value = values[arg]
+            if isinstance(arg_gui, FunctionGUI):
+                arg_gui.set_entries(value)
+            elif isinstance(arg_gui, BoolInputBlock):
+                arg_gui.checked.set(value)
+            elif isinstance(arg_gui, ComboBoxBlock):
+                if arg_gui.loading or value in arg_gui.labels or '_manual' in arg_gui._source:
+                    arg_gui.set_value(value)
+            else:
+                arg_gui.entry_text.set(value)
+        return True
+
+    def run_function(self):
+        result = self.get_call()()
+        return result, self.describe_result(result)
+
+    def describe_result(self, result, result_type: str = None) -> str:
+        """
+        :param result: What the function returned
+        :param result_type: Shown instead of the type of result, e.g. for streamed results
+        """
+        result_type = str(type(result)) if result_type is None else result_type
         if 'return' in self.args_info:
             return_info = self.args_info['return'].description
-            return_text = f'Last Function Returned: {str(type(result))}\n\nReturn Desc: {return_info}'
+            return_text = f'Last Function Returned: {result_type}\n\nReturn Desc: {return_info}'
         else:
-            return_text = f'Last Function Returned: {str(type(result))}\n'
-        return result, return_text
+            return_text = f'Last Function Returned: {result_type}\n'
+        return return_text
 
     def get_value(self):
         return self.run_function()[0]
+
+
+class BatchDialog(tk.Toplevel):
+    poll_interval = 250
+
+    def __init__(self, parent, call: FunctionCall, title: str):
+        """
+        Window for running a function over every row of a csv/jsonl file, or every combination of a parameter sweep
+        Rows are run in the background with results written to a file as they finish.
+        :param parent: Parent widget
+        :param call: The function with its current form values, used for any arg a row doesn't supply
+        :param title: Window title
+        """
+        super().__init__(parent)
+        self.title(title)
+        self.call = call
+        self.runner = None  # type: Union[BatchRunner, None]
+
+        self.input_path = tk.StringVar()
+        self.sweep = tk.StringVar()
+        self.output_path = tk.StringVar()
+        self.workers = tk.IntVar(value=4)
+        self.use_processes = tk.BooleanVar()
+        rows = (('Input file (.csv/.jsonl)', self.input_path, self.browse_input),
+                ('...or sweep (json {arg: [values]})', self.sweep, None),
+                ('Output file (.csv/.jsonl)', self.output_path, self.browse_output))
+        for n, (label, var, browse) in enumerate(rows):
+            ttk.Label(self, text=label).grid(row=n, column=0, padx=5, pady=2, sticky='w')
+            ttk.Entry(self, textvariable=var, width=50).grid(row=n, column=1, padx=5, pady=2, sticky='we')
+            if browse is not None:
+                ttk.Button(self, text='...', width=3, command=browse).grid(row=n, column=2, padx=5, pady=2)
+        ttk.Label(self, text='Workers').grid(row=3, column=0, padx=5, pady=2, sticky='w')
+        ttk.Spinbox(self, from_=1, to=64, textvariable=self.workers, width=5).grid(row=3, column=1, padx=5, pady=2,
+                                                                                   sticky='w')
+        ttk.Checkbutton(self, text='Run in processes', variable=self.use_processes).grid(row=4, column=1, padx=5,
+                                                                                          pady=2, sticky='w')
+        self.btn_start = ttk.Button(self, text='START', command=self.start)
+        self.btn_start.grid(row=5, column=1, padx=5, pady=5, sticky='e')
+        self.btn_cancel = ttk.Button(self, text='CANCEL', command=self.cancel)
+        self.btn_cancel.grid(row=5, column=2, padx=5, pady=5)
+        self.btn_cancel.state(['disabled'])
+        self.lbl_progress = ttk.Label(self, text='', anchor='nw', wraplength=450)
+        self.lbl_progress.grid(row=6, column=0, columnspan=3, padx=5, pady=5, sticky='w')
+        self.protocol('WM_DELETE_WINDOW', self.close)
+
+    def browse_input(self):
+        path = filedialog.askopenfilename(parent=self, filetypes=[('Batch input', '*.csv *.jsonl'), ('All', '*')])
+        if path:
+            self.input_path.set(path)
+
+    def browse_output(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension='.jsonl',
+                                            filetypes=[('JSON lines', '*.jsonl'), ('CSV', '*.csv')])
+        if path:
+            self.output_path.set(path)
+
+    def start(self):
+        try:
+            if self.sweep.get().strip():
+                values = json.loads(self.sweep.get())
+                rows = parameter_sweep(values)
+                total = 1
+                for v in values.values():
+                    total *= len(v)
+            else:
+                rows = read_rows(self.input_path.get())
+                total = count_rows(self.input_path.get())
+            if not self.output_path.get():
+                raise ValueError('No output file')
+            self.runner = BatchRunner(self.call, rows, self.output_path.get(), workers=self.workers.get(),
+                                      use_processes=self.use_processes.get(), total=total)
+        except Exception as e:
+            self.lbl_progress['text'] = f'ERROR: {str(e)}'
+            return
+        self.runner.start()
+        self.btn_start.state(['disabled'])
+        self.btn_cancel.state(['!disabled'])
+        self.poll()
+
+    def poll(self):
+        if self.runner is None:
+            return
+        self.lbl_progress['text'] = self.runner.status_text()
+        if self.runner.running:
+            self.after(self.poll_interval, self.poll)
+            return
+        self.lbl_progress['text'] += f'\nResults written to {self.runner.output_path}'
+        self.btn_start.state(['!disabled'])
+        self.btn_cancel.state(['disabled'])
+
+    def cancel(self):
+        if self.runner is not None:
+            self.runner.cancel()
+
+    def close(self):
+        self.cancel()
+        self.destroy()
@@ -0,0 +1,148 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Hot reload for PGGUI_App: the source files of the components' modules are polled (os.stat, standard library only) and
+modules whose file changed are reloaded in place, so their new functions can be swapped into the running app
+"""
+import importlib
+import os
+import sys
+import types
+from typing import Union
+
+from pygenerategui import registry
+from pygenerategui.lazy import LazyComponent
+
+
+def _stamp(path: str) -> Union[tuple, None]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def component_modules(component) -> list:
+    """
+    :param component: A module, class, instance, or LazyComponent
+    :return: Names of the modules its functions are defined in (a class's and its bases'). Empty for string
+             components that aren't imported yet - they'll import the current source anyway.
+    """
+    if isinstance(component, LazyComponent):
+        if component.obj is None:
+            return []
+        component = component.obj
+    if isinstance(component, types.ModuleType):
+        return [component.__name__]
+    cls = component if isinstance(component, type) else type(component)
+    return list(dict.fromkeys(k.__module__ for k in cls.__mro__ if k.__module__ != 'builtins'))
+
+
+def function_module(func) -> Union[str, None]:
+    """The name of the module a (possibly bound) function is defined in"""
+    return getattr(getattr(func, '__func__', func), '__module__', None)
+
+
+class ModuleWatcher:
+    """
+    Remembers when the source file of each watched module was last changed, and reports the ones changed since
+    """
+    def __init__(self):
+        # module name -> (source file, (mtime, size))
+        self._stamps = {}
+
+    def watch(self, modules: list):
+        """
+        Start watching modules not already watched. Modules without a .py source (builtins, extensions) are skipped,
+        they can't be reloaded.
+        """
+        for name in modules:
+            if name in self._stamps:
+                continue
+            path = getattr(sys.modules.get(name), '__file__', None)
+            if path is None or not path.endswith('.py'):
+                continue
+            self._stamps[name] = (path, _stamp(path))
+
+    def changed(self) -> list:
+        """:return: The watched modules whose source changed since they were watched or last reported"""
+        changed = []
+        for name, (path, stamp) in self._stamps.items():
+            current = _stamp(path)
+            if current != stamp:
+                self._stamps[name] = (path, current)
+                changed.append(name)
+        return changed
+
+
+def reload_modules(modules: list) -> dict:
+    """
+    Reload modules in place, so @pggui records the functions they define now
+    :return: {module name: exception} for any that failed to reload. Those keep their old functions.
+    """
+    errors = {}
+    for name in modules:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        # Functions deleted from the module shouldn't be found any more
+        entries = registry.unregister_module(name)
+        try:
+            importlib.reload(module)
+        except Exception as e:
+            registry.restore_module(name, entries)
+            errors[name] = e
+    return errors
+
+
+def _reloaded_class(cls: type) -> type:
+    obj = sys.modules.get(cls.__module__)
+    for part in cls.__qualname__.split('.'):
+        obj = getattr(obj, part, None)
+    return obj if isinstance(obj, type) else cls
+
+
+def rebind_component(component):
+    """
+    The component as it is after its modules were reloaded
+    Modules are reloaded in place. Classes are looked up again in their module, and instances keep their state
+    but are switched over to the reloaded class.
+    """
+    if isinstance(component, LazyComponent):
+        if component.obj is not None:
+            component.obj = rebind_component(component.obj)
+        return component
+    if isinstance(component, types.ModuleType):
+        return component
+    if isinstance(component, type):
+        return _reloaded_class(component)
+    cls = _reloaded_class(type(component))
+    if cls is not type(component):
+        try:
+            component.__class__ = cls
+        except TypeError:
+            # e.g. __slots__ layouts that differ; the instance keeps its old methods
+            pass
+    return component
@@ -0,0 +1,303 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import ast
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import threading
+from typing import Union
+
+from pygenerategui.registry import find_functions
+
+
+def parse_component_path(path: str) -> tuple:
+    """
+    :param path: 'package.module' or 'package.module:Class'
+    :return: (module name, attribute path or None)
+    """
+    module_name, _, attr = path.partition(':')
+    return module_name, attr or None
+
+
+def import_component(path: str):
+    """
+    Import the module or class a component path refers to
+    :param path: 'package.module' or 'package.module:Class'
+    """
+    module_name, attr = parse_component_path(path)
+    obj = importlib.import_module(module_name)
+    if attr is not None:
+        for part in attr.split('.'):
+            obj = getattr(obj, part)
+    return obj
+
+
+def component_path(component) -> Union[str, None]:
+    """
+    The inverse of import_component
+    :return: A path for a module or class, None for anything that can't be imported by name (e.g. instances)
+    """
+    if inspect.ismodule(component):
+        return component.__name__
+    if inspect.isclass(component) and '<locals>' not in component.__qualname__:
+        return f'{component.__module__}:{component.__qualname__}'
+    return None
+
+
+def _is_decorator(node: ast.expr, name: str) -> bool:
+    if isinstance(node, ast.Call):
+        node = node.func
+    return (isinstance(node, ast.Name) and node.id == name) or (isinstance(node, ast.Attribute) and node.attr == name)
+
+
+def _pggui_name(node: ast.expr, default: str) -> str:
+    if isinstance(node, ast.Call):
+        for kw in node.keywords:
+            if kw.arg == 'name' and isinstance(kw.value, ast.Constant) and isinstance(kw.value.value, str):
+                return kw.value.value
+        if node.args and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str):
+            return node.args[0].value
+    return default
+
+
+def scan_source(path: str) -> Union[tuple, None]:
+    """
+    Find the @pggui functions of a component by parsing its source, without importing it.
+    This is a best guess (it can't see inherited methods or aliased decorators) - the real list replaces it once
+    the component is imported.
+    :param path: 'package.module' or 'package.module:Class'
+    :return: (source file, manifest entries), or None if there is no source to parse
+    """
+    module_name, attr = parse_component_path(path)
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.origin is None or not spec.origin.endswith('.py'):
+        return None
+    with open(spec.origin, 'rb') as f:
+        tree = ast.parse(f.read(), spec.origin)
+
+    body = tree.body
+    is_class = attr is not None
+    if is_class:
+        for part in attr.split('.'):
+            cls = next((n for n in body if isinstance(n, ast.ClassDef) and n.name == part), None)
+            if cls is None:
+                return spec.origin, []
+            body = cls.body
+    entries = []
+    for node in body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        decorator = next((d for d in node.decorator_list if _is_decorator(d, 'pggui')), None)
+        if decorator is None:
+            continue
+        if is_class and not any(_is_decorator(d, 'staticmethod') or _is_decorator(d, 'classmethod')
+                                for d in node.decorator_list):
+            # Instance methods don't appear when the component is a class
+            continue
+        entries.append({'name': _pggui_name(decorator, node.name), 'attr': node.name,
+                        'doc': ast.get_docstring(node) or '',
+                        'signature': f'({", ".join(a.arg for a in node.args.args)})'})
+    return spec.origin, sorted(entries, key=lambda e: e['attr'])
+
+
+def describe_functions(funcs: list) -> list:
+    """Manifest entries for loaded functions"""
+    entries = []
+    for func in funcs:
+        try:
+            signature = str(inspect.signature(func))
+        except (TypeError, ValueError):
+            signature = '(...)'
+        entries.append({'name': func._pggui_name, 'attr': func.__name__, 'doc': inspect.getdoc(func) or '',
+                        'signature': signature})
+    return entries
+
+
+class ManifestCache:
+    """
+    Function lists of lazy components, persisted to a json file so they can be shown without importing or parsing
+    anything. An entry is used as long as the component's source file is unchanged.
+    :param path: The manifest file. Not persisted if none supplied.
+    """
+    def __init__(self, path: str = None):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    @staticmethod
+    def _stamp(source: str) -> Union[list, None]:
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+    def get(self, component: str) -> Union[list, None]:
+        entry = self._entries.get(component)
+        if entry is None or entry['stamp'] is None or self._stamp(entry['source']) != entry['stamp']:
+            return None
+        return entry['functions']
+
+    def put(self, component: str, source: str, functions: list):
+        with self._lock:
+            self._entries[component] = {'source': source, 'stamp': self._stamp(source), 'functions': functions}
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            tmp = f'{self.path}.tmp'
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+
+
+class LazyFunction:
+    """
+    Stand-in for a function of a component that hasn't been imported yet
+    Carries enough to be listed (name, docstring, signature); resolve() imports the component.
+    """
+    def __init__(self, component: 'LazyComponent', name: str, attr: str, doc: str = '', signature: str = ''):
+        self.component = component
+        self._pggui_name = name
+        self.__name__ = attr
+        self.__doc__ = doc
+        self.signature = signature
+
+    def resolve(self):
+        """Import the component if needed and return the real function"""
+        return getattr(self.component.load(), self.__name__)
+
+    def __repr__(self):
+        return f'<LazyFunction {self.component.path}.{self.__name__}>'
+
+
+class LazyComponent:
+    """
+    A component given by path instead of object, imported the first time it's needed
+    :param path: 'package.module' or 'package.module:Class'
+    :param manifest: Where to look up / save the component's function list
+    """
+    def __init__(self, path: str, manifest: ManifestCache = None):
+        self.path = path
+        self.manifest = ManifestCache() if manifest is None else manifest
+        self.source = None
+        self.obj = None
+        self.error = None
+        # Guards the fields above, never held while importing, so checking on the component doesn't wait on an import
+        self._lock = threading.Lock()
+        self._importing = False
+        self._imported = threading.Event()
+        self._thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.obj is not None or self.error is not None
+
+    def load(self):
+        """
+        Import the component (once), blocking until it's imported - or until the import already under way finishes
+        :raises: The import's error, every time, if it failed. It isn't retried.
+        """
+        with self._lock:
+            if self.obj is not None:
+                return self.obj
+            if self.error is not None:
+                raise self.error
+            waiting = self._importing
+            self._importing = True
+        if waiting:
+            self._imported.wait()
+            return self.load()
+        try:
+            obj = import_component(self.path)
+        except Exception as e:
+            with self._lock:
+                self.error = e
+                self._importing = False
+            self._imported.set()
+            raise
+        with self._lock:
+            self.source = getattr(inspect.getmodule(obj), '__file__', None)
+            self.obj = obj
+            self._importing = False
+        self._imported.set()
+        return obj
+
+    def load_async(self):
+        """Start importing the component on a background thread, if it isn't already. Never waits on an import."""
+        with self._lock:
+            if self.loaded or self._importing or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._load_quietly, name=f'pggui-load-{self.path}', daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Block until an import started by load or load_async has finished
+        :return: False if it's still going after timeout seconds
+        """
+        return self.loaded or self._imported.wait(timeout)
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception:
+            # Kept in self.error for whoever resolves the component
+            pass
+
+    def functions(self) -> list:
+        """
+        :return: LazyFunctions from the manifest, or from parsing the source if the manifest is out of date.
+                 Imports the component only if it has no python source.
+        """
+        entries = self.manifest.get(self.path)
+        if entries is None:
+            scanned = scan_source(self.path)
+            if scanned is None:
+                return self.update_manifest(find_functions(self.load()))
+            self.source, entries = scanned
+        return [LazyFunction(self, e['name'], e['attr'], e['doc'], e['signature']) for e in entries]
+
+    def update_manifest(self, funcs: list) -> list:
+        """
+        Record the real function list of the loaded component
+        :param funcs: The component's pggui functions
+        :return: funcs
+        """
+        if self.source is not None:
+            self.manifest.put(self.path, self.source, describe_functions(funcs))
+        return funcs
@@ -0,0 +1,167 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Runs functions decorated with timeout / max_memory / max_cpu_seconds in a subprocess, which is killed if it goes
+past them. The subprocess is a plain `python -m pygenerategui.limits` (not multiprocessing), so limited functions
+can also be run from executor worker processes. Functions and args are pickled, so must be importable/picklable.
+"""
+import asyncio
+import collections.abc
+import inspect
+import math
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows: only timeout is enforced
+    resource = None
+
+# Seconds between watchdog checks of a running limited function (for cancellation)
+poll_interval = 0.1
+
+
+class LimitExceeded(RuntimeError):
+    """A function went past one of its @pggui limits and was stopped"""
+
+
+def _format_bytes(n: int) -> str:
+    return f'{n / 1024 ** 2:.0f} MB' if n >= 1024 ** 2 else f'{n} bytes'
+
+
+def run_limited(func, kwargs: dict, limits: dict, cancelled: threading.Event = None):
+    """
+    Run func(**kwargs) in a subprocess with the limits applied
+    :param limits: timeout (wall seconds), max_memory (bytes of address space), max_cpu_seconds
+    :param cancelled: Kill the subprocess once this is set
+    :return: What the function returned. Generators are collected into a list in the subprocess.
+    """
+    name = getattr(func, '_pggui_name', getattr(func, '__name__', repr(func)))
+    # Functions defined in a script are found by running it as __mp_main__ in the subprocess, as multiprocessing does
+    main_path = getattr(sys.modules['__main__'], '__file__', None)
+    # Pickled here, so anything that can't be sent fails before a process is started
+    payload = pickle.dumps((limits, main_path)) + pickle.dumps((func, kwargs))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    proc = subprocess.Popen([sys.executable, '-m', 'pygenerategui.limits'], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, env=env)
+    timeout = limits.get('timeout')
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = poll_interval if deadline is None else max(0.0, min(poll_interval, deadline - time.monotonic()))
+        try:
+            out, _ = proc.communicate(payload, timeout=wait)
+            break
+        except subprocess.TimeoutExpired:
+            # communicate keeps sending the input in the background, it can only be given once
+            payload = None
+            if cancelled is not None and cancelled.is_set():
+                proc.kill()
+                proc.communicate()
+                raise RuntimeError('Cancelled')
+            if deadline is not None and time.monotonic() >= deadline:
+                proc.kill()
+                proc.communicate()
+                raise LimitExceeded(f'{name} ran past its {timeout}s timeout and was stopped')
+
+    if out:
+        kind, value = pickle.loads(out)
+        if kind == 'result':
+            return value
+        if kind == 'memory':
+            raise LimitExceeded(f'{name} needed more than its max_memory of {_format_bytes(limits["max_memory"])} '
+                                f'and was stopped')
+        raise value
+    # Neither signal exists on Windows, where the limits aren't applied
+    cpu_signals = [-sig for sig in (getattr(signal, 'SIGXCPU', None), getattr(signal, 'SIGKILL', None))
+                   if sig is not None]
+    if limits.get('max_cpu_seconds') is not None and proc.returncode in cpu_signals:
+        raise LimitExceeded(f'{name} used more than its max_cpu_seconds of {limits["max_cpu_seconds"]}s of CPU '
+                            f'time and was stopped')
+    if limits.get('max_memory') is not None:
+        # Ran out of memory somewhere that couldn't report it (e.g. while starting up or in C code)
+        raise LimitExceeded(f'{name} exited (code {proc.returncode}), probably by reaching its max_memory of '
+                            f'{_format_bytes(limits["max_memory"])}')
+    raise RuntimeError(f'{name} exited unexpectedly (exit code {proc.returncode})')
+
+
+def _set_limits(limits: dict):
+    if resource is None:
+        return
+    if limits.get('max_memory') is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (limits['max_memory'], limits['max_memory']))
+    if limits.get('max_cpu_seconds') is not None:
+        # SIGXCPU at the soft limit, SIGKILL a second later if that's ignored
+        seconds = math.ceil(limits['max_cpu_seconds'])
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+
+
+async def _collect(stream) -> list:
+    return [item async for item in stream]
+
+
+def _child_main():
+    # The function's prints (even from C code) go to stderr, stdout is kept for the outcome
+    out = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    stdin = sys.stdin.buffer
+    limits, main_path = pickle.load(stdin)
+    # Limits are set before the function is unpickled, so importing its module is covered by them too
+    _set_limits(limits)
+    try:
+        if main_path is not None:
+            import multiprocessing.spawn
+            multiprocessing.spawn.import_main_path(main_path)
+        func, kwargs = pickle.load(stdin)
+        result = func(**kwargs)
+        if inspect.iscoroutine(result):
+            result = asyncio.run(result)
+        if isinstance(result, collections.abc.AsyncIterator):
+            result = asyncio.run(_collect(result))
+        elif isinstance(result, collections.abc.Iterator) and not hasattr(result, 'read'):
+            result = list(result)
+        outcome = ('result', result)
+    except MemoryError:
+        outcome = ('memory', None)
+    except BaseException as e:
+        outcome = ('error', e)
+    try:
+        data = pickle.dumps(outcome)
+    except MemoryError:
+        data = pickle.dumps(('memory', None))
+    except Exception as e:
+        # The result (or exception) could not be pickled
+        error = outcome[1] if outcome[0] == 'error' else e
+        data = pickle.dumps(('error', RuntimeError(f'{type(error).__name__}: {str(error)}')))
+    out.write(data)
+    out.flush()
+
+
+if __name__ == '__main__':
+    _child_main()
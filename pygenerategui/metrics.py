@@ -0,0 +1,242 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Imported by the executor, so kept to modules that are cheap to import (cProfile and pstats only when profiling)
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import traceback
+from collections import namedtuple
+from dataclasses import asdict, dataclass, field
+
+
+class MeasureOptions(namedtuple('MeasureOptions', 'track_memory profile profile_top')):
+    """What to measure for a call, set on FunctionCall.instrument (travels with the call to worker processes)"""
+    __slots__ = ()
+
+
+# Runs tracing memory at once. tracemalloc is only on while there are any, since it slows down allocation.
+_tracing_runs = 0
+_started_tracing = False
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing() -> bool:
+    """:return: True if other runs are already being traced, so the peak is shared with them"""
+    global _tracing_runs, _started_tracing
+    with _tracing_lock:
+        shared = _tracing_runs > 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        elif not shared:
+            tracemalloc.reset_peak()
+        _tracing_runs += 1
+        return shared
+
+
+def _stop_tracing():
+    global _tracing_runs, _started_tracing
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _started_tracing:
+            # Left on if something else started it
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _profile_summary(profiler, top: int) -> tuple:
+    """:return: (top functions by cumulative time as text, path of the full pstats dump or None)"""
+    import pstats
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(top)
+    try:
+        fd, path = tempfile.mkstemp(prefix='pggui-profile-', suffix='.prof')
+        os.close(fd)
+        stats.dump_stats(path)
+    except OSError:
+        path = None
+    # Drop pstats' header lines, down to the table
+    text = out.getvalue()
+    start = text.find('   ncalls')
+    return (text[start:] if start >= 0 else text).rstrip(), path
+
+
+@contextlib.contextmanager
+def measure(call, on_event_loop: bool = False):
+    """
+    Measure running a call (and its nested calls), storing the numbers in call.info['metrics']:
+    wall_s, cpu_s (CPU time of the threads running the call's functions), and if the call's instrument options ask
+    for them peak_memory (bytes allocated at the peak, above what was allocated at the start) and profile /
+    profile_path (a cProfile summary of the thread running the call, and the full pstats dump)
+    :param call: The FunctionCall
+    :param on_event_loop: The call is a task on the shared event loop thread, so its CPU time and profile can't
+                          be told apart from other tasks'
+    """
+    options = getattr(call, 'instrument', None) or MeasureOptions(False, False, 0)
+    metrics = {}
+    baseline = None
+    if options.track_memory:
+        metrics['memory_shared'] = _start_tracing()
+        baseline = tracemalloc.get_traced_memory()[0]
+    profiler = None
+    if options.profile:
+        if on_event_loop:
+            metrics['profile'] = 'Not available for async functions, which share the event loop thread'
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Another profiler is active (3.12+ allows only one at a time)
+                metrics['profile'] = f'Not available: {str(e)}'
+                profiler = None
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics['wall_s'] = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            metrics['profile'], metrics['profile_path'] = _profile_summary(profiler, options.profile_top)
+        if baseline is not None:
+            metrics['peak_memory'] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+            _stop_tracing()
+        if not on_event_loop:
+            metrics['cpu_s'] = sum(c.info.get('cpu', 0.0) for c in call.walk() if not c.info.get('deduplicated'))
+        call.info['metrics'] = metrics
+
+
+def _format_bytes(n: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f'{n:.0f} {unit}' if unit == 'B' else f'{n:.1f} {unit}'
+        n /= 1024
+
+
+@dataclass
+class RunMetrics:
+    """The numbers for one run"""
+    function: str
+    status: str
+    finished_at: float
+    error: str = None
+    wall_s: float = None
+    cpu_s: float = None
+    # Reading and converting the args from the form, on the Tk thread
+    convert_s: float = None
+    peak_memory: int = None
+    memory_shared: bool = None
+    profile_path: str = None
+    # Not logged, see profile_path for the full stats
+    profile: str = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        record = asdict(self)
+        record.pop('profile')
+        return record
+
+    def summary(self) -> str:
+        """A few lines for the result panel"""
+        parts = []
+        if self.wall_s is not None:
+            parts.append(f'ran in {self.wall_s:.3f}s')
+        if self.cpu_s is not None:
+            parts.append(f'CPU {self.cpu_s:.3f}s')
+        if self.convert_s is not None:
+            parts.append(f'args read in {self.convert_s * 1000:.1f}ms')
+        if self.peak_memory is not None:
+            shared = ' (shared with other runs)' if self.memory_shared else ''
+            parts.append(f'peak memory {_format_bytes(self.peak_memory)}{shared}')
+        text = f'Metrics: {", ".join(parts)}' if parts else ''
+        if self.profile is not None:
+            text += f'\n\nProfile (top functions by cumulative time):\n{self.profile}'
+            if self.profile_path is not None:
+                text += f'\n\nFull profile: {self.profile_path} (open with pstats or snakeviz)'
+        return text
+
+
+class Instrumentation:
+    """
+    Measures each run, appends the numbers to a jsonl log and passes them to hooks (e.g. to forward them to a
+    metrics collector)
+    :param log_path: jsonl file to append a line per run to. Not logged if none supplied.
+    :param track_memory: Record each run's peak memory with tracemalloc. Off by default: it slows down
+                         allocation-heavy functions while they run (tracing is off between runs).
+    :param profile_top: Functions listed in the summary of a profiled run
+    """
+    def __init__(self, log_path: str = None, track_memory: bool = False, profile_top: int = 15):
+        self.log_path = log_path
+        self.track_memory = track_memory
+        self.profile_top = profile_top
+        self.hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, fn):
+        """Call fn(metrics: RunMetrics) after every run, on the Tk thread - hand slow work off to a thread"""
+        self.hooks.append(fn)
+
+    def remove_hook(self, fn):
+        self.hooks.remove(fn)
+
+    def prepare(self, call, convert_s: float = None, profile: bool = False):
+        """
+        Set what to measure on a call about to be submitted
+        :param convert_s: Seconds it took to read the call's args
+        :param profile: Profile the run with cProfile
+        """
+        call.instrument = MeasureOptions(self.track_memory, profile, self.profile_top)
+        if convert_s is not None:
+            call.info['convert_s'] = convert_s
+
+    def record(self, job) -> RunMetrics:
+        """
+        Collect the metrics of a finished job, log them and run the hooks
+        :param job: The finished Job
+        """
+        info = job.call.info
+        measured = info.get('metrics', {})
+        metrics = RunMetrics(function=job.call.name, status=job.status.value, finished_at=time.time(),
+                             error=None if job.error is None else f'{type(job.error).__name__}: {str(job.error)}',
+                             wall_s=measured.get('wall_s'), cpu_s=measured.get('cpu_s'),
+                             convert_s=info.get('convert_s'), peak_memory=measured.get('peak_memory'),
+                             memory_shared=measured.get('memory_shared'), profile_path=measured.get('profile_path'),
+                             profile=measured.get('profile'))
+        if self.log_path is not None:
+            with self._lock:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(metrics.to_dict(), default=str) + '\n')
+        for hook in list(self.hooks):
+            try:
+                hook(metrics)
+            except Exception:
+                # A broken collector shouldn't break the app
+                traceback.print_exc()
+        return metrics
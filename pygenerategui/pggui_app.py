@@ -1,28 +1,23 @@
 import tkinter as tk
 from tkinter import ttk
-import inspect
+import queue
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from typing import Union, get_args, get_origin
 from enum import EnumMeta, Enum, IntEnum, Flag, IntFlag
 
 import pygenerategui.gui_component as gui
-
-
-def pggui(name = None, **kwargs):
-    """
-    Add _pggui_name to a routine so it will be identified as a pggui function
-    :param name: The name it should appear as in the function list. Will use func name if none supplied.
-    :param kwargs: Overrides for function params - dict, list, tuple, enum, or callable
-    """
-    if inspect.isroutine(name):
-        return pggui()(name)
-    def decorator(func):
-        for kwarg in kwargs:
-            kwarg_name = f'_pggui_{kwarg}'
-            kwarg_value = kwargs[kwarg]
-            setattr(func, kwarg_name, kwarg_value)
-        func._pggui_name = func.__name__ if name is None else name
-        return func
-    return decorator
+from pygenerategui.executor import JobStatus, ThreadExecutor
+from pygenerategui.function_spec import clear_spec_cache, enable_spec_disk_cache
+from pygenerategui import hot_reload, registry
+from pygenerategui.decorator import pggui
+from pygenerategui.lazy import LazyComponent, LazyFunction, ManifestCache
+from pygenerategui.metrics import Instrumentation
+from pygenerategui.progress import Progress
+from pygenerategui.render import as_table, preview_text
+from pygenerategui.result_store import ResultStore
 
 
 class PGGUI_App(ttk.Frame):
@@ -31,63 +26,133 @@ class PGGUI_App(ttk.Frame):
     Layout is:
     - Header: Combobox with available functions
     - Function GUI
-    - Footer: Run + Quit buttons
+    - Footer: Run + Cancel + Quit buttons, job status, result
+    Functions are run on an executor (ThreadExecutor unless one is given) so the gui stays responsive
     """
-    def __init__(self, components: list, title: str = 'PGGUI App'):
+    # How often (ms) a running job is checked for completion
+    poll_interval = 50
+    # Max time (s) spent handling a job's events per poll, so a busy stream can't starve the Tk loop
+    event_budget = 0.015
+    # Least time (ms) between redraws of the progress bar, however often the function reports progress
+    progress_interval = 100
+
+    def __init__(self, components: list, title: str = 'PGGUI App', executor=None, form_cache_size: int = 16,
+                 spec_cache_path: str = None, discovery: str = 'registry', manifest_path: str = None,
+                 stream_max_lines: int = 10000, stream_max_bytes: int = 10_000_000, stream_capture: bool = False,
+                 result_store: ResultStore = None, metrics_log_path: str = None, track_memory: bool = False,
+                 reload_interval: float = None):
+        """
+        :param components: Modules, classes, or class instances to load pggui functions from.
+                           'package.module' or 'package.module:Class' strings are imported in the background after
+                           the window is up, or when one of their functions is selected.
+        :param title: Window title
+        :param executor: Where functions are run. ThreadExecutor() if none supplied.
+        :param form_cache_size: How many built function guis to keep (hidden) for when they are selected again
+        :param spec_cache_path: File to persist parsed docstrings to, so they aren't re-parsed on the next start
+        :param discovery: 'registry' to look up functions recorded by @pggui, or 'scan' to inspect every member of
+                          each component
+        :param manifest_path: File to save the function lists of string components to, so they can be listed on the
+                              next start without parsing their source
+        :param stream_max_lines: Most lines of a generator/iterator result to keep on screen
+        :param stream_max_bytes: Most bytes (utf-8) of a generator/iterator result to keep on screen
+        :param stream_capture: Also write every item of a generator/iterator result to a temp file
+        :param result_store: Where results are kept so they can be passed into other functions as $key.
+                             A ResultStore() (256 MB in memory, the rest spilled to disk) if none supplied.
+        :param metrics_log_path: jsonl file to append each run's metrics (times, peak memory...) to
+        :param track_memory: Also record each run's peak memory with tracemalloc, which slows allocation while it runs.
+                             Off by default, so runs only pay for the (cheap) wall and CPU timings.
+        :param reload_interval: Seconds between checks of the components' source files. Modules that changed are
+                                reloaded and their functions swapped in without a restart. Off if none supplied.
+        """
+        self.spec_cache = None if spec_cache_path is None else enable_spec_disk_cache(spec_cache_path)
         root = tk.Tk()
         root.title(title)
         super().__init__(root)
+        self.executor = ThreadExecutor() if executor is None else executor
+        self.form_cache_size = max(1, form_cache_size)
+        # func -> FunctionGUI, least recently shown first
+        self.fgui_cache = OrderedDict()
+        self.fgui = None
+        assert discovery in ('registry', 'scan'), f'Unknown discovery mode: {discovery}'
+        self.discovery = discovery
+        self.job = None
+        self.stream_job = None
+        self.result_store = ResultStore() if result_store is None else result_store
+        # Each run is measured; add hooks to self.instrumentation to forward the metrics elsewhere
+        self.instrumentation = Instrumentation(metrics_log_path, track_memory)
+        self.stream_options = dict(max_lines=stream_max_lines, max_bytes=stream_max_bytes)
+        self.stream_capture = stream_capture
+        self.manifest = ManifestCache(manifest_path)
+        self.pending_function = None
+        self.reload_interval = reload_interval
+        self.watcher = None if reload_interval is None else hot_reload.ModuleWatcher()
+        # One list of functions per component, LazyFunctions until the component is imported
+        self.components = []
+        self.component_functions = []
+        for component in components:
+            if isinstance(component, str):
+                component = LazyComponent(component, self.manifest)
+            self.components.append(component)
+            if isinstance(component, LazyComponent):
+                self.component_functions.append(component.functions())
+            else:
+                self.component_functions.append(self.load_funcs(component))
         self.pggui_functions = {}
-        function_list = []
-        for components in components:
-            function_list += self.load_funcs(components)
-        for func in function_list:
-            self.pggui_functions[func._pggui_name] = func
+        self.update_function_list()
         self.grid(row=0, column=0)
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
         self.init_gui()
+        self.after_idle(self.prewarm)
+        if self.watcher is not None:
+            self.after(int(self.reload_interval * 1000), self.poll_reload)
 
     def load_funcs(self, component):
         """
-        Modeled loosely off of robotlibcore's add_library_components
         :param component: A module, class, or an instance of a class, containing routines to be potentially turned into GUIs
         :return: A list containing any functions which are flagged to be turned into a GUI
         """
-        pggui_funcs = []
-
-        def _get_members(c):
-            if not inspect.isclass(c):
-                result = [m[1] for m in inspect.getmembers(c) if inspect.isroutine(m[1])]
-                return result
-            else:
-                members = []
-                im = dict(inspect.getmembers(c))
-                for m in im:
-                    if inspect.isroutine(im[m]):
-                        # Only returns True on bound methods
-                        if inspect.ismethod(im[m]):
-                            members.append(im[m])
-                        elif m in c.__dict__ and type(c.__dict__[m]) is staticmethod:
-                            members.append(im[m])
-                return members
-
-        for member in _get_members(component):
-            if hasattr(member, '_pggui_name'):
-                pggui_funcs.append(member)
-        return pggui_funcs
+        if self.discovery == 'scan':
+            return registry.scan_functions(component)
+        return registry.find_functions(component)
 
     def init_gui(self):
         # Header
-        self.header = gui.ComboBoxBlock(self, entry_description='Select A Function To Run', source=self.pggui_functions,
-                                        on_select=self.combobox_selection_changed)
+        self.header = gui.FunctionPicker(self, entry_description='Select A Function To Run (type to search)',
+                                         source=self.pggui_functions, on_select=self.combobox_selection_changed)
         self.header.place(row=1, sticky='sw')
         # Run Button
         self.btn_run = ttk.Button(self, text='RUN', command=self.run_function)
         self.btn_run.grid(row=1, column=4, sticky='se')
+        # Cancel Button
+        self.btn_cancel = ttk.Button(self, text='CANCEL', command=self.cancel_function)
+        self.btn_cancel.grid(row=1, column=5, sticky='se')
+        self.btn_cancel.state(['disabled'])
+        # Batch Button
+        self.btn_batch = ttk.Button(self, text='BATCH', command=self.open_batch)
+        self.btn_batch.grid(row=1, column=6, sticky='se')
         # Quit Button
-        self.quit = ttk.Button(self, text="QUIT", command=self.master.destroy)
-        self.quit.grid(row=1, column=5, sticky='se')
+        self.quit = ttk.Button(self, text="QUIT", command=self.close)
+        self.quit.grid(row=1, column=7, sticky='se')
+        # Cache Bypass (only matters for functions decorated with cache=True)
+        self.bypass_cache = tk.BooleanVar()
+        self.chk_bypass_cache = ttk.Checkbutton(self, text='Bypass cache', variable=self.bypass_cache)
+        self.chk_bypass_cache.grid(row=2, column=4, columnspan=4, sticky='se')
+        # Profile the next run with cProfile, adding the hottest functions to the result
+        self.profile_run = tk.BooleanVar()
+        self.chk_profile_run = ttk.Checkbutton(self, text='Profile run', variable=self.profile_run)
+        self.chk_profile_run.grid(row=3, column=4, columnspan=4, sticky='se')
+        self.master.protocol('WM_DELETE_WINDOW', self.close)
+
+        # Job Status
+        self.lbl_status = ttk.Label(self, text='', anchor='nw')
+        self.lbl_status.grid(row=996, column=0, columnspan=999, padx=5, sticky='w')
+
+        # Progress of functions with a Progress param, only shown once they report some
+        self.progress_bar = ttk.Progressbar(self, orient='horizontal', length=450, maximum=1.0)
+        self.lbl_progress = ttk.Label(self, text='', anchor='nw', wraplength=600)
+        self.progress_shown = None
+        self.progress_drawn = 0.0
 
         # Function GUI
         self.function_canvas_frame = ttk.Frame(self)
@@ -107,14 +172,12 @@ class PGGUI_App(ttk.Frame):
         self.function_frame = ttk.Frame(self.function_canvas)
         self.function_frame.grid_rowconfigure(0, weight=1)
         self.function_frame.grid_columnconfigure(0, weight=1)
-        self.fgui = gui.FunctionGUI.build_function_gui(self.function_frame, self.header.get_value())
-        self.fgui.place()
+        # Scrollregion follows the frame's size whenever a different function gui is shown
+        self.function_frame.bind('<Configure>', self.update_scrollregion)
+        self.show_function_gui(self.header.get_value())
         self.function_canvas.create_window((0, 0), window=self.function_frame, anchor='nw', tags='self.frame')
 
         self.function_canvas_frame.configure(height=400, width=600)
-        self.fgui.update()
-        bbox = self.fgui.frame.bbox(1000, 1000)
-        self.function_canvas.configure(scrollregion=(0, 0, bbox[0], bbox[1] + 10))
 
         # Footer
         # Result Display:
@@ -124,21 +187,304 @@ class PGGUI_App(ttk.Frame):
 
 
     def combobox_selection_changed(self, value):
-        self.fgui.remove()
-        self.fgui = gui.FunctionGUI.build_function_gui(self.function_frame, value)
-        # self.btn_run['command'] = self.fgui.run_function
+        self.show_function_gui(value)
+
+    def show_function_gui(self, func):
+        """
+        Show the gui for func, reusing a cached one (with whatever the user entered) if available
+        :param func: The pggui function to show. A LazyFunction is shown once its component is imported.
+        """
+        if self.fgui is not None:
+            self.fgui.hide()
+            self.fgui = None
+        self.pending_function = None
+        if isinstance(func, LazyFunction):
+            if not func.component.loaded:
+                func.component.load_async()
+                self.pending_function = func
+                self.lbl_status['text'] = f'Loading {func.component.path}...'
+                self.after(self.poll_interval, self.show_when_loaded, func)
+                return
+            try:
+                func = func.resolve()
+            except Exception as e:
+                self.show_result(None, f'ERROR: Could not load {func.component.path}: {str(e)}')
+                return
+        if func in self.fgui_cache:
+            self.fgui_cache.move_to_end(func)
+            self.fgui = self.fgui_cache[func]
+        else:
+            self.fgui = gui.FunctionGUI.build_function_gui(self.function_frame, func, self.result_store)
+            self.fgui_cache[func] = self.fgui
+            while len(self.fgui_cache) > self.form_cache_size:
+                _, evicted = self.fgui_cache.popitem(last=False)
+                evicted.remove()
         self.fgui.place()
-        self.fgui.update()
-        bbox = self.fgui.frame.bbox(1000, 1000)
-        self.function_canvas.configure(scrollregion=(0,0,bbox[0],bbox[1] + 10))
+        self.function_canvas.yview_moveto(0)
+
+    def show_when_loaded(self, func: LazyFunction):
+        if func is not self.pending_function:
+            # Something else was selected in the meantime
+            return
+        if not func.component.loaded:
+            self.after(self.poll_interval, self.show_when_loaded, func)
+            return
+        self.lbl_status['text'] = ''
+        self.show_function_gui(func)
+
+    def prewarm(self):
+        """Import string components one at a time on a background thread, then swap in their real functions"""
+        lazy = [c for c in self.components if isinstance(c, LazyComponent)]
+        if not lazy:
+            return
+
+        def _load_all():
+            for component in lazy:
+                # Through load_async, so a selection made meanwhile (on the Tk thread) never waits on this import
+                component.load_async()
+                component.wait()
+        threading.Thread(target=_load_all, name='pggui-prewarm', daemon=True).start()
+        self.after(self.poll_interval, self.poll_lazy_components)
+
+    def poll_lazy_components(self):
+        waiting = False
+        for i, component in enumerate(self.components):
+            if not isinstance(component, LazyComponent) or component.error is not None:
+                continue
+            if component.obj is None:
+                waiting = True
+            elif any(isinstance(f, LazyFunction) for f in self.component_functions[i]):
+                self.component_functions[i] = component.update_manifest(self.load_funcs(component.obj))
+                self.update_function_list()
+        if waiting:
+            self.after(self.poll_interval * 4, self.poll_lazy_components)
+        else:
+            self.manifest.save()
+
+    def poll_reload(self):
+        """Runs on the Tk thread via after(): reload the component modules whose source changed since the last check"""
+        for component in self.components:
+            # String components are watched once they're imported
+            self.watcher.watch(hot_reload.component_modules(component))
+        changed = self.watcher.changed()
+        if changed:
+            self.reload_modules(changed)
+        self.after(int(self.reload_interval * 1000), self.poll_reload)
+
+    def reload_modules(self, modules: list):
+        """
+        Reload modules and refresh only what came from them: the function lists of their components, their parsed
+        specs, and their cached guis. The shown function stays selected, keeping what was entered if its signature
+        didn't change.
+        :param modules: Names of the modules to reload
+        """
+        errors = hot_reload.reload_modules(modules)
+        reloaded = set(modules) - set(errors)
+        if reloaded:
+            shown = self.fgui
+            entries = None
+            if shown is not None and hot_reload.function_module(shown.func) in reloaded:
+                entries = shown.get_entries()
+            for i, component in enumerate(self.components):
+                if not reloaded.intersection(hot_reload.component_modules(component)):
+                    continue
+                for func in self.component_functions[i]:
+                    if not isinstance(func, LazyFunction):
+                        clear_spec_cache(func)
+                component = self.components[i] = hot_reload.rebind_component(component)
+                if isinstance(component, LazyComponent):
+                    self.component_functions[i] = component.update_manifest(self.load_funcs(component.obj))
+                else:
+                    self.component_functions[i] = self.load_funcs(component)
+            for func in [f for f in self.fgui_cache if hot_reload.function_module(f) in reloaded]:
+                clear_spec_cache(func)
+                self.fgui_cache.pop(func).remove()
+            self.update_function_list()
+            if entries is not None:
+                self.fgui = None
+                self.show_function_gui(self.header.get_value())
+                if self.fgui is not None:
+                    self.fgui.set_entries(entries)
+            self.lbl_status['text'] = f'Reloaded {", ".join(sorted(reloaded))}'
+        if errors:
+            self.show_result(None, '\n'.join(f'ERROR: Could not reload {name}: {type(e).__name__}: {str(e)}'
+                                             for name, e in errors.items()))
+
+    def update_function_list(self):
+        """Rebuild pggui_functions (in place, it's also the header's source) from component_functions"""
+        self.pggui_functions.clear()
+        for funcs in self.component_functions:
+            for func in funcs:
+                self.pggui_functions[func._pggui_name] = func
+        if hasattr(self, 'header'):
+            self.header.set_source(self.pggui_functions)
+
+    def update_scrollregion(self, e):
+        self.function_canvas.configure(scrollregion=(0, 0, e.width, e.height + 10))
 
     def run_function(self):
+        if self.fgui is None:
+            return
+        start = time.perf_counter()
         try:
-            result = self.fgui.run_function()
+            call = self.fgui.get_call()
         except Exception as e:
-            result =  None, f'ERROR: {str(e)}'
-        result_gui = gui.ReturnLabelBlock(self.result_frame, result[1], result[0])
+            self.show_result(None, f'ERROR: {str(e)}')
+            return
+        self.instrumentation.prepare(call, time.perf_counter() - start, self.profile_run.get())
+        for c in call.walk():
+            c.use_cache = not self.bypass_cache.get()
+        if self.stream_capture:
+            call.capture = tempfile.gettempdir()
+        self.job = self.executor.submit(call)
+        self.hide_progress()
+        self.btn_cancel.state(['!disabled'])
+        self.poll_job(self.job, self.fgui)
+
+    def poll_job(self, job, fgui):
+        """
+        Runs on the Tk thread via after() until the job finishes, then shows its result
+        :param job: The Job to check
+        :param fgui: The FunctionGUI the job was started from
+        """
+        if job is not self.job:
+            # Superseded by a newer run, its result is no longer wanted
+            return
+        self.handle_events(job, fgui)
+        self.lbl_status['text'] = f'Status: {job.status.value}'
+        if not job.done or (job.status is not JobStatus.CANCELLED and not job.events.empty()):
+            self.show_progress(job)
+            self.after(self.poll_interval, self.poll_job, job, fgui)
+            return
+        self.show_progress(job, final=True)
+        self.btn_cancel.state(['disabled'])
+        metrics = self.instrumentation.record(job).summary()
+        stream = self.rgui if self.stream_job is job else None
+        if job.status is JobStatus.DONE:
+            if stream is not None:
+                stream.finish(f'Stream finished: {job.result} items', metrics)
+            else:
+                return_text = fgui.describe_result(job.result)
+                if job.result is not None:
+                    key = self.result_store.put(job.result, label=fgui.func.__name__)
+                    return_text += f'\n\nStored as ${key} - enter ${key} for an arg to pass it to another function'
+                if job.call.info.get('cached'):
+                    return_text += '\n\n(Cached result - check Bypass cache to run again)'
+                timing = job.call.timing_report()
+                if timing:
+                    return_text += f'\n\nTiming:\n{timing}'
+                if metrics:
+                    return_text += f'\n\n{metrics}'
+                self.show_result(job.result, return_text)
+        elif job.status is JobStatus.FAILED:
+            if stream is not None:
+                stream.finish(f'ERROR: {str(job.error)}', metrics)
+            elif job.progress.partials:
+                self.show_result(job.progress.partial_result,
+                                 f'ERROR: {str(job.error)}\n\nShowing the last partial result'
+                                 + (f'\n\n{metrics}' if metrics else ''))
+            else:
+                self.show_result(None, f'ERROR: {str(job.error)}' + (f'\n\n{metrics}' if metrics else ''))
+        elif stream is not None:
+            stream.finish('Cancelled')
+        elif job.progress.partials:
+            self.show_result(job.progress.partial_result, 'Cancelled\n\nShowing the last partial result')
+
+    def show_progress(self, job, final: bool = False):
+        """
+        Draw what the job's function reported through its Progress param. Called on every poll, but only redraws when
+        something changed and progress_interval has passed, so reporting in a tight loop costs the Tk thread nothing.
+        :param final: The job is done - draw its last state regardless of when the last redraw was
+        """
+        now = time.monotonic()
+        if not final and (now - self.progress_drawn) * 1000 < self.progress_interval:
+            return
+        progress = job.progress
+        snapshot = progress.snapshot()
+        if snapshot == self.progress_shown:
+            return
+        self.progress_shown = snapshot
+        self.progress_drawn = now
+        fraction = progress.fraction
+        if fraction is None:
+            # No total to measure against, so the bar just shows the function is still going
+            self.progress_bar.configure(mode='indeterminate')
+            if final:
+                self.progress_bar.stop()
+            else:
+                self.progress_bar.step(0.05)
+            text = f'{progress.done:g} done'
+        else:
+            self.progress_bar.configure(mode='determinate', value=fraction)
+            text = f'{progress.done:g} of {progress.total:g} ({fraction:.0%})'
+        if progress.status:
+            text += f' - {progress.status}'
+        if progress.partials:
+            text += f'\nPartial result: {preview_text(progress.partial_result, 200)[0]}'
+        self.lbl_progress['text'] = text
+        self.progress_bar.grid(row=994, column=0, columnspan=999, padx=5, sticky='w')
+        self.lbl_progress.grid(row=995, column=0, columnspan=999, padx=5, sticky='w')
+
+    def hide_progress(self):
+        self.progress_bar.grid_remove()
+        self.lbl_progress.grid_remove()
+        self.progress_bar.configure(mode='determinate', value=0)
+        # Nothing reported yet, so nothing to draw
+        self.progress_shown = Progress().snapshot()
+        self.progress_drawn = 0.0
+
+    def handle_events(self, job, fgui):
+        """Handle what the job emitted since the last poll, for at most event_budget seconds"""
+        deadline = time.monotonic() + self.event_budget
+        while time.monotonic() < deadline:
+            try:
+                kind, payload = job.events.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'stream':
+                description = fgui.describe_result(None, f"<class '{payload}'> (streamed)")
+                self.set_result_gui(gui.StreamResultBlock(self.result_frame, description, **self.stream_options))
+                self.stream_job = job
+            elif kind == 'capture' and self.stream_job is job:
+                self.rgui.capture_path = payload
+            elif kind == 'items' and self.stream_job is job:
+                self.rgui.append(*job.take_items())
+
+    def show_result(self, result, return_text: str):
+        table = as_table(result)
+        if table is not None:
+            self.set_result_gui(gui.TableResultBlock(self.result_frame, return_text, result, table))
+        else:
+            self.set_result_gui(gui.ReturnLabelBlock(self.result_frame, return_text, result))
+
+    def set_result_gui(self, result_gui):
         if self.rgui is not None:
             self.rgui.remove()
+        self.stream_job = None
         self.rgui = result_gui
         self.rgui.place()
+
+    def open_batch(self):
+        """Open a batch window for the shown function, with its current form values as the defaults for each row"""
+        if self.fgui is None:
+            return
+        try:
+            call = self.fgui.get_call()
+        except Exception as e:
+            self.show_result(None, f'ERROR: {str(e)}')
+            return
+        for c in call.walk():
+            c.use_cache = not self.bypass_cache.get()
+        gui.BatchDialog(self, call, f'Batch: {self.fgui.func._pggui_name}')
+
+    def cancel_function(self):
+        if self.job is not None and self.job.cancel():
+            self.lbl_status['text'] = f'Status: {self.job.status.value}'
+        self.btn_cancel.state(['disabled'])
+
+    def close(self):
+        self.executor.shutdown()
+        if self.spec_cache is not None:
+            self.spec_cache.save()
+        self.manifest.save()
+        self.master.destroy()
@@ -0,0 +1,178 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Imported by the executor and forms, so kept free of tkinter
+import threading
+
+
+class Progress:
+    """
+    How far along a running function is. Annotate a param with Progress to get one when the function runs - the
+    param is left out of forms, command line options and the web api.
+    Reporting only sets attributes, so it's cheap enough to call for every item of a tight loop. Updates are
+    coalesced: whoever shows the progress (e.g. PGGUI_App's progress bar) reads the latest state at its own pace.
+
+        @pggui
+        def process(path: str, progress: Progress):
+            rows = load(path)
+            progress.update(total=len(rows), status='Processing')
+            for row in rows:
+                handle(row)
+                progress.advance()
+    """
+    def __init__(self):
+        self.done = 0
+        self.total = None
+        self.status = ''
+        # The latest partial result, shown while the run goes on (and kept if it fails or is cancelled)
+        self.partial_result = None
+        # How many partial results were reported
+        self.partials = 0
+
+    def update(self, done: float = None, total: float = None, status: str = None):
+        """
+        :param done: Units of work done so far
+        :param total: Units of work in all, if known
+        :param status: Text describing what's happening now
+        """
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if status is not None:
+            self.status = status
+
+    def advance(self, n: float = 1):
+        """Count n more units of work done (from the function's own thread)"""
+        self.done += n
+
+    def partial(self, result):
+        """Report the result so far. Only the latest is kept."""
+        self.partial_result = result
+        self.partials += 1
+
+    @property
+    def fraction(self) -> float:
+        """Done out of total, between 0 and 1. None while the total isn't known."""
+        if not self.total:
+            return None
+        return min(max(self.done / self.total, 0.0), 1.0)
+
+    def snapshot(self) -> tuple:
+        """(done, total, status, partials), which changes whenever there's something new to show"""
+        return self.done, self.total, self.status, self.partials
+
+    def state(self) -> dict:
+        state = {'done': self.done, 'total': self.total, 'status': self.status}
+        if self.partials:
+            state['partial_result'] = self.partial_result
+        return state
+
+    def set_state(self, state: dict):
+        """Take on a state() sent from another process"""
+        self.update(state['done'], state['total'], state['status'])
+        if 'partial_result' in state:
+            self.partial(state['partial_result'])
+
+
+class ProgressRelay:
+    """
+    Sends a Progress's state on from a worker process while its function runs, at most once per interval and
+    only when it changed, so a function reporting millions of ticks sends a few messages a second
+    :param progress: What the function reports to
+    :param emit: f('progress', state)
+    :param interval: Seconds between checks
+    """
+    interval = 0.1
+
+    def __init__(self, progress: Progress, emit, interval: float = None):
+        self.progress = progress
+        self.emit = emit
+        if interval is not None:
+            self.interval = interval
+        self._last = self.progress.snapshot()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='pggui-progress', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        # The final state, so nothing reported after the last check is lost
+        self.send()
+
+    def send(self):
+        snapshot = self.progress.snapshot()
+        if snapshot != self._last:
+            self._last = snapshot
+            state = self.progress.state()
+            try:
+                self.emit('progress', state)
+            except Exception:
+                # e.g. a partial result that can't be pickled - the rest of the state still gets through
+                state.pop('partial_result', None)
+                self.emit('progress', state)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.send()
+
+
+# Underlying function -> names of its Progress params
+_progress_params = {}
+
+
+def _is_progress(anno) -> bool:
+    # Quoted annotations (or any under `from __future__ import annotations`) are left as strings
+    return anno is Progress or (isinstance(anno, str) and anno in ('Progress', 'pygenerategui.Progress'))
+
+
+def is_progress_param(arg_info) -> bool:
+    """Whether an arg (an ArgInfo) is a Progress param, filled in when the function runs rather than given"""
+    return _is_progress(arg_info.data_type)
+
+
+def _find_progress_params(func) -> tuple:
+    annotations = getattr(getattr(func, '__func__', func), '__annotations__', None) or {}
+    return tuple(arg for arg, anno in annotations.items() if arg != 'return' and _is_progress(anno))
+
+
+def progress_params(func) -> tuple:
+    """
+    Names of func's params annotated with Progress, which are filled in when it runs rather than given by the user
+    Looked up once per function, so it costs next to nothing on every run.
+    """
+    target = getattr(func, '__func__', func)
+    try:
+        return _progress_params[target]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable callable, can't be memoized
+        return _find_progress_params(func)
+    params = _progress_params[target] = _find_progress_params(func)
+    return params
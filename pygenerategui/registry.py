@@ -0,0 +1,170 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Imported by the decorator, so kept to modules that are cheap to import (no inspect, typing, or dataclasses)
+import threading
+import types
+from collections import namedtuple
+
+
+class RegistryEntry(namedtuple('RegistryEntry', 'func name qualname module owner')):
+    """
+    A function recorded by @pggui as it was decorated
+    name is the attribute it's defined under, owner the qualname of the class it's defined in (None at module level)
+    """
+    __slots__ = ()
+
+
+# module name -> owner qualname (None for module level) -> attribute name -> entry
+_registry = {}
+_lock = threading.Lock()
+
+
+def register(func):
+    """
+    Record a decorated function so load_funcs can find it without scanning its component
+    :param func: The function being decorated. staticmethod/classmethod objects are unwrapped.
+    """
+    target = getattr(func, '__func__', func)
+    qualname = getattr(target, '__qualname__', None)
+    module = getattr(target, '__module__', None)
+    if qualname is None or module is None or '<locals>' in qualname:
+        # Not reachable from its module, only a scan could find it
+        return
+    owner, _, name = qualname.rpartition('.')
+    entry = RegistryEntry(func=target, name=name, qualname=qualname, module=module, owner=owner or None)
+    with _lock:
+        # Replaces the old entry when a module is reloaded
+        _registry.setdefault(module, {}).setdefault(entry.owner, {})[name] = entry
+
+
+def registered_entries(module: str, owner: str = None) -> list:
+    with _lock:
+        return list(_registry.get(module, {}).get(owner, {}).values())
+
+
+def unregister_module(module: str) -> dict:
+    """:return: What was recorded for the module, which restore_module can put back"""
+    with _lock:
+        return _registry.pop(module, {})
+
+
+def restore_module(module: str, entries: dict):
+    """Put back what unregister_module removed, e.g. when a reload of the module failed"""
+    with _lock:
+        _registry[module] = entries
+
+
+def _unwrap(raw):
+    if isinstance(raw, (staticmethod, classmethod)):
+        return raw.__func__
+    return raw
+
+
+def _unregistered(namespace: dict, registered) -> bool:
+    """
+    Whether namespace holds a pggui function the registry didn't account for, e.g. one imported from another module
+    (a package re-exporting its submodules) or wrapped by another (functools.wraps) decorator after @pggui
+    """
+    for attr, raw in namespace.items():
+        func = _unwrap(raw)
+        if attr not in registered and callable(func) and hasattr(func, '_pggui_name'):
+            return True
+    return False
+
+
+def find_functions(component) -> list:
+    """
+    Look up the @pggui functions in a component from the registry, without evaluating properties or anything else
+    scan_functions would. Same results as scan_functions: components holding pggui functions the registry doesn't
+    account for (imported from another module, or wrapped by another decorator) are scanned instead.
+    :param component: A module, class, or an instance of a class
+    :return: A list containing any functions which are flagged to be turned into a GUI, sorted by attribute name
+    """
+    found = {}
+    if isinstance(component, types.ModuleType):
+        namespace = vars(component)
+        for entry in registered_entries(component.__name__):
+            if _unwrap(namespace.get(entry.name)) is entry.func:
+                found[entry.name] = namespace[entry.name]
+            elif entry.name in namespace:
+                # Replaced or wrapped after it was decorated
+                return scan_functions(component)
+        if _unregistered(namespace, found):
+            return scan_functions(component)
+    else:
+        cls = component if isinstance(component, type) else type(component)
+        for klass in cls.__mro__:
+            entries = registered_entries(klass.__module__, klass.__qualname__)
+            if klass is not object and _unregistered(klass.__dict__, {e.name for e in entries}):
+                return scan_functions(component)
+            for entry in entries:
+                if entry.name in found:
+                    continue
+                # The attribute is resolved from the first class in the mro that defines it
+                defining = next((k for k in cls.__mro__ if entry.name in k.__dict__), None)
+                if defining is not klass:
+                    continue
+                raw = klass.__dict__[entry.name]
+                if _unwrap(raw) is not entry.func:
+                    # Replaced or wrapped after it was decorated
+                    return scan_functions(component)
+                if isinstance(component, type):
+                    # Classes only expose static methods defined on the class itself and class methods
+                    if isinstance(raw, classmethod) or (isinstance(raw, staticmethod) and klass is cls):
+                        found[entry.name] = getattr(component, entry.name)
+                else:
+                    found[entry.name] = getattr(component, entry.name)
+    return [found[name] for name in sorted(found) if hasattr(found[name], '_pggui_name')]
+
+
+def scan_functions(component) -> list:
+    """
+    Modeled loosely off of robotlibcore's add_library_components
+    Inspects every member of the component - slower, but also finds functions the registry can't
+    :param component: A module, class, or an instance of a class, containing routines to be potentially turned into GUIs
+    :return: A list containing any functions which are flagged to be turned into a GUI
+    """
+    import inspect
+    pggui_funcs = []
+
+    def _get_members(c):
+        if not inspect.isclass(c):
+            result = [m[1] for m in inspect.getmembers(c) if inspect.isroutine(m[1])]
+            return result
+        else:
+            members = []
+            im = dict(inspect.getmembers(c))
+            for m in im:
+                if inspect.isroutine(im[m]):
+                    # Only returns True on bound methods
+                    if inspect.ismethod(im[m]):
+                        members.append(im[m])
+                    elif m in c.__dict__ and type(c.__dict__[m]) is staticmethod:
+                        members.append(im[m])
+            return members
+
+    for member in _get_members(component):
+        if hasattr(member, '_pggui_name'):
+            pggui_funcs.append(member)
+    return pggui_funcs
@@ -0,0 +1,305 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import dataclasses
+import io
+import mmap
+import numbers
+import reprlib
+from collections import deque
+from collections.abc import Mapping
+
+# Plain containers get a bounded repr, so a huge list never becomes one huge string just to be cut down
+_CONTAINERS = (list, tuple, dict, set, frozenset, deque)
+_BUFFERS = (bytes, bytearray, memoryview)
+
+
+def _bounded_repr(limit: int) -> reprlib.Repr:
+    r = reprlib.Repr()
+    r.maxlevel = 3
+    r.maxlist = r.maxtuple = r.maxset = r.maxfrozenset = r.maxdeque = r.maxdict = 32
+    r.maxstring = r.maxother = r.maxlong = limit
+    return r
+
+
+def is_file(value) -> bool:
+    return isinstance(value, io.IOBase) or (hasattr(value, 'fileno') and hasattr(value, 'read'))
+
+
+def is_text_file(value) -> bool:
+    return isinstance(value, io.TextIOBase) or 'b' not in getattr(value, 'mode', 'b')
+
+
+def as_buffer(value):
+    """
+    A read-only memoryview over value's bytes without copying them, or None if it has none
+    Files are mapped with mmap; the view keeps the mapping alive.
+    """
+    if is_file(value):
+        try:
+            mm = mmap.mmap(value.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            # Not a regular file (pipe, socket, in-memory) or empty
+            return None
+        return memoryview(mm)
+    if isinstance(value, _BUFFERS) or (not isinstance(value, str) and _has_buffer(value)):
+        try:
+            return memoryview(value).cast('B')
+        except TypeError:
+            return None
+    return None
+
+
+def _has_buffer(value) -> bool:
+    try:
+        memoryview(value)
+    except TypeError:
+        return False
+    return True
+
+
+def preview_text(value, limit: int = 256) -> tuple:
+    """
+    Text for a result, built without rendering more of it than fits
+    :param value: The result
+    :param limit: Max characters
+    :return: (text, whether there is more to see than the text shows)
+    """
+    if isinstance(value, str):
+        return value[:limit], len(value) > limit
+    if is_file(value):
+        buffer = as_buffer(value)
+        name = getattr(value, 'name', type(value).__name__)
+        if buffer is None:
+            return f'<{type(value).__name__} {name}>', False
+        text = f'<{type(value).__name__} {name}, {len(buffer)} bytes>'
+        return text, len(buffer) > 0
+    buffer = as_buffer(value)
+    if buffer is not None and (isinstance(value, _BUFFERS) or len(buffer) > limit):
+        text = repr(bytes(buffer[:limit]))
+        if not isinstance(value, _BUFFERS):
+            # Some other large buffer (array, ndarray...) - its str() could be as big as the data
+            text = f'<{type(value).__name__}, {len(buffer)} bytes> {text}'
+        return text[:limit], len(buffer) > limit
+    if isinstance(value, _CONTAINERS):
+        text = _bounded_repr(limit).repr(value)
+        return text[:limit], len(text) > limit or _longer_than(value, 32)
+    try:
+        text = str(value)
+    except Exception:
+        return '<Object>', False
+    return text[:limit], len(text) > limit
+
+
+def _longer_than(value, n: int) -> bool:
+    try:
+        return len(value) > n
+    except TypeError:
+        return False
+
+
+class TextSource:
+    """
+    Pages of a (possibly very large) string, sliced only when a page is shown
+    :param text: The text
+    :param page_size: Characters per page
+    """
+    def __init__(self, text: str, page_size: int = 65536):
+        self.text = text
+        self.page_size = page_size
+
+    def __len__(self):
+        return max(1, -(-len(self.text) // self.page_size))
+
+    def page(self, i: int) -> str:
+        return self.text[i * self.page_size:(i + 1) * self.page_size]
+
+
+class BufferSource:
+    """
+    Pages of a memoryview, decoded as text or shown as a hex dump
+    Only the bytes of the requested page are ever copied out of the buffer.
+    :param buffer: A 1-D byte memoryview (see as_buffer)
+    :param text: Decode as utf-8 text instead of a hex dump
+    :param page_size: Bytes per page
+    """
+    bytes_per_line = 16
+
+    def __init__(self, buffer: memoryview, text: bool = False, page_size: int = 16384):
+        self.buffer = buffer
+        self.text = text
+        self.page_size = page_size
+
+    def __len__(self):
+        return max(1, -(-len(self.buffer) // self.page_size))
+
+    def page(self, i: int) -> str:
+        start = i * self.page_size
+        chunk = bytes(self.buffer[start:start + self.page_size])
+        if self.text:
+            return chunk.decode('utf-8', errors='replace')
+        lines = []
+        for offset in range(0, len(chunk), self.bytes_per_line):
+            row = chunk[offset:offset + self.bytes_per_line]
+            ascii_text = ''.join(chr(b) if 32 <= b < 127 else '.' for b in row)
+            lines.append(f'{start + offset:08x}  {row.hex(" "):<47}  {ascii_text}')
+        return '\n'.join(lines)
+
+
+def open_source(value):
+    """
+    A paged source for viewing all of a result
+    :param value: The result
+    :return: TextSource or BufferSource
+    """
+    if isinstance(value, str):
+        return TextSource(value)
+    buffer = as_buffer(value)
+    if buffer is not None:
+        return BufferSource(buffer, text=is_file(value) and is_text_file(value))
+    if isinstance(value, _CONTAINERS):
+        return TextSource(_bounded_repr(1000).repr(value) if _longer_than(value, 100000) else repr(value))
+    try:
+        return TextSource(str(value))
+    except Exception:
+        return TextSource('<Object>')
+
+
+def _sort_key(v):
+    # Numbers before text, empty cells last, so mixed columns still sort without comparing across types
+    if v is None:
+        return 2, ''
+    if isinstance(v, numbers.Real) and not isinstance(v, bool):
+        return 0, v
+    return 1, str(v)
+
+
+class TableModel:
+    """
+    Row/column access to a tabular result, without copying it
+    Sorting and filtering only reorder a list of row numbers; the sort order of each column is computed once.
+    :param columns: Column headings
+    :param n_rows: Number of rows
+    :param cell: f(row: int, column: int) returning the value of a cell
+    """
+    max_cell_length = 200
+
+    def __init__(self, columns: list, n_rows: int, cell):
+        self.columns = [str(c) for c in columns]
+        self.n_rows = n_rows
+        self.cell = cell
+        self.sort_column = None
+        self.descending = False
+        self.filter_text = ''
+        # Row numbers in display order
+        self.order = range(n_rows)
+        self._sort_indexes = {}
+        self._row_text = None
+        self._matches = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def cell_text(self, row: int, column: int) -> str:
+        try:
+            value = self.cell(row, column)
+            return '' if value is None else str(value)[:self.max_cell_length]
+        except Exception:
+            return '<Object>'
+
+    def row(self, i: int) -> list:
+        """Cell texts of the i-th row in display order"""
+        row = self.order[i]
+        return [self.cell_text(row, j) for j in range(len(self.columns))]
+
+    def sort(self, column: int, descending: bool = False):
+        self.sort_column = column
+        self.descending = descending
+        if column not in self._sort_indexes:
+            self._sort_indexes[column] = sorted(range(self.n_rows), key=lambda r: _sort_key(self.cell(r, column)))
+        self._apply()
+
+    def filter(self, text: str):
+        """Only show rows with a cell containing text (case insensitive)"""
+        text = text.lower()
+        if not text:
+            self._matches = None
+        else:
+            if self._row_text is None:
+                self._row_text = ['\0'.join(self.row_text(r)).lower() for r in range(self.n_rows)]
+            # Narrowing the filter only has to look at what the previous one matched
+            candidates = self._matches if self._matches is not None and text.startswith(self.filter_text) \
+                else range(self.n_rows)
+            self._matches = [r for r in candidates if text in self._row_text[r]]
+        self.filter_text = text
+        self._apply()
+
+    def row_text(self, row: int) -> list:
+        return [self.cell_text(row, j) for j in range(len(self.columns))]
+
+    def _apply(self):
+        order = range(self.n_rows) if self.sort_column is None else self._sort_indexes[self.sort_column]
+        if self.descending:
+            order = order[::-1]
+        if self._matches is not None:
+            if self.sort_column is None and not self.descending:
+                order = self._matches
+            else:
+                matches = set(self._matches)
+                order = [r for r in order if r in matches]
+        self.order = order
+
+
+def as_table(value):
+    """
+    Recognize tabular results: sequences of dicts, dataclasses, or tuples/lists, DataFrame-likes and 2-D arrays
+    :param value: The result
+    :return: A TableModel, or None if value isn't tabular
+    """
+    if hasattr(value, 'iat') and hasattr(value, 'columns'):
+        return TableModel(list(value.columns), len(value), lambda i, j: value.iat[i, j])
+    if getattr(value, 'ndim', None) == 2 and hasattr(value, 'shape'):
+        return TableModel(list(range(value.shape[1])), value.shape[0], lambda i, j: value[i, j])
+    if not isinstance(value, (list, tuple)) or len(value) == 0:
+        return None
+    sample = value[:100]
+    first = sample[0]
+    if isinstance(first, Mapping):
+        if not all(isinstance(r, Mapping) for r in sample):
+            return None
+        columns = list(dict.fromkeys(k for r in sample for k in r))
+        return TableModel(columns, len(value), lambda i, j: value[i].get(columns[j]))
+    if dataclasses.is_dataclass(first) and not isinstance(first, type):
+        names = [f.name for f in dataclasses.fields(first)]
+        return TableModel(names, len(value), lambda i, j: getattr(value[i], names[j], None))
+    if isinstance(first, (list, tuple)):
+        if not all(isinstance(r, (list, tuple)) for r in sample):
+            return None
+        width = max(len(r) for r in sample)
+        columns = list(getattr(first, '_fields', range(width)))
+
+        def _cell(i, j):
+            row = value[i]
+            return row[j] if j < len(row) else None
+        return TableModel(columns, len(value), _cell)
+    return None
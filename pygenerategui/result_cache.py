@@ -0,0 +1,102 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Created by the decorator, so kept to modules that are cheap to import
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def make_key(func, kwargs: dict):
+    """
+    A cache key for calling func with kwargs
+    Hashable args are used as-is (along with their types); anything else (lists, dicts...) is keyed by its pickled
+    bytes.
+    :return: The key, or None if the args can't be keyed (the call is then just not cached)
+    """
+    owner = getattr(func, '__self__', None)
+    try:
+        hash(owner)
+    except TypeError:
+        owner = id(owner)
+    # Types are part of the key, since e.g. True, 1 and 1.0 are equal (and hash the same) but can give different results
+    items = tuple((k, type(v), v) for k, v in sorted(kwargs.items()))
+    try:
+        hash(items)
+        return owner, items
+    except TypeError:
+        pass
+    import pickle
+    try:
+        return owner, pickle.dumps(items, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+class ResultCache:
+    """
+    LRU cache of function results with an optional time to live
+    :param max_size: Most results to keep
+    :param ttl: Seconds a result stays valid. Forever if none supplied.
+    """
+    def __init__(self, max_size: int = 128, ttl: float = None):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        # key -> (expires, value), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=_MISSING):
+        """
+        :return: The cached value, or default (a sentinel unless given) if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def is_missing(value) -> bool:
+        return value is _MISSING
@@ -0,0 +1,235 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Imported by the executor, so kept to modules that are cheap to import
+import itertools
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+_REF_RE = re.compile(r'^\$([A-Za-z_][\w.-]*)$')
+
+
+def estimate_size(value, sample: int = 100) -> int:
+    """
+    Rough size of a value in bytes, without walking all of it
+    Buffers/arrays report their own size; containers are estimated from their first `sample` items.
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value, 0)
+    if isinstance(value, (str, bytes, bytearray)):
+        return size
+    if isinstance(value, dict):
+        items = list(itertools.islice(value.items(), sample))
+        if items:
+            size += sum(sys.getsizeof(k, 0) + estimate_size(v, 10) for k, v in items) * len(value) // len(items)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(itertools.islice(value, sample))
+        if items:
+            size += sum(estimate_size(v, 10) for v in items) * len(value) // len(items)
+    return size
+
+
+class ResultRef:
+    """
+    Placeholder for a stored result in a call's kwargs, replaced by the result itself when the call is run
+    :param store: The ResultStore holding the result
+    :param key: The result's key
+    """
+    __slots__ = ('store', 'key')
+
+    def __init__(self, store: 'ResultStore', key: str):
+        self.store = store
+        self.key = key
+
+    def get(self):
+        return self.store.get(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, ResultRef) and other.store is self.store and other.key == self.key
+
+    def __hash__(self):
+        return hash((id(self.store), self.key))
+
+    def __repr__(self):
+        return f'${self.key}'
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'path', 'label')
+
+    def __init__(self, value, size: int, label: str):
+        self.value = value
+        self.size = size
+        self.path = None  # Set once spilled to disk
+        self.label = label
+
+
+class ResultStore:
+    """
+    Function results kept as the objects themselves, so they can be passed into other functions as $key
+    Results past the memory budget are pickled to disk (least recently used first) on a background thread, or
+    dropped if they can't be pickled. The most recent result always stays in memory.
+    :param memory_budget: Most bytes (as estimated by estimate_size) of results kept in memory
+    :param spill_dir: Where spilled results are written. A temp directory, removed on exit, if none supplied.
+    """
+    def __init__(self, memory_budget: int = 256 * 2 ** 20, spill_dir: str = None):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._tmp_dir = None
+        # key -> entry, least recently used first
+        self._entries = OrderedDict()
+        self._counter = itertools.count(1)
+        self._lock = threading.RLock()
+        self._spilling = False
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def label(self, key: str) -> str:
+        return self._entries[key].label
+
+    @property
+    def memory_used(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values() if e.path is None)
+
+    def put(self, value, key: str = None, label: str = '') -> str:
+        """
+        Store a result, replacing any result already stored under key
+        :param value: The result
+        :param key: The name to store it under. 'r1', 'r2'... if none supplied.
+        :param label: Description shown alongside the key
+        :return: The key
+        """
+        with self._lock:
+            if key is None:
+                key = f'r{next(self._counter)}'
+                while key in self._entries:
+                    key = f'r{next(self._counter)}'
+            self._remove_file(self._entries.pop(key, None))
+            self._entries[key] = _Entry(value, estimate_size(value), label)
+            if not self._spilling and self.memory_used > self.memory_budget:
+                self._spilling = True
+                threading.Thread(target=self._enforce_budget, name='pggui-result-spill', daemon=True).start()
+        return key
+
+    def get(self, key: str):
+        """
+        :return: The stored result, read back from disk if it was spilled
+        :raises KeyError: If there's no result stored under key (or it was dropped to stay under the budget)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise KeyError(f'No stored result ${key}')
+            self._entries.move_to_end(key)
+            if entry.path is None:
+                return entry.value
+            path = entry.path
+        import pickle
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def ref(self, key: str) -> ResultRef:
+        if key not in self._entries:
+            raise KeyError(f'No stored result ${key}')
+        return ResultRef(self, key)
+
+    def parse_ref(self, text: str):
+        """
+        :param text: Text entered for an arg
+        :return: A ResultRef if text is '$key' for a stored result, otherwise None
+        """
+        m = _REF_RE.match(text.strip())
+        if m is None or m[1] not in self._entries:
+            return None
+        return ResultRef(self, m[1])
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove_file(self._entries.pop(key, None))
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries.values():
+                self._remove_file(entry)
+            self._entries.clear()
+
+    def _enforce_budget(self):
+        import pickle
+        import tempfile
+        try:
+            while True:
+                with self._lock:
+                    in_memory = [(k, e) for k, e in self._entries.items() if e.path is None]
+                    if len(in_memory) <= 1 or sum(e.size for _, e in in_memory) <= self.memory_budget:
+                        # Cleared under the same lock put() checks it with, so no put is missed
+                        self._spilling = False
+                        return
+                    key, entry = in_memory[0]
+                    if self.spill_dir is None and self._tmp_dir is None:
+                        self._tmp_dir = tempfile.TemporaryDirectory(prefix='pggui-results-')
+                    directory = self.spill_dir or self._tmp_dir.name
+                # Pickled outside the lock, so results can still be stored and read meanwhile
+                fd, path = tempfile.mkstemp(prefix=f'{key}-', suffix='.pickle', dir=directory)
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        pickle.dump(entry.value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    os.remove(path)
+                    path = None
+                with self._lock:
+                    if self._entries.get(key) is not entry:
+                        # Replaced or removed while being written
+                        if path is not None:
+                            os.remove(path)
+                    elif path is None:
+                        # Can't be pickled, so it can't be kept
+                        del self._entries[key]
+                    else:
+                        entry.path = path
+                        entry.value = None
+        except BaseException:
+            with self._lock:
+                self._spilling = False
+            raise
+
+    @staticmethod
+    def _remove_file(entry):
+        if entry is not None and entry.path is not None:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,180 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import tkinter as tk
+from tkinter import ttk
+
+from pygenerategui.render import TableModel, open_source
+
+
+class PagedTextViewer(tk.Toplevel):
+    def __init__(self, parent, title: str, value):
+        """
+        Window showing all of a result one page at a time. Only the current page is ever in the Text widget.
+        :param parent: Parent widget
+        :param title: Window title
+        :param value: The result to show
+        """
+        super().__init__(parent)
+        self.title(title)
+        self.source = open_source(value)
+        self.n_pages = len(self.source)
+        self.page_number = 0
+
+        # Page navigation
+        self.nav_frame = ttk.Frame(self)
+        self.nav_frame.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky='we')
+        self.btn_prev = ttk.Button(self.nav_frame, text='<', width=3,
+                                   command=lambda: self.show_page(self.page_number - 1))
+        self.btn_prev.grid(row=0, column=0)
+        self.page_scale = ttk.Scale(self.nav_frame, from_=0, to=max(0, self.n_pages - 1), orient='horizontal',
+                                    length=400, command=self._on_scale)
+        self.page_scale.grid(row=0, column=1, padx=5)
+        self.btn_next = ttk.Button(self.nav_frame, text='>', width=3,
+                                   command=lambda: self.show_page(self.page_number + 1))
+        self.btn_next.grid(row=0, column=2)
+        self.lbl_page = ttk.Label(self.nav_frame, text='')
+        self.lbl_page.grid(row=0, column=3, padx=5)
+
+        # Page text
+        self.text = tk.Text(self, width=100, height=40, wrap='none')
+        self.vscroll = ttk.Scrollbar(self, orient='vertical', command=self.text.yview)
+        self.hscroll = ttk.Scrollbar(self, orient='horizontal', command=self.text.xview)
+        self.text.configure(yscrollcommand=self.vscroll.set, xscrollcommand=self.hscroll.set)
+        self.text.grid(row=1, column=0, sticky='news')
+        self.vscroll.grid(row=1, column=1, sticky='ns')
+        self.hscroll.grid(row=2, column=0, sticky='we')
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.show_page(0)
+
+    def _on_scale(self, value):
+        page = int(float(value))
+        if page != self.page_number:
+            self.show_page(page)
+
+    def show_page(self, page: int):
+        page = min(max(page, 0), self.n_pages - 1)
+        self.page_number = page
+        self.text.configure(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.insert('1.0', self.source.page(page))
+        self.text.configure(state='disabled')
+        self.page_scale.set(page)
+        self.lbl_page['text'] = f'Page {page + 1} of {self.n_pages}'
+
+
+class TableView(ttk.Frame):
+    def __init__(self, parent, model: TableModel, height: int = 15):
+        """
+        Treeview over a TableModel that only ever holds the visible rows.
+        Its rows are reused as the view scrolls; clicking a heading sorts, typing in the filter box filters.
+        :param parent: Parent widget
+        :param model: The table
+        :param height: Visible rows
+        """
+        super().__init__(parent)
+        self.model = model
+        self.height = height
+        self.offset = 0
+        self._filter_after = None
+
+        # Filter
+        self.filter_text = tk.StringVar()
+        self.lbl_filter = ttk.Label(self, text='Filter:')
+        self.filter_entry = ttk.Entry(self, textvariable=self.filter_text, width=40)
+        self.filter_text.trace_add('write', self._on_filter_changed)
+        self.lbl_count = ttk.Label(self, text='')
+
+        # Table
+        column_ids = [f'c{j}' for j in range(len(model.columns))]
+        self.tree = ttk.Treeview(self, columns=column_ids, show='headings', height=height, selectmode='browse')
+        for j, column_id in enumerate(column_ids):
+            self.tree.heading(column_id, text=model.columns[j], command=lambda j=j: self.sort(j))
+            self.tree.column(column_id, width=100, stretch=False)
+        self.vscroll = ttk.Scrollbar(self, orient='vertical', command=self._on_scroll)
+        self.hscroll = ttk.Scrollbar(self, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hscroll.set)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_to(self.offset - (1 if e.delta > 0 else -1) * 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_to(self.offset - 3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_to(self.offset + 3))
+        self.tree.bind('<Prior>', lambda e: self.scroll_to(self.offset - self.height))
+        self.tree.bind('<Next>', lambda e: self.scroll_to(self.offset + self.height))
+        self.n_shown = 0
+
+        self.lbl_filter.grid(row=0, column=0, sticky='w')
+        self.filter_entry.grid(row=0, column=1, sticky='w')
+        self.lbl_count.grid(row=0, column=2, padx=5, sticky='w')
+        self.tree.grid(row=1, column=0, columnspan=3, sticky='news')
+        self.vscroll.grid(row=1, column=3, sticky='ns')
+        self.hscroll.grid(row=2, column=0, columnspan=3, sticky='we')
+        self.refresh()
+
+    def scroll_to(self, offset: int):
+        self.offset = min(max(offset, 0), max(0, len(self.model) - self.height))
+        self.refresh()
+
+    def _on_scroll(self, action, amount, what=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.model)))
+        elif what == 'pages':
+            self.scroll_to(self.offset + int(amount) * self.height)
+        else:
+            self.scroll_to(self.offset + int(amount))
+
+    def refresh(self):
+        """Put the rows at the current offset into the Treeview's fixed set of items"""
+        n = len(self.model)
+        visible = max(0, min(self.height, n - self.offset))
+        for k in range(visible):
+            iid = str(k)
+            if k >= self.n_shown:
+                self.tree.insert('', 'end', iid=iid)
+            self.tree.item(iid, values=self.model.row(self.offset + k))
+        for k in range(visible, self.n_shown):
+            self.tree.delete(str(k))
+        self.n_shown = visible
+        if n == 0:
+            self.vscroll.set(0, 1)
+        else:
+            self.vscroll.set(self.offset / n, (self.offset + visible) / n)
+        self.lbl_count['text'] = f'{n} of {self.model.n_rows} rows'
+
+    def sort(self, column: int):
+        descending = self.model.sort_column == column and not self.model.descending
+        self.model.sort(column, descending)
+        for j, name in enumerate(self.model.columns):
+            arrow = (' \u25bc' if descending else ' \u25b2') if j == column else ''
+            self.tree.heading(f'c{j}', text=f'{name}{arrow}')
+        self.scroll_to(0)
+
+    def _on_filter_changed(self, *args):
+        # Wait for a pause in typing before filtering
+        if self._filter_after is not None:
+            self.after_cancel(self._filter_after)
+        self._filter_after = self.after(150, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_after = None
+        self.model.filter(self.filter_text.get())
+        self.scroll_to(0)
@@ -0,0 +1,184 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import bisect
+import heapq
+import re
+
+_CAMEL_RE = re.compile(r'([a-z0-9])([A-Z])')
+_NON_WORD_RE = re.compile(r'[^0-9a-zA-Z]+')
+_DOC_WORD_RE = re.compile(r'[a-zA-Z][a-zA-Z0-9]{2,}')
+# Most distinct docstring words indexed per function
+_MAX_DOC_WORDS = 100
+
+
+def _words(text: str) -> str:
+    """'get_deviceStatus' -> 'get device status'"""
+    return _NON_WORD_RE.sub(' ', _CAMEL_RE.sub(r'\1 \2', text)).strip().lower()
+
+
+def function_entry(name: str, func) -> tuple:
+    """
+    :param name: The function's name in the app
+    :param func: The function (or LazyFunction)
+    :return: (name, path, doc) for FunctionIndex, path being the module (and class) it's defined in
+    """
+    component = getattr(func, 'component', None)
+    if component is not None and hasattr(component, 'path'):
+        path = component.path
+    else:
+        target = getattr(func, '__func__', func)
+        owner = getattr(target, '__qualname__', '').rpartition('.')[0]
+        path = getattr(target, '__module__', None) or ''
+        if owner:
+            path = f'{path}.{owner}'
+    return name, path, getattr(func, '__doc__', None) or ''
+
+
+class _TokenField:
+    """Words of one searchable text per entry, with the entries each word appears in"""
+    def __init__(self, texts: list):
+        postings = {}
+        for i, text in enumerate(texts):
+            for token in set(text.split()):
+                postings.setdefault(token, []).append(i)
+        self.tokens = sorted(postings)
+        self.postings = [postings[t] for t in self.tokens]
+
+    def prefixed(self, prefix: str) -> set:
+        """Entries with a word starting with prefix"""
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + '\uffff')
+        found = set()
+        for ids in self.postings[lo:hi]:
+            found.update(ids)
+        return found
+
+
+class FunctionIndex:
+    """
+    Search over function names, module/class paths and docstring words, built once per function list
+    Each query word has to match every result, as (best first) the start of the name, the start of a word of the
+    name, path, or docstring, or the letters of the name in order ('gds' finds 'get_device_status').
+    Searches that extend the previous query only look through the previous results.
+    :param entries: (name, path, doc) per function, as made by function_entry
+    """
+    # Score of a query word by what it matched
+    NAME_PREFIX = 5
+    NAME_WORD = 4
+    PATH_WORD = 3
+    DOC_WORD = 2
+    FUZZY = 1
+    # Below this many previous results, fuzzy matching checks just those instead of scanning every name
+    narrow_limit = 2000
+
+    def __init__(self, entries: list):
+        self.names = [e[0] for e in entries]
+        self._lower_names = [n.lower().replace('\n', ' ') for n in self.names]
+        self._sorted_names = sorted((n, i) for i, n in enumerate(self._lower_names))
+        self._names_text = '\n'.join(self._lower_names)
+        self._name_starts = []
+        offset = 0
+        for n in self._lower_names:
+            self._name_starts.append(offset)
+            offset += len(n) + 1
+        doc_words = []
+        for e in entries:
+            seen = dict.fromkeys(w.lower() for w in _DOC_WORD_RE.findall(e[2]))
+            doc_words.append(' '.join(list(seen)[:_MAX_DOC_WORDS]))
+        # (score, field), best first
+        self._word_fields = ((self.NAME_WORD, _TokenField([_words(n) for n in self.names])),
+                             (self.PATH_WORD, _TokenField([_words(e[1]) for e in entries])),
+                             (self.DOC_WORD, _TokenField(doc_words)))
+        # [(query word, {entry index: score} after matching it)] for the last search
+        self._last_steps = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def _name_prefixed(self, prefix: str) -> list:
+        lo = bisect.bisect_left(self._sorted_names, (prefix,))
+        hi = bisect.bisect_left(self._sorted_names, (prefix + '\uffff',))
+        return [i for _, i in self._sorted_names[lo:hi]]
+
+    def _fuzzy(self, word: str, within) -> list:
+        body = r'[^\n]*?'.join(re.escape(c) for c in word)
+        if within is not None and len(within) <= self.narrow_limit:
+            pattern = re.compile(body)
+            return [i for i in within if pattern.search(self._lower_names[i])]
+        # One scan over every name (joined one per line) runs at C speed
+        pattern = re.compile(r'^[^\n]*?' + body, re.MULTILINE)
+        return [bisect.bisect_right(self._name_starts, m.start()) - 1 for m in pattern.finditer(self._names_text)]
+
+    def _match_word(self, word: str, within) -> dict:
+        """{entry index: score} of the entries word matches, only counting those in within if given"""
+        scores = dict.fromkeys(self._name_prefixed(word), self.NAME_PREFIX)
+        parts = _words(word).split()
+        for score, field in self._word_fields:
+            if not parts:
+                break
+            found = field.prefixed(parts[0])
+            for part in parts[1:]:
+                found &= field.prefixed(part)
+            for i in found:
+                scores.setdefault(i, score)
+        for i in self._fuzzy(word, within):
+            scores.setdefault(i, self.FUZZY)
+        if within is not None:
+            return {i: s for i, s in scores.items() if i in within}
+        return scores
+
+    def search(self, query: str, limit: int = 200) -> tuple:
+        """
+        :param query: What was typed. Words are matched separately.
+        :param limit: Most results to rank and return
+        :return: ([entry index], total number of matches), best matches first
+        """
+        words = query.lower().split()
+        if not words:
+            self._last_steps = []
+            return [i for _, i in self._sorted_names[:limit]], len(self.names)
+        # Results after each word of the last query are reused for the words that haven't changed, and a word that
+        # was only typed further can only narrow its previous results
+        steps = []
+        scores = None
+        reusing = True
+        for k, word in enumerate(words):
+            last = self._last_steps[k] if reusing and k < len(self._last_steps) else None
+            if last is not None and last[0] == word:
+                scores = last[1]
+                steps.append(last)
+                continue
+            reusing = False
+            within = last[1] if last is not None and word.startswith(last[0]) else scores
+            word_scores = self._match_word(word, within)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {i: scores[i] + s for i, s in word_scores.items() if i in scores}
+            steps.append((word, scores))
+            if not scores:
+                break
+        self._last_steps = steps
+        ranked = heapq.nsmallest(limit, scores, key=lambda i: (-scores[i], self._lower_names[i]))
+        return ranked, len(scores)
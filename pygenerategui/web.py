@@ -0,0 +1,371 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Serve pggui functions over HTTP from one process, so many users share its imports, caches and connections.
+Standard library only, and never imports tkinter. Forms are generated from the same specs as the gui, and args are
+converted the same way as on the command line.
+
+    GET  /                      Index of functions
+    GET  /f/<name>              Form for a function
+    GET  /api/functions         The functions and their args, as json
+    POST /api/run/<name>        Run a function. Args as a json object or form fields ('arg.subarg' for nested
+                                functions). Responds with {"result", "error", "elapsed"}, or for generators a chunked
+                                stream of json lines, one per item (as text), ending with {"done", "count", "error"}.
+                                A {"dropped": n} line means n items were skipped because the client read too slowly.
+"""
+import asyncio
+import html
+import json
+import time
+import urllib.parse
+
+from pygenerategui.cli import arg_kind, build_call, load_functions, max_choices_listed
+from pygenerategui.executor import ThreadExecutor
+from pygenerategui.function_spec import OptionSource, get_function_spec, option_map
+from pygenerategui.lazy import LazyFunction
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error'}
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{font-family:sans-serif;max-width:50em;margin:1em auto}} label{{display:block;margin-top:.6em}}
+fieldset{{margin-top:.6em}} pre{{background:#eee;padding:.5em;white-space:pre-wrap}}</style></head>
+<body>{body}</body></html>"""
+
+# Shows the response in the page as it arrives, instead of navigating to it
+_SCRIPT = """<script>
+document.querySelector('form').addEventListener('submit', async (e) => {
+  e.preventDefault();
+  const out = document.getElementById('result');
+  out.textContent = 'Running...';
+  const resp = await fetch(e.target.action, {method: 'POST', body: new URLSearchParams(new FormData(e.target))});
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  out.textContent = '';
+  for (let chunk = await reader.read(); !chunk.done; chunk = await reader.read()) {
+    out.textContent += decoder.decode(chunk.value, {stream: true});
+  }
+});
+</script>"""
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class WebServer:
+    """
+    :param components: Modules, classes, instances, or 'package.module[:Class]' paths, as given to PGGUI_App
+    :param executor: Where runs are submitted. A ThreadExecutor with max_workers if none supplied.
+    :param host: Interface to listen on. Only this machine by default.
+    :param port: Port to listen on, 0 for any free port (see .port once started)
+    :param max_workers: Calls run at once, if no executor supplied
+    """
+    # Seconds between checks for stream items of a running call
+    poll_interval = 0.05
+    max_body = 10 * 1024 * 1024
+
+    def __init__(self, components: list, executor=None, host: str = '127.0.0.1', port: int = 8000,
+                 max_workers: int = 16):
+        self.funcs = load_functions(components)
+        self.executor = ThreadExecutor(max_workers) if executor is None else executor
+        self.host = host
+        self.port = port
+        self.server = None
+
+    # Server
+
+    async def start(self):
+        """Import every component (so the first users don't wait on it) and start listening"""
+        loop = asyncio.get_running_loop()
+        for name in list(self.funcs):
+            await self._resolve(name, loop)
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def run(self):
+        """Serve until interrupted, blocking the calling thread"""
+        print(f'Serving {len(self._public_names())} functions on http://{self.host}:{self.port}/', flush=True)
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.executor.shutdown()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown()
+
+    async def _resolve(self, name: str, loop):
+        func = self.funcs.get(name)
+        if func is None:
+            raise HTTPError(404, f'No function named {name!r}')
+        if isinstance(func, LazyFunction):
+            # Imports the component, which may be slow, so not on the loop
+            func = await loop.run_in_executor(None, func.resolve)
+            self.funcs[name] = func
+        return func
+
+    def _public_names(self) -> list:
+        return sorted(name for name, func in self.funcs.items() if name == func._pggui_name)
+
+    # HTTP
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split(maxsplit=2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version.strip() == 'HTTP/1.1'
+                length = int(headers.get('content-length', 0))
+                if length > self.max_body:
+                    await self._respond(writer, 413, {'error': 'Request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                await self._dispatch(method, target, headers, body, writer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Dropped connections and garbage requests just end the connection
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body, keep_alive: bool,
+                       content_type: str = 'application/json'):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, default=str).encode() if content_type == 'application/json' else body.encode()
+        head = (f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\nContent-Type: {content_type}; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\nConnection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, headers: dict, body: bytes, writer, keep_alive: bool):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+        try:
+            if path == '/' and method == 'GET':
+                await self._respond(writer, 200, self.index_page(), keep_alive, 'text/html')
+            elif path == '/api/functions' and method == 'GET':
+                await self._respond(writer, 200, await self.describe(), keep_alive)
+            elif path.startswith('/f/') and method == 'GET':
+                page = await self.form_page(path[len('/f/'):])
+                await self._respond(writer, 200, page, keep_alive, 'text/html')
+            elif path.startswith('/api/run/'):
+                if method != 'POST':
+                    raise HTTPError(405, 'Use POST to run a function')
+                await self.run_function(path[len('/api/run/'):], headers, body, writer, keep_alive)
+            else:
+                raise HTTPError(404, f'Nothing at {path}')
+        except HTTPError as e:
+            await self._respond(writer, e.status, {'error': str(e)}, keep_alive)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            await self._respond(writer, 500, {'error': f'{type(e).__name__}: {e}'}, keep_alive)
+
+    # Pages
+
+    def index_page(self) -> str:
+        items = ''.join(f'<li><a href="/f/{urllib.parse.quote(name)}">{html.escape(name)}</a> - '
+                        f'{html.escape(get_function_spec(self.funcs[name]).description)}</li>'
+                        for name in self._public_names())
+        return _PAGE.format(title='Functions', body=f'<h1>Functions</h1><ul>{items}</ul>')
+
+    async def form_page(self, name: str) -> str:
+        func = await self._resolve(name, asyncio.get_running_loop())
+        spec = get_function_spec(func)
+        fields = await self._fields(func, '')
+        body = (f'<h1>{html.escape(spec.func_name)}</h1><p>{html.escape(spec.description)}</p>'
+                f'<form method="post" action="/api/run/{urllib.parse.quote(name)}">{fields}'
+                f'<p><button type="submit">RUN</button></p></form><pre id="result"></pre>{_SCRIPT}')
+        return _PAGE.format(title=html.escape(spec.func_name), body=body)
+
+    async def _options(self, source) -> dict:
+        if isinstance(source, OptionSource):
+            # Loading may be slow, but it's cached (per ttl) for everyone after that
+            return await asyncio.get_running_loop().run_in_executor(None, option_map, source)
+        return option_map(source)
+
+    async def _fields(self, func, prefix: str) -> str:
+        """Form inputs for the args of func, named like the command line options ('arg.subarg' for nested)"""
+        parts = []
+        for arg, arg_info in get_function_spec(func).args.items():
+            kind = arg_kind(arg_info)
+            if kind is None:
+                continue
+            name = html.escape(f'{prefix}{arg}')
+            label = html.escape(f'{arg}: {arg_info.description}' if arg_info.description else arg)
+            default = '' if arg_info.required or arg_info.default is None else str(arg_info.default)
+            if kind == 'function':
+                nested = await self._fields(arg_info.override, f'{prefix}{arg}.')
+                parts.append(f'<fieldset><legend>{label}</legend>{nested}</fieldset>')
+            elif kind == 'bool':
+                selected = ' selected' if arg_info.default else ''
+                parts.append(f'<label>{label}<br><select name="{name}"><option value="false">False</option>'
+                             f'<option value="true"{selected}>True</option></select></label>')
+            elif kind == 'options':
+                options = await self._options(arg_info.override)
+                labels = [label for label in options if label != '_manual']
+                current = next((k for k in labels if options[k] == arg_info.default), '')
+                choices = ''.join(f'<option{" selected" if k == current else ""}>{html.escape(k)}</option>'
+                                  for k in labels)
+                if '_manual' in options:
+                    parts.append(f'<label>{label}<br><input name="{name}" list="{name}-list" '
+                                 f'value="{html.escape(current)}"><datalist id="{name}-list">{choices}'
+                                 f'</datalist></label>')
+                else:
+                    parts.append(f'<label>{label}<br><select name="{name}"><option></option>{choices}'
+                                 f'</select></label>')
+            elif kind == 'json':
+                parts.append(f'<label>{label} (json)<br><textarea name="{name}" rows="3" cols="60">'
+                             f'{html.escape(default)}</textarea></label>')
+            else:
+                parts.append(f'<label>{label}<br><input name="{name}" value="{html.escape(default)}"></label>')
+        return ''.join(parts)
+
+    async def describe(self) -> list:
+        """The functions and their args, for clients building their own forms"""
+        loop = asyncio.get_running_loop()
+        functions = []
+        for name in self._public_names():
+            spec = get_function_spec(await self._resolve(name, loop))
+            functions.append({'name': name, 'description': spec.description, 'args': self._describe_args(spec)})
+        return functions
+
+    def _describe_args(self, spec) -> list:
+        args = []
+        for arg, arg_info in spec.args.items():
+            kind = arg_kind(arg_info)
+            if kind is None:
+                continue
+            entry = {'name': arg, 'kind': kind, 'description': arg_info.description, 'required': arg_info.required,
+                     'default': None if arg_info.required else arg_info.default}
+            if kind == 'function':
+                entry['args'] = self._describe_args(get_function_spec(arg_info.override))
+            elif kind == 'options' and not isinstance(arg_info.override, OptionSource):
+                options = arg_info.options()
+                entry['choices'] = [k for k in options if k != '_manual'][:max_choices_listed]
+                entry['free_text'] = '_manual' in options
+            args.append(entry)
+        return args
+
+    # Runs
+
+    async def run_function(self, name: str, headers: dict, body: bytes, writer, keep_alive: bool):
+        func = await self._resolve(name, asyncio.get_running_loop())
+        values = self._parse_body(headers, body)
+        try:
+            call = build_call(func, values)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        start = time.perf_counter()
+        job = self.executor.submit(call)
+        loop = asyncio.get_running_loop()
+        finished = asyncio.Event()
+        job.add_done_callback(lambda j: loop.is_closed() or loop.call_soon_threadsafe(finished.set))
+
+        streaming = False
+        try:
+            while not finished.is_set():
+                try:
+                    await asyncio.wait_for(finished.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                streaming = await self._forward_events(job, writer, streaming, keep_alive)
+            streaming = await self._forward_events(job, writer, streaming, keep_alive)
+        except (ConnectionError, asyncio.CancelledError):
+            # The client went away, so nobody wants the result
+            job.cancel()
+            raise
+        error = None if job.error is None else f'{type(job.error).__name__}: {job.error}'
+        if streaming:
+            await self._write_chunk(writer, {'done': True, 'count': job.result, 'error': error})
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+        else:
+            await self._respond(writer, 200 if error is None else 500,
+                                {'result': job.result, 'error': error, 'elapsed': time.perf_counter() - start},
+                                keep_alive)
+
+    async def _forward_events(self, job, writer, streaming: bool, keep_alive: bool) -> bool:
+        """Write any stream items the job has emitted, starting the chunked response at the first. Returns streaming."""
+        while not job.events.empty():
+            kind, payload = job.events.get()
+            if kind == 'stream' and not streaming:
+                head = (f'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson; charset=utf-8\r\n'
+                        f'Transfer-Encoding: chunked\r\nConnection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+                writer.write(head.encode('latin-1'))
+                streaming = True
+            elif kind == 'items':
+                items, dropped = job.take_items()
+                if dropped:
+                    # The client read slower than the function produced, see Job.max_buffered_items
+                    await self._write_chunk(writer, {'dropped': dropped})
+                if items:
+                    await self._write_chunk(writer, *items)
+        return streaming
+
+    @staticmethod
+    async def _write_chunk(writer, *records):
+        data = ''.join(json.dumps(r, default=str) + '\n' for r in records).encode()
+        writer.write(f'{len(data):x}\r\n'.encode('latin-1') + data + b'\r\n')
+        await writer.drain()
+
+    @staticmethod
+    def _parse_body(headers: dict, body: bytes) -> dict:
+        """{dotted arg path: raw value} from a json object or form fields. Empty fields count as not given."""
+        if not body:
+            return {}
+        if headers.get('content-type', '').startswith('application/json'):
+            try:
+                values = json.loads(body)
+            except ValueError as e:
+                raise HTTPError(400, f'Invalid json: {e}')
+            if not isinstance(values, dict):
+                raise HTTPError(400, 'Expected a json object of args')
+            # Other json values are passed as their json text, which converts back to the same value
+            return {k: v if isinstance(v, str) else json.dumps(v) if v is not None else None for k, v in values.items()}
+        values = urllib.parse.parse_qs(body.decode(), keep_blank_values=False)
+        return {k: v[-1] for k, v in values.items()}
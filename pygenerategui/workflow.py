@@ -0,0 +1,234 @@
+# MIT License
+#
+# Copyright (c) 2021 Jared Massey
+# jared@jaredmasey.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading
+
+from pygenerategui.executor import FunctionCall, JobStatus, ThreadExecutor
+from pygenerategui.result_store import ResultRef, ResultStore
+
+
+class StepOutput:
+    """
+    Stands in for the result of a workflow step in another step's args
+    :param step: Name of the step
+    """
+    __slots__ = ('step',)
+
+    def __init__(self, step: str):
+        self.step = step
+
+    def __repr__(self):
+        return f'<output of {self.step}>'
+
+
+class Step:
+    def __init__(self, name: str, func, kwargs: dict):
+        self.name = name
+        self.func = func
+        self.kwargs = kwargs
+        # Bumped every time the step actually runs, so downstream steps can tell their input changed
+        self.version = 0
+        self.fingerprint = None
+
+    @property
+    def upstream(self) -> set:
+        return {v.step for v in self.kwargs.values() if isinstance(v, StepOutput)}
+
+
+class Workflow:
+    """
+    @pggui functions chained together, the result of one step feeding args of the next
+    Independent steps run at the same time. A step is only re-run when its args or the results it takes from
+    upstream steps have changed since its last run - otherwise its stored result is reused.
+    Step results are kept in a ResultStore under the step's name, so with the app's store they can be passed into
+    functions in the gui as $<step name>.
+
+        wf = Workflow(store=app.result_store)
+        devices = wf.add_step('devices', list_devices, site='lab')
+        wf.add_step('report', build_report, devices=devices, verbose=False)
+        wf.run()
+        wf.set_args('report', verbose=True)
+        wf.run()  # Only 'report' runs again
+
+    :param store: Where step results are kept. A new ResultStore if none supplied.
+    :param executor: Where steps are run. A ThreadExecutor(max_workers) if none supplied.
+    :param max_workers: Most steps running at once, when no executor is supplied
+    """
+    def __init__(self, store: ResultStore = None, executor=None, max_workers: int = 4):
+        self.store = ResultStore() if store is None else store
+        self.executor = ThreadExecutor(max_workers) if executor is None else executor
+        self.steps = {}  # name -> Step, in the order added
+        # Names of the steps that ran / were up to date in the last run()
+        self.last_ran = []
+        self.last_skipped = []
+
+    def add_step(self, name: str, func, **kwargs) -> StepOutput:
+        """
+        :param name: Unique name of the step
+        :param func: The function to run
+        :param kwargs: Its args. Use StepOutputs (as returned by add_step/output) for results of other steps.
+        :return: The step's output, to pass to later steps
+        """
+        if name in self.steps:
+            raise ValueError(f'Duplicate step name: {name}')
+        self._check_upstream(name, kwargs)
+        self.steps[name] = Step(name, func, dict(kwargs))
+        return StepOutput(name)
+
+    def output(self, name: str) -> StepOutput:
+        if name not in self.steps:
+            raise KeyError(f'No step named {name}')
+        return StepOutput(name)
+
+    def set_args(self, name: str, **kwargs):
+        """Change some of a step's args. It (and everything downstream of it) runs on the next run() if they differ."""
+        step = self.steps[name]
+        new_kwargs = dict(step.kwargs, **kwargs)
+        self._check_upstream(name, new_kwargs)
+        step.kwargs = new_kwargs
+
+    def _check_upstream(self, name: str, kwargs: dict):
+        for v in kwargs.values():
+            if isinstance(v, StepOutput):
+                if v.step not in self.steps:
+                    raise KeyError(f'Step {name} uses the output of unknown step {v.step}')
+                if v.step == name or v.step in self.downstream(name):
+                    raise ValueError(f'Step {name} using the output of {v.step} would make a cycle')
+
+    def downstream(self, name: str) -> set:
+        """Every step that (directly or indirectly) uses the output of the named step"""
+        found = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            for step in self.steps.values():
+                if current in step.upstream and step.name not in found:
+                    found.add(step.name)
+                    pending.append(step.name)
+        return found
+
+    def _fingerprint(self, step: Step):
+        items = []
+        for k in sorted(step.kwargs):
+            v = step.kwargs[k]
+            if isinstance(v, StepOutput):
+                v = (v.step, self.steps[v.step].version)
+            items.append((k, type(v), v))
+        fingerprint = (step.func, tuple(items))
+        try:
+            hash(fingerprint)
+        except TypeError:
+            # Can't tell whether unhashable args changed, so the step always runs
+            return None
+        return fingerprint
+
+    def run(self, force: bool = False) -> dict:
+        """
+        Run every step whose inputs changed since the last run, blocking until the workflow is done
+        :param force: Run every step regardless
+        :return: {step name: result} for every step
+        :raises RuntimeError: If a step fails. Steps downstream of it aren't run; everything else is.
+        """
+        results = {}
+        waiting = {name: len(step.upstream) for name, step in self.steps.items()}
+        remaining = [len(self.steps)]
+        errors = []
+        blocked = set()
+        ran = []
+        skipped = []
+        lock = threading.Lock()
+        done = threading.Event()
+        if not self.steps:
+            done.set()
+
+        def _finish(step: Step, result=None, error: BaseException = None):
+            with lock:
+                if error is None:
+                    results[step.name] = result
+                    newly_ready = []
+                    for other in self.steps.values():
+                        if step.name in other.upstream:
+                            waiting[other.name] -= 1
+                            if waiting[other.name] == 0:
+                                newly_ready.append(other)
+                else:
+                    errors.append((step.name, error))
+                    # Nothing downstream of a failed step runs
+                    newly_ready = []
+                    for name in self.downstream(step.name) - blocked:
+                        blocked.add(name)
+                        remaining[0] -= 1
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+            for other in newly_ready:
+                _start(other)
+
+        def _on_done(step: Step, fingerprint, job):
+            if job.status is JobStatus.DONE:
+                step.version += 1
+                step.fingerprint = fingerprint
+                self.store.put(job.result, key=step.name, label=f'workflow step {step.name}')
+                _finish(step, job.result)
+            else:
+                step.fingerprint = None
+                _finish(step, error=job.error or RuntimeError('Cancelled'))
+
+        def _start(step: Step):
+            fingerprint = self._fingerprint(step)
+            if not force and fingerprint is not None and fingerprint == step.fingerprint and step.name in self.store:
+                try:
+                    result = self.store.get(step.name)
+                except Exception:
+                    pass
+                else:
+                    with lock:
+                        skipped.append(step.name)
+                    _finish(step, result)
+                    return
+            kwargs = {k: results[v.step] if isinstance(v, StepOutput) else v for k, v in step.kwargs.items()}
+            with lock:
+                ran.append(step.name)
+            try:
+                job = self.executor.submit(FunctionCall(step.func, kwargs))
+            except Exception as e:
+                _finish(step, error=e)
+                return
+            job.add_done_callback(lambda j: _on_done(step, fingerprint, j))
+
+        # Listed before starting any, since up to date steps finish (and start their downstream steps) right away
+        for step in [step for step in self.steps.values() if waiting[step.name] == 0]:
+            _start(step)
+        done.wait()
+        self.last_ran, self.last_skipped = ran, skipped
+        if errors:
+            name, error = errors[0]
+            raise RuntimeError(f'Step {name} failed: {type(error).__name__}: {str(error)}') from error
+        return results
+
+    def ref(self, name: str) -> ResultRef:
+        """Reference to a step's stored result, e.g. for a FunctionCall"""
+        return self.store.ref(name)
+
+    def shutdown(self):
+        self.executor.shutdown()
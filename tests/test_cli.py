@@ -0,0 +1,41 @@
+import sys
+import textwrap
+import types
+
+import pytest
+
+from pygenerategui import cli, registry
+from pygenerategui.function_spec import get_function_spec
+
+SOURCE = '''
+from pygenerategui import pggui
+
+
+@pggui
+def count(n: int, progress: 'Progress'):
+    progress.update(total=n)
+    for _ in range(n):
+        progress.advance()
+    return progress.done
+'''
+
+
+@pytest.fixture
+def module():
+    name = 'pggui_test_cli_module'
+    module = types.ModuleType(name)
+    sys.modules[name] = module
+    exec(compile(textwrap.dedent(SOURCE), f'<{name}>', 'exec'), module.__dict__)
+    yield module
+    del sys.modules[name]
+    registry.unregister_module(name)
+
+
+def test_quoted_progress_param_is_not_an_option(module):
+    assert cli.arg_kind(get_function_spec(module.count).args['progress']) is None
+    assert cli.build_call(module.count, {'n': '3'})() == 3
+
+
+def test_quoted_progress_param_from_command_line(module, capsys):
+    assert cli.main(['-c', module.__name__, 'count', '--n', '3']) == 0
+    assert capsys.readouterr().out.strip() == '3'
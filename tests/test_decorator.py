@@ -0,0 +1,29 @@
+import pytest
+
+from pygenerategui import pggui
+
+
+def test_option_name_matching_a_param_is_an_override():
+    @pggui(timeout={'short': 1, 'long': 60})
+    def g(timeout: int):
+        return timeout
+
+    assert g._pggui_overrides == {'timeout': {'short': 1, 'long': 60}}
+    assert g._pggui_options == {}
+    assert not hasattr(g, '_pggui_limits')
+
+
+def test_options_are_options_without_a_param_of_that_name():
+    @pggui(timeout=2, cache=True)
+    def h(x: int):
+        return x
+
+    assert h._pggui_limits == {'timeout': 2}
+    assert h._pggui_options == {'timeout': 2, 'cache': True}
+
+
+@pytest.mark.parametrize('options', [{'timeout': {'a': 1}}, {'cache': 'yes'}, {'max_memory': -1},
+                                     {'cache_ttl': True}])
+def test_invalid_option_values_fail_when_decorated(options):
+    with pytest.raises(TypeError):
+        pggui(**options)(lambda x: x)
@@ -0,0 +1,59 @@
+import time
+
+from pygenerategui.executor import FunctionCall, Job, ThreadExecutor
+
+
+def numbers(n: int):
+    for i in range(n):
+        yield i
+
+
+def test_stream_items_are_coalesced_into_one_event():
+    job = Job(FunctionCall(numbers, {'n': 0}))
+    job.emit('items', ['1', '2'])
+    job.emit('items', ['3'])
+    assert job.events.get_nowait() == ('items', None)
+    assert job.events.empty()
+    assert job.take_items() == (['1', '2', '3'], 0)
+
+
+class SmallBufferJob(Job):
+    max_buffered_items = 3
+
+
+def test_stream_buffer_drops_oldest_items_past_its_limit():
+    job = SmallBufferJob(FunctionCall(numbers, {'n': 0}))
+    job.emit('items', ['1', '2'])
+    job.emit('items', ['3', '4', '5'])
+    assert job.take_items() == (['3', '4', '5'], 2)
+    assert job.take_items() == ([], 0)
+
+
+def test_undrained_stream_stays_bounded():
+    executor = ThreadExecutor()
+    job = executor.submit(FunctionCall(numbers, {'n': 300_000}))
+    while not job.done:
+        time.sleep(0.01)
+    items, dropped = job.take_items()
+    assert job.result == 300_000
+    assert len(items) == Job.max_buffered_items
+    assert len(items) + dropped == 300_000
+    assert job.events.qsize() <= 2
+    executor.shutdown()
+
+
+def test_capture_has_items_the_job_dropped(tmp_path):
+    executor = ThreadExecutor()
+    call = FunctionCall(numbers, {'n': 300_000})
+    call.capture = str(tmp_path)
+    job = executor.submit(call)
+    while not job.done:
+        time.sleep(0.01)
+    events = []
+    while not job.events.empty():
+        events.append(job.events.get_nowait())
+    path = next(payload for kind, payload in events if kind == 'capture')
+    assert job.take_items()[1] > 0
+    with open(path, encoding='utf-8') as f:
+        assert f.read().split() == [str(i) for i in range(300_000)]
+    executor.shutdown()
@@ -0,0 +1,55 @@
+import gc
+import weakref
+from enum import Enum
+
+from pygenerategui import pggui
+from pygenerategui.function_spec import OptionSource, convert_arg, get_function_spec
+
+
+class Color(Enum):
+    red = 1
+    blue = 2
+
+
+def test_option_maps_are_built_once_per_spec():
+    @pggui(color=Color, size=[str(n) for n in range(1000)])
+    def paint(color: Color, size: str):
+        return color, size
+
+    args = get_function_spec(paint).args
+    assert convert_arg(args['color'], 'blue') is Color.blue
+    assert convert_arg(args['size'], '999') == '999'
+    assert args['size'].options() is args['size'].options()
+    assert get_function_spec(paint).args['color'].options() is args['color'].options()
+
+
+def test_option_sources_are_asked_every_time():
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {'a': 1, 'b': len(calls)}
+
+    @pggui(x=OptionSource(load, ttl=0))
+    def f(x: int):
+        return x
+
+    arg = get_function_spec(f).args['x']
+    assert convert_arg(arg, 'b') == 1
+    assert convert_arg(arg, 'b') == 2
+
+
+class Tool:
+    @pggui
+    def method(self, x: int):
+        return x
+
+
+def test_bound_methods_share_their_function_spec():
+    first, second = Tool(), Tool()
+    assert get_function_spec(first.method) is get_function_spec(second.method)
+    assert list(get_function_spec(first.method).args) == ['self', 'x']
+    ref = weakref.ref(first)
+    del first
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,46 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from pygenerategui.lazy import LazyComponent
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    (tmp_path / 'pggui_slow_mod.py').write_text(
+        'import time\ntime.sleep(0.5)\nfrom pygenerategui import pggui\n\n\n@pggui\ndef f(x: int):\n    return x\n')
+    (tmp_path / 'pggui_broken_mod.py').write_text(
+        'import builtins\nbuiltins.pggui_broken_imports = getattr(builtins, "pggui_broken_imports", 0) + 1\n'
+        'raise ImportError("broken")\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield
+    for name in ('pggui_slow_mod', 'pggui_broken_mod'):
+        sys.modules.pop(name, None)
+
+
+def test_load_async_does_not_wait_for_an_import_under_way(modules):
+    component = LazyComponent('pggui_slow_mod')
+    # As prewarm does it, on its own thread
+    prewarm = threading.Thread(target=lambda: (component.load_async(), component.wait()))
+    prewarm.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    component.load_async()
+    assert not component.loaded
+    assert time.perf_counter() - start < 0.05
+    assert component.load().f(2) == 2
+    prewarm.join()
+
+
+def test_failed_import_is_not_retried(modules):
+    import builtins
+    component = LazyComponent('pggui_broken_mod')
+    component.load_async()
+    assert component.wait(5)
+    assert component.loaded
+    for _ in range(2):
+        with pytest.raises(ImportError):
+            component.load()
+    assert builtins.pggui_broken_imports == 1
@@ -0,0 +1,112 @@
+import functools
+import sys
+import textwrap
+import types
+
+import pytest
+
+from pygenerategui import registry
+
+SOURCE = '''
+import functools
+from pygenerategui import pggui
+
+
+def logged(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@pggui
+def plain(x: int):
+    return x
+
+
+@logged
+@pggui
+def wrapped(x: int):
+    return x
+
+
+def undecorated(x: int):
+    return x
+
+
+class Tool:
+    @pggui
+    def method(self, x: int):
+        return x
+
+    @logged
+    @pggui
+    def wrapped_method(self, x: int):
+        return x
+
+    @staticmethod
+    @pggui
+    def static(x: int):
+        return x
+
+
+class PlainTool:
+    @pggui
+    def method(self, x: int):
+        return x
+
+    @staticmethod
+    @pggui
+    def static(x: int):
+        return x
+'''
+
+
+@pytest.fixture
+def module():
+    name = 'pggui_test_registry_module'
+    module = types.ModuleType(name)
+    sys.modules[name] = module
+    exec(compile(textwrap.dedent(SOURCE), f'<{name}>', 'exec'), module.__dict__)
+    yield module
+    del sys.modules[name]
+    registry.unregister_module(name)
+
+
+def names(funcs):
+    return sorted(f.__name__ for f in funcs)
+
+
+def test_wrapped_module_function_is_found(module):
+    assert names(registry.find_functions(module)) == names(registry.scan_functions(module)) == ['plain', 'wrapped']
+
+
+def test_wrapped_method_is_found(module):
+    tool = module.Tool()
+    assert names(registry.find_functions(tool)) == names(registry.scan_functions(tool))
+    assert 'wrapped_method' in names(registry.find_functions(tool))
+
+
+def test_registry_is_used_when_it_matches(module, monkeypatch):
+    def no_scan(component):
+        raise AssertionError('scanned')
+    monkeypatch.setattr(registry, 'scan_functions', no_scan)
+    assert names(registry.find_functions(module.PlainTool())) == ['method', 'static']
+    assert names(registry.find_functions(module.PlainTool)) == ['static']
+
+
+def test_reexporting_package(tmp_path, monkeypatch):
+    package = tmp_path / 'pggui_test_reexport'
+    package.mkdir()
+    (package / '__init__.py').write_text('from .sub import *\n')
+    (package / 'sub.py').write_text('from pygenerategui import pggui\n\n\n'
+                                    '@pggui\ndef hello(name: str):\n    return name\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import pggui_test_reexport
+    try:
+        assert registry.find_functions(pggui_test_reexport) == registry.scan_functions(pggui_test_reexport)
+        assert names(registry.find_functions(pggui_test_reexport)) == ['hello']
+    finally:
+        for name in ('pggui_test_reexport', 'pggui_test_reexport.sub'):
+            sys.modules.pop(name, None)
+            registry.unregister_module(name)
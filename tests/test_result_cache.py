@@ -0,0 +1,40 @@
+from pygenerategui import pggui
+from pygenerategui.executor import FunctionCall
+from pygenerategui.result_cache import ResultCache, make_key
+
+
+def test_equal_values_of_different_types_get_different_keys():
+    def f(x):
+        return x
+    keys = {make_key(f, {'x': True}), make_key(f, {'x': 1}), make_key(f, {'x': 1.0})}
+    assert len(keys) == 3
+
+
+def test_unhashable_args_are_keyed_with_types():
+    def f(x):
+        return x
+    assert make_key(f, {'x': [1]}) != make_key(f, {'x': [True]})
+    assert make_key(f, {'x': [1], 'y': 1}) != make_key(f, {'x': [1], 'y': True})
+
+
+def test_cached_result_is_not_reused_for_equal_value_of_other_type():
+    @pggui(cache=True)
+    def describe(x: int):
+        return repr(x)
+
+    assert FunctionCall(describe, {'x': 1})() == '1'
+    assert FunctionCall(describe, {'x': True})() == 'True'
+    assert FunctionCall(describe, {'x': 1.0})() == '1.0'
+    call = FunctionCall(describe, {'x': 1})
+    assert call() == '1'
+    assert call.info.get('cached')
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('a') == 1
+    assert cache.is_missing(cache.get('b'))